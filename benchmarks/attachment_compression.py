@@ -0,0 +1,56 @@
+"""Compare the emails needed to send slips as HTML, gzip and zip attachments.
+
+Run with `python -m benchmarks.attachment_compression`. Slips are rendered from
+synthetic slip data and written with ShardedSlipsHtmlWriter under the default
+SES_MAX_ATTACHMENTS_SIZE budget, then grouped into emails and serialized as they would
+be sent to SES. The time covers writing (and compressing) the slips and building and
+serializing the emails.
+"""
+
+from io import BytesIO
+from time import perf_counter
+from typing import Literal
+
+from benchmarks.slip_rendering import make_slips
+from ccslips.config import ConfigSnapshot
+from ccslips.email import Email, group_attachments
+from ccslips.polines import ShardedSlipsHtmlWriter, write_credit_card_slips_html
+
+SLIP_COUNT = 20_000
+MAX_SIZE = ConfigSnapshot().ses_max_attachments_size
+COMPRESSIONS: tuple[Literal["gzip", "zip"] | None, ...] = (None, "gzip", "zip")
+
+
+def send_slips(
+    compression: Literal["gzip", "zip"] | None,
+) -> tuple[float, int, int]:
+    """Get the time taken, number of emails and total bytes of email to send slips."""
+    slips = make_slips(SLIP_COUNT)
+    start = perf_counter()
+    writer = ShardedSlipsHtmlWriter(BytesIO, MAX_SIZE, compression=compression)
+    write_credit_card_slips_html(slips, writer)
+    attachments = [
+        {"content": sink, "filename": f"slips_{part}.htm"}
+        for part, sink in enumerate(writer.sinks)
+    ]
+    email_sizes = []
+    for email_attachments in group_attachments(attachments, MAX_SIZE):
+        email = Email()
+        email.populate("from@example.com", "to@example.com", "Slips", email_attachments)
+        email_sizes.append(len(email.as_bytes()))
+    return perf_counter() - start, len(email_sizes), sum(email_sizes)
+
+
+def main() -> None:
+    print(f"{SLIP_COUNT} slips, {MAX_SIZE / 1024 / 1024:.0f}MiB of attachments per email")
+    for compression in COMPRESSIONS:
+        elapsed, emails, size = send_slips(compression)
+        print(
+            f"{compression or 'html':<5} {elapsed:6.2f}s  {emails:3} email(s)  "
+            f"{size / 1024 / 1024:7.2f}MiB sent  "
+            f"{SLIP_COUNT / emails:8,.0f} slips per email"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure AlmaClient's per-request overhead with and without a config snapshot.
+
+Run with `python -m benchmarks.client_overhead`. Requests are answered by a stub
+session without any I/O, so only the client's own work per request is measured. The
+"before" case reads Config env vars and rebuilds the base URL, headers and timeout
+for every request, as AlmaClient did before it took a config snapshot.
+"""
+
+import os
+from time import perf_counter
+from unittest.mock import patch
+from urllib.parse import urljoin
+
+import requests
+
+from ccslips.alma import AlmaClient
+from ccslips.config import Config
+from ccslips.ratelimit import TokenBucket
+
+REQUESTS = 20_000
+RUNS = 5
+ENV = {
+    "ALMA_API_URL": "https://alma.example.com/almaws/v1/",
+    "ALMA_API_READ_KEY": "benchmark",
+    "ALMA_API_TIMEOUT": "30",
+}
+
+
+class StubSession:
+    """Stand-in session answering every request with the same response."""
+
+    def __init__(self) -> None:
+        self.response = requests.Response()
+        self.response.status_code = 200
+        self.response._content = b'{"number": "POL-1"}'  # noqa: SLF001
+
+    def get(self, **_: object) -> requests.Response:
+        return self.response
+
+    def close(self) -> None:
+        pass
+
+
+class PerRequestConfigClient(AlmaClient):
+    """AlmaClient reading its configuration for every request."""
+
+    def _get(self, endpoint: str, params: dict | None = None) -> dict:
+        self.base_url = Config().ALMA_API_URL
+        self.headers = {
+            "Authorization": f"apikey {Config().ALMA_API_READ_KEY}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        self.timeout = float(Config().ALMA_API_TIMEOUT)
+        self._url_prefix = urljoin(self.base_url, ".")
+        return super()._get(endpoint, params)
+
+
+def time_requests(client: AlmaClient) -> float:
+    """Get the best mean time per request in seconds over several runs."""
+    client.session = StubSession()  # type: ignore[assignment]
+    timings = []
+    for _ in range(RUNS):
+        start = perf_counter()
+        for _ in range(REQUESTS):
+            client.get_full_po_line("POL-1")
+        timings.append((perf_counter() - start) / REQUESTS)
+    return min(timings)
+
+
+def main() -> None:
+    with patch.dict(os.environ, ENV):
+        rate_limiter = TokenBucket(rate=1e9, burst=REQUESTS)
+        before = time_requests(PerRequestConfigClient(rate_limiter=rate_limiter))
+        after = time_requests(AlmaClient(rate_limiter=rate_limiter))
+    print(f"config read per request   {before * 1e6:6.2f}us per request")
+    print(
+        f"config snapshot           {after * 1e6:6.2f}us per request "
+        f"({(before - after) / before:.0%} less overhead)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measure the CLI's cold start time against a budget.
+
+Run with `python -m benchmarks.cold_start`. The CLI is started in a fresh interpreter
+with `--help` several times and the median wall time is compared with the budget; the
+script exits with an error if the budget is exceeded, so it can be used to catch
+startup regressions. The modules contributing most to the import time of ccslips.cli
+(as reported by `python -X importtime`) are listed to help find the cause.
+"""
+
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+RUNS = 10
+BUDGET_MS = 300
+TOP_IMPORTS = 10
+CLI = "from ccslips.cli import main; main()"
+
+
+def time_cold_start() -> float:
+    start = perf_counter()
+    subprocess.run(  # noqa: S603
+        [sys.executable, "-c", CLI, "--help"], check=True, capture_output=True
+    )
+    return perf_counter() - start
+
+
+def get_import_times() -> list[tuple[int, str]]:
+    """Get the cumulative import time in microseconds of each module of the CLI."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ccslips.cli"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    import_times = []
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        import_times.append((int(cumulative), module.rstrip()))
+    return sorted(import_times, reverse=True)
+
+
+def main() -> None:
+    time_cold_start()  # warm up the filesystem cache and bytecode
+    timings = [time_cold_start() for _ in range(RUNS)]
+    median = statistics.median(timings) * 1000
+    print(
+        f"CLI cold start (--help): median {median:.0f}ms, "
+        f"min {min(timings) * 1000:.0f}ms over {RUNS} runs (budget {BUDGET_MS}ms)"
+    )
+    print("Slowest imports of ccslips.cli (cumulative):")
+    for cumulative, module in get_import_times()[:TOP_IMPORTS]:
+        print(f"{cumulative / 1000:8.1f}ms {module}")
+    if median > BUDGET_MS:
+        sys.exit(f"CLI cold start {median:.0f}ms exceeds the {BUDGET_MS}ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare per-request latency with and without the pooled AlmaClient session.
+
+Run with `python -m benchmarks.connection_pool`. The "before" case sends each request
+through module-level requests.get, as the client did before it owned a session, so
+every request pays for a new connection.
+"""
+
+import os
+import statistics
+from time import perf_counter
+from unittest.mock import patch
+
+import requests
+
+from benchmarks.stub_alma import StubAlmaServer, make_funds, make_po_lines
+from ccslips.alma import AlmaClient
+
+REQUESTS = 200
+CONNECTION_LATENCY = 0.02
+ENV = {
+    "ALMA_API_READ_KEY": "benchmark",
+    "ALMA_API_RATE_LIMIT": "1000",
+    "ALMA_API_TIMEOUT": "30",
+}
+
+
+class UnpooledSession:
+    """Stand-in session sending every request through module-level requests.get."""
+
+    get = staticmethod(requests.get)
+
+    def close(self) -> None:
+        pass
+
+
+def time_requests(client: AlmaClient, po_line_ids: list[str]) -> list[float]:
+    timings = []
+    for po_line_id in po_line_ids:
+        start = perf_counter()
+        client.get_full_po_line(po_line_id)
+        timings.append(perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float], connections: int) -> None:
+    print(
+        f"{label:<28} mean={statistics.mean(timings) * 1000:7.2f}ms "
+        f"p95={statistics.quantiles(timings, n=20)[-1] * 1000:7.2f}ms "
+        f"connections={connections}"
+    )
+
+
+def main() -> None:
+    po_lines = make_po_lines(REQUESTS)
+    po_line_ids = [line["number"] for line in po_lines]
+    with (
+        StubAlmaServer(
+            po_lines, make_funds(12), connection_latency=CONNECTION_LATENCY
+        ) as server,
+        patch.dict(os.environ, {"ALMA_API_URL": server.url, **ENV}),
+    ):
+        with AlmaClient() as client:
+            client.session = UnpooledSession()  # type: ignore[assignment]
+            timings = time_requests(client, po_line_ids)
+        report("requests.get per request", timings, server.connection_count)
+        before = server.connection_count
+        with AlmaClient() as client:
+            timings = time_requests(client, po_line_ids)
+        report("pooled AlmaClient session", timings, server.connection_count - before)
+
+
+if __name__ == "__main__":
+    main()
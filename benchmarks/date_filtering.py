@@ -0,0 +1,57 @@
+"""Show how the number of PO line pages fetched for one day scales with history size.
+
+Run with `python -m benchmarks.date_filtering`. Each history has 20 PO lines per day
+and the target date is two days before the newest PO line, as in the nightly run.
+"""
+
+import os
+from time import perf_counter
+from unittest.mock import patch
+
+from benchmarks.stub_alma import StubAlmaServer, make_funds, make_po_line_history
+from ccslips.alma import AlmaClient
+
+ENV = {
+    "ALMA_API_READ_KEY": "benchmark",
+    "ALMA_API_RATE_LIMIT": "1000",
+    "ALMA_API_TIMEOUT": "30",
+}
+HISTORY_DAYS = (10, 100, 1000)
+PER_DAY = 20
+END_DATE = "2023-01-04"
+TARGET_DATE = "2023-01-02"
+
+
+def main() -> None:
+    print(f"{'history':>8} {'full scan pages':>16} {'newest first pages':>19}")
+    for days in HISTORY_DAYS:
+        po_lines = make_po_line_history(days, PER_DAY, END_DATE)
+        with (
+            StubAlmaServer(po_lines, make_funds(12)) as server,
+            patch.dict(os.environ, {"ALMA_API_URL": server.url, **ENV}),
+            AlmaClient() as client,
+        ):
+            full_scan = [
+                line
+                for line in client.get_brief_po_lines()
+                if line["created_date"] == f"{TARGET_DATE}Z"
+            ]
+            full_scan_pages = server.request_count
+            start = perf_counter()
+            with patch.object(
+                client,
+                "get_full_po_line",
+                side_effect=lambda number, fields=None: number,  # noqa: ARG005
+            ):
+                newest_first = list(client.get_full_po_lines(date=TARGET_DATE))
+            elapsed = perf_counter() - start
+            newest_first_pages = server.request_count - full_scan_pages
+        assert len(full_scan) == len(newest_first) == PER_DAY  # noqa: S101
+        print(
+            f"{len(po_lines):>8} {full_scan_pages:>16} {newest_first_pages:>19} "
+            f"({elapsed * 1000:.1f}ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Measure the full CLI run against a local stub Alma API at increasing PO line counts.
+
+Run with `python -m benchmarks.end_to_end`, optionally passing the PO line counts to
+run and stub API settings, e.g. `python -m benchmarks.end_to_end 1000 --latency 0.01
+--error-rate 0.01 --execution-mode async`. See `--help` for all options.
+
+Each run invokes ccslips.cli.main in a fresh process, with SES mocked by moto, so that
+its peak memory is measured in isolation from the stub API and from earlier runs. Wall
+time, throughput (PO lines per second), peak resident memory and the number of Alma
+API requests served are reported for each run.
+"""
+
+import argparse
+import os
+import resource
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter
+from unittest.mock import patch
+
+import boto3
+from click.testing import CliRunner
+from moto import mock_aws
+
+from benchmarks.stub_alma import StubAlmaServer, make_funds, make_po_lines
+from ccslips.cli import main as cli_main
+
+PO_LINE_COUNTS = (10, 1_000, 50_000)
+DATE = "2023-01-02"
+SOURCE_EMAIL = "from@example.com"
+ENV = {
+    "ALMA_API_READ_KEY": "benchmark",
+    "ALMA_API_RATE_LIMIT": "1000",
+    "ALMA_API_RATE_BURST": "100",
+    "ALMA_API_TIMEOUT": "30",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "SENTRY_DSN": "None",
+    "SES_RECIPIENT_EMAIL": "recipient@example.com",
+    "SES_SEND_FROM_EMAIL": SOURCE_EMAIL,
+    "WORKSPACE": "benchmark",
+}
+
+
+def run_cli(alma_api_url: str, args: list[str]) -> tuple[float, int]:
+    """Run the CLI with SES mocked, returning wall time and peak memory in bytes."""
+    with (
+        patch.dict(os.environ, {"ALMA_API_URL": alma_api_url, **ENV}),
+        mock_aws(),
+    ):
+        boto3.client("ses").verify_email_identity(EmailAddress=SOURCE_EMAIL)
+        start = perf_counter()
+        result = CliRunner().invoke(cli_main, args)
+        elapsed = perf_counter() - start
+    if result.exit_code != 0:
+        raise RuntimeError(result.output) from result.exception
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, peak if sys.platform == "darwin" else peak * 1024
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("po_lines", nargs="*", type=int, default=PO_LINE_COUNTS)
+    parser.add_argument("--funds", type=int, default=12, help="number of funds")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per API request"
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, help="API requests answered per second"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of requests failing"
+    )
+    parser.add_argument(
+        "--execution-mode",
+        choices=["sequential", "pipelined", "async"],
+        default="sequential",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    cli_args = ["--date", DATE, "--execution-mode", args.execution_mode]
+    print(
+        f"{'po lines':>8} {'wall time':>10} {'lines/s':>9} {'peak memory':>12} "
+        f"{'requests':>9} {'throttled':>10} {'errors':>7}"
+    )
+    for count in args.po_lines:
+        with (
+            StubAlmaServer(
+                make_po_lines(count, DATE, fund_count=args.funds),
+                make_funds(args.funds),
+                request_latency=args.latency,
+                rate_limit=args.rate_limit,
+                error_rate=args.error_rate,
+            ) as server,
+            ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor,
+        ):
+            elapsed, peak = executor.submit(run_cli, server.url, cli_args).result()
+        print(
+            f"{count:>8} {elapsed:>9.2f}s {count / elapsed:>9.1f} "
+            f"{peak / 2**20:>9.1f}MiB {server.request_count:>9} "
+            f"{server.throttled_count:>10} {server.error_count:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Compare decoding full PO line responses whole against selecting only slip fields.
+
+Run with `python -m benchmarks.json_decoding`. Each synthetic PO line response has the
+large nested structures of a real full PO line record (locations with item copies,
+interested users, notes and alerts). The "before" case decodes responses with
+requests.Response.json, as AlmaClient did, and keeps the whole record. The "after"
+case decodes them with ccslips.decode.loads (orjson if it is installed, or else the
+standard library json module) and keeps only the PO_LINE_FIELDS used for slips.
+"""
+
+import tracemalloc
+from collections.abc import Callable
+from time import perf_counter
+
+import requests
+
+from benchmarks.stub_alma import make_po_lines
+from ccslips.decode import loads, select_fields
+from ccslips.polines import PO_LINE_FIELDS
+
+RESPONSES = 2_000
+COPIES_PER_LOCATION = 20
+
+
+def make_large_po_line(po_line: dict) -> dict:
+    """Add realistically sized nested structures to a synthetic PO line record."""
+    number = po_line["number"]
+    copy = {
+        "barcode": f"3901500{number}",
+        "description": "v.1",
+        "enumeration_a": "1",
+        "chronology_i": "2023",
+        "is_temporary": False,
+        "permanent_shelving_location": "STACKS",
+        "receive_date": "2023-01-10Z",
+        "expected_receipt_date": "2023-01-09Z",
+        "item_policy": {"value": "BOOK", "desc": "Book"},
+        "pid": f"2345678900006761{number}",
+    }
+    return {
+        **po_line,
+        "owner": {"value": "MAIN", "desc": "Main Library"},
+        "type": {"value": "PRINT_OT", "desc": "Print Book - One Time"},
+        "location": [
+            {
+                "quantity": 1,
+                "library": {"value": f"LIB-{i}", "desc": f"Library {i}"},
+                "shelving_location": "STACKS",
+                "copy": [copy] * COPIES_PER_LOCATION,
+            }
+            for i in range(3)
+        ],
+        "interested_user": [
+            {
+                "primary_id": f"user-{i}",
+                "first_name": "Interested",
+                "last_name": f"User {i}",
+                "notify_receiving_activation": True,
+                "hold_item": False,
+                "notify_renewal": False,
+                "notify_cancel": True,
+            }
+            for i in range(10)
+        ],
+        "note": [
+            *po_line["note"],
+            *(
+                {
+                    "note_text": f"Note {i} about ordering this title.",
+                    "created_date": "2023-01-02Z",
+                    "created_by": "staff",
+                }
+                for i in range(5)
+            ),
+        ],
+        "alert": [{"value": "FUND_MISSING", "desc": "Fund is missing"}] * 3,
+        "resource_metadata": {
+            **po_line["resource_metadata"],
+            "author": "Author, Example",
+            "isbn": "9780000000000",
+            "publisher": "Example Press",
+            "publication_place": "Cambridge, MA",
+            "mms_id": {"value": f"99123456789006761{number}"},
+        },
+    }
+
+
+def make_responses(count: int) -> list[requests.Response]:
+    responses = []
+    for po_line in make_po_lines(count):
+        response = requests.Response()
+        response.status_code = 200
+        response.encoding = "utf-8"
+        response._content = requests.compat.json.dumps(  # noqa: SLF001
+            make_large_po_line(po_line)
+        ).encode()
+        responses.append(response)
+    return responses
+
+
+def decode_whole(response: requests.Response) -> dict:
+    return response.json()
+
+
+def decode_selected(response: requests.Response) -> dict:
+    return select_fields(loads(response.content), PO_LINE_FIELDS)
+
+
+def measure(
+    decode: Callable[[requests.Response], dict], responses: list[requests.Response]
+) -> tuple[float, int, list[dict]]:
+    """Decode all responses, returning the time taken and the memory kept alive.
+
+    Memory is measured on a second pass, as tracing allocations slows decoding down.
+    """
+    start = perf_counter()
+    records = [decode(response) for response in responses]
+    elapsed = perf_counter() - start
+    del records
+    tracemalloc.start()
+    records = [decode(response) for response in responses]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, current, records
+
+
+def main() -> None:
+    responses = make_responses(RESPONSES)
+    size = sum(len(response.content) for response in responses) / RESPONSES
+    print(
+        f"{RESPONSES} responses of {size / 1024:.1f}KiB, decoded with {loads.__module__}"
+    )
+    # decode every response once to warm up before measuring
+    for response in responses:
+        decode_whole(response)
+        decode_selected(response)
+    before_time, before_memory, before = measure(decode_whole, responses)
+    after_time, after_memory, after = measure(decode_selected, responses)
+    assert after == [  # noqa: S101
+        select_fields(record, PO_LINE_FIELDS) for record in before
+    ]
+    for label, elapsed, memory in (
+        ("Response.json, whole record", before_time, before_memory),
+        ("loads, slip fields only", after_time, after_memory),
+    ):
+        print(
+            f"{label:<28} {elapsed / RESPONSES * 1e6:7.1f}us per response, "
+            f"{memory / RESPONSES / 1024:6.1f}KiB kept per record"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare extracting slip data one PO line at a time against extracting in batches.
+
+Run with `python -m benchmarks.slip_extraction`. PO lines are synthetic full records
+created over a month, as in a large backfill, and fund account numbers are looked up
+in memory so only extraction itself is measured. The "per line" case calls
+extract_credit_card_slip_data for each record, as process_po_lines_by_date did. The
+batch cases call extract_credit_card_slips_data for batches of records.
+"""
+
+from collections.abc import Callable
+from itertools import batched
+from time import perf_counter
+
+from benchmarks.stub_alma import make_funds, make_po_line_history
+from ccslips.polines import (
+    EXTRACT_BATCH_SIZE,
+    extract_credit_card_slip_data,
+    extract_credit_card_slips_data,
+)
+from ccslips.slip import CreditCardSlip
+
+DAYS = 30
+PO_LINES_PER_DAY = 2_000
+RUNS = 5
+
+
+class StubFundLookup:
+    """Look up fund account numbers in memory."""
+
+    def __init__(self) -> None:
+        self.external_ids = {fund["code"]: fund["external_id"] for fund in make_funds(12)}
+
+    def get_fund_external_id(self, fund_code: str) -> str | None:
+        return self.external_ids.get(fund_code)
+
+
+def extract_per_line(
+    client: StubFundLookup, po_lines: list[dict]
+) -> list[CreditCardSlip]:
+    return [extract_credit_card_slip_data(client, po_line) for po_line in po_lines]
+
+
+def extract_in_batches(
+    batch_size: int,
+) -> Callable[[StubFundLookup, list[dict]], list[CreditCardSlip]]:
+    def extract(client: StubFundLookup, po_lines: list[dict]) -> list[CreditCardSlip]:
+        return [
+            slip
+            for batch in batched(po_lines, batch_size)
+            for slip in extract_credit_card_slips_data(client, batch)
+        ]
+
+    return extract
+
+
+def time_extraction(
+    extract: Callable[[StubFundLookup, list[dict]], list[CreditCardSlip]],
+    client: StubFundLookup,
+    po_lines: list[dict],
+) -> tuple[float, list[CreditCardSlip]]:
+    """Get the best time in seconds to extract all PO lines over several runs."""
+    timings = []
+    for _ in range(RUNS):
+        start = perf_counter()
+        slips = extract(client, po_lines)
+        timings.append(perf_counter() - start)
+    return min(timings), slips
+
+
+def main() -> None:
+    po_lines = make_po_line_history(DAYS, PO_LINES_PER_DAY, "2023-01-31")
+    client = StubFundLookup()
+    print(f"{len(po_lines)} PO lines created over {DAYS} days")
+    before, expected = time_extraction(extract_per_line, client, po_lines)
+    print(f"{'per line':<18} {len(po_lines) / before:9,.0f} PO lines/s")
+    for batch_size in (EXTRACT_BATCH_SIZE, len(po_lines)):
+        after, slips = time_extraction(extract_in_batches(batch_size), client, po_lines)
+        assert slips == expected  # noqa: S101
+        print(
+            f"{f'batches of {batch_size}':<18} {len(po_lines) / after:9,.0f} PO lines/s "
+            f"({before / after:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare rendering slips with the compiled SlipTemplate against the ElementTree path.
+
+Run with `python -m benchmarks.slip_rendering`. The ElementTree path is the previous
+implementation of generate_credit_card_slips_html: deepcopy the template tree for each
+slip, populate it with populate_credit_card_slip_xml_fields and serialize it. Slips
+are rendered both from CreditCardSlip records and from the dicts previously used for
+slip data, and the memory held by each form of slip data is compared.
+"""
+
+import tracemalloc
+import xml.etree.ElementTree as ET
+from collections.abc import Callable, Iterable
+from copy import deepcopy
+from time import perf_counter
+
+from ccslips.polines import (
+    generate_credit_card_slips_html,
+    populate_credit_card_slip_xml_fields,
+)
+from ccslips.render import SLIP_TEMPLATE_PATH, load_slip_template
+from ccslips.slip import CreditCardSlip
+
+SLIP_COUNTS = (1_000, 10_000)
+
+
+def make_slips(count: int) -> list[CreditCardSlip]:
+    return [
+        CreditCardSlip(
+            account_1="account-abc",
+            account_2="account-def",
+            cardholder=f"cardholder {i}",
+            invoice_number="Invoice #: 230102BOO",
+            po_date="230102",
+            po_line_number=f"POL-{i}",
+            price="$12.00",
+            quantity="3",
+            item_title=f"Book & title {i}",
+            total_price="$12.00",
+            vendor_code="CORP",
+            vendor_name="Corporation",
+        )
+        for i in range(count)
+    ]
+
+
+def make_slip_dicts(count: int) -> list[dict]:
+    return [dict(slip.items()) for slip in make_slips(count)]
+
+
+def measure_memory(make: Callable[[int], list], count: int) -> int:
+    """Get the memory in bytes allocated for a list of slip data and kept alive."""
+    tracemalloc.start()
+    slips = make(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del slips
+    return current
+
+
+def generate_with_element_tree(po_line_data: Iterable[CreditCardSlip]) -> str:
+    xml_template = ET.parse(SLIP_TEMPLATE_PATH).getroot()  # noqa: S314
+    output = ET.fromstring("<html></html>")  # noqa: S314
+    for line in po_line_data:
+        output.append(populate_credit_card_slip_xml_fields(deepcopy(xml_template), line))
+    return ET.tostring(output, encoding="unicode", method="xml")
+
+
+def main() -> None:
+    for count in SLIP_COUNTS:
+        slips = make_slips(count)
+        start = perf_counter()
+        before = generate_with_element_tree(slips)
+        element_tree_time = perf_counter() - start
+        start = perf_counter()
+        after = generate_credit_card_slips_html(slips)
+        compiled_time = perf_counter() - start
+        assert before == after  # noqa: S101
+        print(
+            f"{count:>6} slips: element tree {element_tree_time * 1000:8.1f}ms, "
+            f"compiled template {compiled_time * 1000:7.1f}ms "
+            f"({element_tree_time / compiled_time:.0f}x faster, identical output)"
+        )
+        start = perf_counter()
+        template = load_slip_template()
+        from_dicts = (
+            f"<html>{''.join(map(template.render, make_slip_dicts(count)))}</html>"
+        )
+        dict_time = perf_counter() - start
+        assert from_dicts == after  # noqa: S101
+        record_memory = measure_memory(make_slips, count)
+        dict_memory = measure_memory(make_slip_dicts, count)
+        print(
+            f"{count:>6} slips: dicts {dict_time * 1000:7.1f}ms and "
+            f"{dict_memory / count:.0f} bytes per slip, CreditCardSlip records "
+            f"{compiled_time * 1000:7.1f}ms and "
+            f"{record_memory / count:.0f} bytes per slip"
+        )
+
+
+if __name__ == "__main__":
+    main()
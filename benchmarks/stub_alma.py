@@ -0,0 +1,229 @@
+"""A minimal local stand-in for the Alma acquisitions API used by the benchmarks.
+
+Serves the endpoints called by AlmaClient (acq/po-lines, acq/po-lines/{id} and
+acq/funds) from in-memory synthetic records over HTTP/1.1 with keep-alive support.
+Latency, Alma's per-second rate limit and transient server errors can be simulated.
+"""
+
+import datetime
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Self
+from urllib.parse import parse_qs, urlparse
+
+
+def make_po_lines(
+    count: int, created_date: str = "2023-01-02", start: int = 0, fund_count: int = 12
+) -> list[dict]:
+    """Generate synthetic full PO line records, all created on the same date.
+
+    Each PO line is charged to one of fund_count funds, as generated by make_funds.
+    """
+    return [
+        {
+            "acquisition_method": {"desc": "Credit Card"},
+            "created_date": f"{created_date}Z",
+            "fund_distribution": [
+                {
+                    "fund_code": {"value": f"FUND-{i % fund_count}"},
+                    "amount": {"sum": "10.00"},
+                }
+            ],
+            "location": [{"quantity": 1}],
+            "note": [{"note_text": f"CC-cardholder {i}"}],
+            "number": f"POL-{i}",
+            "price": {"sum": "10.00"},
+            "resource_metadata": {"title": f"Book title {i}"},
+            "status": {"value": "ACTIVE"},
+            "vendor_account": "CORP",
+            "vendor": {"value": "CORP", "desc": "Corporation"},
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def make_po_line_history(days: int, per_day: int, end_date: str) -> list[dict]:
+    """Generate PO lines created over a number of days ending on end_date.
+
+    Records are returned oldest first, which is not the order Alma is asked for.
+    """
+    end = datetime.date.fromisoformat(end_date)
+    po_lines: list[dict] = []
+    for day in range(days - 1, -1, -1):
+        created_date = (end - datetime.timedelta(days=day)).isoformat()
+        po_lines.extend(make_po_lines(per_day, created_date, start=len(po_lines)))
+    return po_lines
+
+
+def make_funds(count: int) -> list[dict]:
+    """Generate synthetic fund records."""
+    return [{"code": f"FUND-{i}", "external_id": f"account-{i}"} for i in range(count)]
+
+
+class StubAlmaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "StubAlmaServer"
+
+    def setup(self) -> None:
+        """Simulate the cost of establishing a new (TLS) connection."""
+        super().setup()
+        self.server.count_connection()
+        time.sleep(self.server.connection_latency)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path.strip("/")
+        self.server.count_request()
+        if self.server.throttle():
+            self.send_json(
+                429,
+                {
+                    "errorsExist": True,
+                    "errorList": {"error": [{"errorCode": "PER_SECOND_THRESHOLD"}]},
+                },
+            )
+            return
+        if self.server.fail():
+            self.send_json(503, {"errorsExist": True})
+            return
+        if path == "acq/po-lines":
+            po_lines = self.server.po_lines
+            if params.get("order_by") == "created_date":
+                po_lines = sorted(
+                    po_lines,
+                    key=lambda line: line["created_date"],
+                    reverse=params.get("direction") == "desc",
+                )
+            body = self.server.paged(po_lines, "po_line", params)
+        elif path.startswith("acq/po-lines/"):
+            body = self.server.po_lines_by_number.get(path.rsplit("/", 1)[1], {})
+        elif path == "acq/funds":
+            if fund_code := params.get("q", "").removeprefix("fund_code~"):
+                funds = [self.server.funds_by_code[fund_code]]
+                body = {"fund": funds, "total_record_count": 1}
+            else:
+                body = self.server.paged(self.server.funds, "fund", params)
+        else:
+            self.send_error(404)
+            return
+        time.sleep(self.server.request_latency)
+        self.send_json(200, body)
+
+    def send_json(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *_: Any) -> None:  # noqa: ANN401
+        pass
+
+
+class StubAlmaServer(ThreadingHTTPServer):
+    """Threaded HTTP server serving synthetic Alma records on a free local port.
+
+    Args:
+        po_lines: Full PO line records to serve.
+        funds: Fund records to serve.
+        request_latency: Seconds to wait before answering each request.
+        connection_latency: Seconds to wait when each new connection is opened,
+            approximating a TCP+TLS handshake to the real API.
+        rate_limit: If set, the maximum number of requests answered per second, with
+            requests over the limit answered with HTTP 429 as Alma does.
+        error_rate: Fraction of requests answered with HTTP 503, chosen at random.
+        seed: Seed for choosing the requests that fail, for repeatable runs.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        po_lines: list[dict],
+        funds: list[dict],
+        request_latency: float = 0.0,
+        connection_latency: float = 0.0,
+        *,
+        rate_limit: float | None = None,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(("127.0.0.1", 0), StubAlmaHandler)
+        self.po_lines = po_lines
+        self.po_lines_by_number = {line["number"]: line for line in po_lines}
+        self.funds = funds
+        self.funds_by_code = {fund["code"]: fund for fund in funds}
+        self.request_latency = request_latency
+        self.connection_latency = connection_latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.request_count = 0
+        self.connection_count = 0
+        self.throttled_count = 0
+        self.error_count = 0
+        self._random = random.Random(seed)  # noqa: S311
+        self._answered: deque[float] = deque()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}/"
+
+    def count_connection(self) -> None:
+        with self._lock:
+            self.connection_count += 1
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.request_count += 1
+
+    def throttle(self) -> bool:
+        """Check whether a request exceeds the rate limit over the last second."""
+        if self.rate_limit is None:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            while self._answered and self._answered[0] <= now - 1:
+                self._answered.popleft()
+            if len(self._answered) >= self.rate_limit:
+                self.throttled_count += 1
+                return True
+            self._answered.append(now)
+            return False
+
+    def fail(self) -> bool:
+        """Check whether a request should fail with a simulated server error."""
+        with self._lock:
+            if self._random.random() < self.error_rate:
+                self.error_count += 1
+                return True
+            return False
+
+    @staticmethod
+    def paged(records: list[dict], record_type: str, params: dict[str, str]) -> dict:
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        return {
+            record_type: records[offset : offset + limit],
+            "total_record_count": len(records),
+        }
+
+    def __enter__(self) -> Self:
+        """Start serving requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Stop serving requests and close the server socket."""
+        self.shutdown()
+        self.server_close()
@@ -1,11 +1,21 @@
 import logging
-import time
-from collections.abc import Generator
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Self
 from urllib.parse import urljoin
 
-import requests
+from ccslips.cache import FundCache, ResponseCache
+from ccslips.config import Config, ConfigSnapshot
+from ccslips.decode import FieldSpec, loads, select_fields
+from ccslips.metrics import metrics
+from ccslips.ratelimit import TokenBucket
+from ccslips.retry import RETRYABLE_STATUSES, RetryPolicy
 
-from ccslips.config import Config
+if TYPE_CHECKING:
+    import requests
 
 logger = logging.getLogger(__name__)
 
@@ -17,28 +27,252 @@ class AlmaClient:
     processing.
 
     Notes:
-        - All requests to the Alma API include a 0.1 second wait to ensure we don't
-          exceed the API rate limit.
+        - All requests to the Alma API pass through a token bucket rate limiter to
+          ensure we don't exceed the API rate limit. The limiter backs off when Alma
+          responds with HTTP 429 and can be shared between clients and threads.
         - If no records are found for a given endpoint with the provided parameters,
           Alma will still return a 200 success response with a json object of
           {"total_record_count": 0} and these methods will return that object.
+        - All requests share a single keep-alive connection pool owned by the client,
+          so the client should be closed when no longer needed, either by calling
+          close() or by using the client as a context manager.
+        - Fund external IDs looked up with get_fund_external_id are cached by the
+          client, and optionally persisted to a SQLite database in CACHE_DIR.
+        - When max_workers is greater than one, full PO line records are fetched on a
+          thread pool owned by the client, still subject to the shared rate limiter.
+        - GET requests that fail with a transient server error (HTTP 5xx), connection
+          error or timeout are retried with exponential backoff and jitter, up to a
+          retry budget shared by all requests of the client.
+        - If a response cache is provided (or RESPONSE_CACHE_TTL is set), responses
+          are cached by URL, in CACHE_DIR if set, and stale responses are revalidated
+          with conditional requests where Alma provides an ETag or Last-Modified
+          header.
+        - Configuration is read once, from the config snapshot passed to the client
+          or else a new snapshot, and the base URL and request headers are built
+          once when the client is created.
     """
 
-    @property
-    def base_url(self) -> str:
-        return Config().ALMA_API_URL
+    throttle_retries = 5
 
-    @property
-    def headers(self) -> dict:
-        return {
-            "Authorization": f"apikey {Config().ALMA_API_READ_KEY}",
+    def __init__(
+        self,
+        pool_size: int | None = None,
+        connection_retries: int | None = None,
+        rate_limiter: TokenBucket | None = None,
+        max_workers: int | None = None,
+        fund_cache: FundCache | None = None,
+        *,
+        response_cache: ResponseCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        config: ConfigSnapshot | None = None,
+    ) -> None:
+        config = config or Config().snapshot()
+        self.base_url = config.alma_api_url
+        self.headers = {
+            "Authorization": f"apikey {config.alma_api_read_key}",
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
+        self.timeout = config.alma_api_timeout
+        # endpoints are appended to this rather than joined to the base URL per request
+        self._url_prefix = urljoin(self.base_url, ".")
+        self.max_workers = max_workers or config.alma_api_max_workers
+        self.pool_size = (
+            pool_size or config.alma_api_pool_size or max(10, self.max_workers)
+        )
+        self.connection_retries = (
+            connection_retries
+            if connection_retries is not None
+            else config.alma_api_connection_retries
+        )
+        self.session = self._create_session()
+        self.rate_limiter = rate_limiter or TokenBucket(
+            rate=config.alma_api_rate_limit, burst=config.alma_api_rate_burst
+        )
+        self.fund_cache = fund_cache or FundCache(
+            path=config.cache_dir / "funds.sqlite3" if config.cache_dir else None,
+            ttl=config.fund_cache_ttl,
+        )
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=config.alma_api_max_attempts,
+            budget=config.alma_api_retry_budget,
+        )
+        self.response_cache = response_cache
+        if response_cache is None and config.response_cache_ttl:
+            self.response_cache = ResponseCache(
+                path=(
+                    config.cache_dir / "responses.sqlite3" if config.cache_dir else None
+                ),
+                ttl=config.response_cache_ttl,
+                max_size=config.response_cache_max_size,
+            )
+        self.daily_calls_remaining: int | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __enter__(self) -> Self:
+        """Enter a context in which the client is closed on exit."""
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Close the client session."""
+        self.close()
+
+    def _create_session(self) -> "requests.Session":
+        """Create a requests session with a keep-alive connection pool.
+
+        The session retries GET requests whose connection could not be established or
+        was reset (e.g. a pooled keep-alive connection closed by the server) before the
+        request was sent. Read timeouts and errors are not retried here but by the
+        client's retry policy, so that every retry is counted against its budget, and
+        neither are HTTP error statuses.
+
+        requests is imported here rather than with the module, as it takes a
+        significant part of the CLI's startup time.
+        """
+        import requests  # noqa: PLC0415
+        from requests.adapters import HTTPAdapter  # noqa: PLC0415
+        from urllib3.util import Retry  # noqa: PLC0415
+
+        retries = Retry(
+            total=None,
+            connect=self.connection_retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=0.5,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retries,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
     @property
-    def timeout(self) -> float:
-        return float(Config().ALMA_API_TIMEOUT)
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="alma"
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """Close the client's session, pooled connections and worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self.fund_cache.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
+        self.session.close()
+
+    def map_in_order[T, R](
+        self, func: Callable[[T], R], items: Iterable[T]
+    ) -> Generator[R, None, None]:
+        """Apply a function to items on the client's thread pool.
+
+        Results are yielded in the same order as the items regardless of the order in
+        which they complete. At most twice max_workers calls are in flight at once, so
+        items are consumed lazily and memory use stays bounded. If a call raises an
+        exception, it is re-raised when its result is reached and all pending calls are
+        cancelled.
+        """
+        pending: deque[Future[R]] = deque()
+        try:
+            for item in items:
+                pending.append(self.executor.submit(func, item))
+                if len(pending) >= self.max_workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _get(self, endpoint: str, params: dict | None = None) -> dict:
+        """Send a rate limited GET request to an Alma API endpoint and return its JSON.
+
+        Throttled (HTTP 429) responses are retried up to throttle_retries times after
+        the rate limiter has backed off, unless Alma reports that the daily API call
+        limit has been reached. Transient errors are retried according to the client's
+        retry policy.
+
+        If the client has a response cache, fresh cached responses are returned without
+        a request and stale ones are revalidated with a conditional request.
+        """
+        url = self._url_prefix + endpoint
+        headers = self.headers
+        cache_key = cached = None
+        if self.response_cache is not None:
+            cache_key = get_cache_key(url, params)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                if cached.fresh:
+                    return loads(cached.body)
+                headers = {**headers, **cached.conditional_headers}
+        response = self._send(url, params, headers)
+        if self.response_cache is not None and cache_key is not None:
+            if cached is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+                self.response_cache.refresh(cache_key)
+                return loads(cached.body)
+            self.response_cache.store(
+                cache_key,
+                response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return loads(response.content)
+
+    def _send(self, url: str, params: dict | None, headers: dict) -> "requests.Response":
+        """Send a rate limited GET request, retrying throttled and failed requests.
+
+        Requests that fail with a transient server error, connection error or timeout
+        are retried according to the client's retry policy.
+        """
+        import requests  # noqa: PLC0415
+
+        throttles = 0
+        attempt = 1
+        while True:
+            metrics.record("alma.rate_limit_wait", self.rate_limiter.acquire())
+            try:
+                with metrics.timer("alma.request") as size:
+                    response = self.session.get(
+                        url=url, params=params, headers=headers, timeout=self.timeout
+                    )
+                    size["bytes"] = len(response.content)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                with metrics.timer("alma.retry_backoff"):
+                    retry = self.retry_policy.wait_to_retry(attempt, type(error).__name__)
+                if retry:
+                    attempt += 1
+                    continue
+                raise
+            if remaining := response.headers.get("X-Exl-Api-Remaining"):
+                self.daily_calls_remaining = int(remaining)
+            if (
+                response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+                and throttles < self.throttle_retries
+                and "DAILY_THRESHOLD" not in response.text
+            ):
+                self.rate_limiter.throttled(get_retry_after(response))
+                throttles += 1
+                continue
+            if response.status_code in RETRYABLE_STATUSES:
+                with metrics.timer("alma.retry_backoff"):
+                    retry = self.retry_policy.wait_to_retry(
+                        attempt, f"HTTP {response.status_code}", get_retry_after(response)
+                    )
+                if retry:
+                    attempt += 1
+                    continue
+            response.raise_for_status()
+            self.rate_limiter.succeeded()
+            return response
 
     def get_paged(
         self,
@@ -46,11 +280,16 @@ class AlmaClient:
         record_type: str,
         params: dict | None = None,
         limit: int = 100,
-        _offset: int = 0,
-        _records_retrieved: int = 0,
     ) -> Generator[dict, None, None]:
         """Retrieve paginated results from the Alma API for a given endpoint.
 
+        The first page is requested immediately to get the total record count, after
+        which the remaining pages are requested in the background on the client's
+        thread pool while the caller consumes earlier pages. Records are yielded in
+        page order. If the caller stops iterating early, pending page requests are
+        cancelled, though up to twice max_workers pages may already have been
+        requested.
+
         Args:
             endpoint: The paged Alma API endpoint to call, e.g. "acq/invoices".
             record_type: The type of record returned by the Alma API for the specified
@@ -60,76 +299,102 @@ class AlmaClient:
             params: Any endpoint-specific params to supply to the GET request.
             limit: The maximum number of records to retrieve per page. Valid values are
                 0-100.
-            _offset: The offset value to supply to paged request. Should only be used
-                internally by this method's recursion.
-            _records_retrieved: The number of records retrieved so far for a given
-                paged endpoint. Should only be used internally by this method's
-                recursion.
         """
-        params = params or {}
-        params["limit"] = str(limit)
-        params["offset"] = str(_offset)
-        response = requests.get(
-            url=urljoin(self.base_url, endpoint),
-            params=params,
-            headers=self.headers,
-            timeout=self.timeout,
-        )
-        response.raise_for_status()
-        time.sleep(0.1)
-        total_record_count = int(response.json()["total_record_count"])
-        records = response.json().get(record_type, [])
-        records_retrieved = _records_retrieved + len(records)
-        yield from records
-        if records_retrieved < total_record_count:
-            yield from self.get_paged(
-                endpoint,
-                record_type,
-                params=params,
-                limit=limit,
-                _offset=_offset + limit,
-                _records_retrieved=records_retrieved,
-            )
+        page_params = {**(params or {}), "limit": str(limit)}
+
+        def get_page(offset: int) -> dict:
+            with metrics.timer("alma.get_page"):
+                return self._get(endpoint, params={**page_params, "offset": str(offset)})
+
+        first_page = get_page(0)
+        yield from first_page.get(record_type, [])
+        offsets = range(limit, int(first_page["total_record_count"]), limit)
+        for page in self.map_in_order(get_page, offsets):
+            yield from page.get(record_type, [])
 
     def get_brief_po_lines(
-        self, acquisition_method: str | None = None
+        self, acquisition_method: str | None = None, *, newest_first: bool = False
     ) -> Generator[dict, None, None]:
         """Get brief PO line records, optionally filtered by acquisition_method.
 
         The PO line records retrieved from this endpoint do not contain all of the PO
         line data and users may wish to retrieve the full PO line records with the
         get_full_po_lines method.
+
+        If newest_first is True, Alma is asked to sort the records by descending
+        creation date.
         """
         po_line_params = {
             "status": "ACTIVE",
             "acquisition_method": acquisition_method,
         }
+        if newest_first:
+            po_line_params.update(order_by="created_date", direction="desc")
         return self.get_paged(
             endpoint="acq/po-lines", record_type="po_line", params=po_line_params
         )
 
-    def get_full_po_line(self, po_line_id: str) -> dict:
-        """Get a single full PO line record using the PO line ID."""
-        response = requests.get(
-            url=str(urljoin(self.base_url, f"acq/po-lines/{po_line_id}")),
-            headers=self.headers,
-            timeout=self.timeout,
-        )
-        response.raise_for_status()
-        time.sleep(0.1)
-        return response.json()
+    @metrics.timed("alma.get_full_po_line")
+    def get_full_po_line(self, po_line_id: str, fields: FieldSpec | None = None) -> dict:
+        """Get a single full PO line record using the PO line ID.
+
+        If fields are provided, only those fields of the record are kept (see
+        select_fields), so the rest of the decoded record can be freed right away.
+        """
+        return select_fields(self._get(f"acq/po-lines/{po_line_id}"), fields)
 
     def get_full_po_lines(
         self,
         acquisition_method: str | None = None,
         date: str | None = None,
+        end_date: str | None = None,
+        skip: Callable[[dict], bool] | None = None,
+        fields: FieldSpec | None = None,
+        *,
+        where: Callable[[dict], bool] | None = None,
     ) -> Generator[dict, None, None]:
-        """Get full PO line records, optionally filtered by acquisition_method/date."""
-        for line in self.get_brief_po_lines(acquisition_method):
-            number = line["number"]
-            if line.get("created_date") == f"{date}Z" or not date:
-                yield self.get_full_po_line(number)
+        """Get full PO line records, optionally filtered by acquisition_method/date.
+
+        Records are yielded in the order of the brief PO line records. If max_workers
+        is greater than one, full records are fetched concurrently.
+
+        Alma does not support searching PO lines by creation date (or by note), so when
+        a date is provided the brief PO lines are requested newest first and paging
+        stops once the records are older than the date. See
+        filter_po_lines_by_created_date for how this is guarded. If an end_date is also
+        provided, PO lines created on any date from date through end_date are
+        retrieved in the same single pass over the brief PO lines.
+
+        If a where predicate is provided, full records are only fetched for brief PO
+        line records for which it returns True, so PO lines that can be ruled out from
+        their brief records (e.g. by their notes or status) never cost a request. The
+        predicate is applied again to each full record, so it should return True for
+        brief records missing the fields it checks. If a
+        skip function is provided, full records are not fetched for brief PO line
+        records for which it returns True, e.g. PO lines already processed. If fields
+        are provided, only those fields of each full record are kept.
+        """
+        get_full_po_line = partial(self.get_full_po_line, fields=fields)
+        if date:
+            brief_po_lines = filter_po_lines_by_created_date(
+                self.get_brief_po_lines(acquisition_method, newest_first=True),
+                date,
+                end_date=end_date,
+            )
+        else:
+            brief_po_lines = self.get_brief_po_lines(acquisition_method)
+        po_line_numbers = (
+            line["number"]
+            for line in brief_po_lines
+            if (where is None or where(line)) and not (skip and skip(line))
+        )
+        if self.max_workers > 1:
+            po_lines = self.map_in_order(get_full_po_line, po_line_numbers)
+        else:
+            po_lines = (get_full_po_line(number) for number in po_line_numbers)
+        yield from (line for line in po_lines if where is None or where(line))
 
+    @metrics.timed("alma.get_fund_by_code")
     def get_fund_by_code(self, fund_code: str) -> dict:
         """Get fund details using the fund code.
 
@@ -138,12 +403,137 @@ class AlmaClient:
         API. Theoretically the result could include multiple funds, however in practice
         we expect there to only be one.
         """
-        response = requests.get(
-            urljoin(self.base_url, "acq/funds"),
-            headers=self.headers,
-            params={"q": f"fund_code~{fund_code}", "view": "full"},
-            timeout=self.timeout,
+        return self._get(
+            "acq/funds", params={"q": f"fund_code~{fund_code}", "view": "full"}
         )
-        response.raise_for_status()
-        time.sleep(0.1)
-        return response.json()
+
+    @metrics.timed("alma.get_fund_external_id")
+    def get_fund_external_id(self, fund_code: str) -> str | None:
+        """Get the external ID (account number) of a fund using the fund code.
+
+        Results are cached by the client's fund cache. Returns None if no fund is found
+        for the fund code or the fund record does not contain an external_id field
+        value.
+        """
+        return self.fund_cache.get_or_fetch(fund_code, self._fetch_fund_external_id)
+
+    def _fetch_fund_external_id(self, fund_code: str) -> str | None:
+        if fund_records := self.get_fund_by_code(fund_code).get("fund"):
+            return fund_records[0].get("external_id")
+        return None
+
+    def prefetch_funds(self, fund_codes: Iterable[str] | None = None) -> int:
+        """Load fund external IDs into the fund cache ahead of get_fund_external_id.
+
+        If fund_codes are provided, each distinct fund code is looked up (concurrently
+        if max_workers is greater than one). Otherwise all active funds are retrieved
+        with a few paged requests. Fund codes that are not prefetched are still looked
+        up individually when requested.
+
+        Returns the number of funds prefetched.
+        """
+        if fund_codes is not None:
+            return len(
+                list(self.map_in_order(self.get_fund_external_id, set(fund_codes)))
+            )
+        external_ids = {
+            fund["code"]: fund.get("external_id")
+            for fund in self.get_paged(
+                "acq/funds", "fund", params={"status": "ACTIVE", "view": "full"}
+            )
+        }
+        self.fund_cache.update(external_ids)
+        return len(external_ids)
+
+
+def filter_po_lines_by_created_date(
+    po_lines: Iterable[dict],
+    date: str,
+    min_ordered: int = 100,
+    *,
+    end_date: str | None = None,
+) -> Generator[dict, None, None]:
+    """Yield PO lines created on a given date from PO lines sorted newest first.
+
+    Iteration stops at the first PO line created before the date, which avoids paging
+    through the entire PO line history. See CreatedDateFilter for details.
+
+    Args:
+        po_lines: PO line records, expected to be sorted by descending created_date.
+        date: Creation date of PO lines to yield, in 'YYYY-MM-DD' format.
+        min_ordered: Number of ordered PO lines that must be seen before stopping
+            early, which should be at least one page of results.
+        end_date: Optional last creation date of PO lines to yield, in 'YYYY-MM-DD'
+            format, in which case PO lines created from date through end_date are
+            yielded.
+    """
+    created_date_filter = CreatedDateFilter(date, min_ordered, end_date=end_date)
+    for line in po_lines:
+        if (match := created_date_filter.check(line)) is None:
+            return
+        if match:
+            yield line
+
+
+class CreatedDateFilter:
+    """CreatedDateFilter class.
+
+    Checks PO lines, expected to be sorted by descending created_date, for a given
+    creation date (or range of dates from date through end_date) and detects when all
+    remaining PO lines will be older than it.
+
+    As the API may not honor the requested sort order, stopping early is only allowed
+    once at least min_ordered PO lines have been seen in non-increasing created_date
+    order. If any PO line is seen out of order, stopping early is disabled and all PO
+    lines must be checked instead.
+    """
+
+    def __init__(
+        self, date: str, min_ordered: int = 100, *, end_date: str | None = None
+    ) -> None:
+        self.start = f"{date}Z"
+        self.end = f"{end_date or date}Z"
+        self.min_ordered = min_ordered
+        self._previous: str | None = None
+        self._ordered_count = 0
+
+    def check(self, line: dict) -> bool | None:
+        """Check whether a PO line was created on the date (or in the date range).
+
+        Returns None if this and all remaining PO lines were created before the date.
+        """
+        created_date = line.get("created_date")
+        if not created_date:
+            return False
+        if self._ordered_count >= 0:
+            if self._previous is not None and created_date > self._previous:
+                self._ordered_count = -1
+            else:
+                self._ordered_count += 1
+        self._previous = created_date
+        if self.start <= created_date <= self.end:
+            return True
+        if created_date < self.start and self._ordered_count >= self.min_ordered:
+            return None
+        return False
+
+
+def get_cache_key(url: str, params: dict | None = None) -> str:
+    """Get the URL of a GET request including its query string, for use as a cache key.
+
+    Params are sorted so that the same request always has the same key.
+    """
+    import requests  # noqa: PLC0415
+
+    request = requests.Request(
+        "GET", url, params=sorted((params or {}).items())
+    ).prepare()
+    return str(request.url)
+
+
+def get_retry_after(response: "requests.Response") -> float | None:
+    """Get the number of seconds to wait from a response's Retry-After header."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,327 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+)
+from functools import partial
+from http import HTTPStatus
+from typing import Self
+from urllib.parse import urljoin
+
+import httpx
+
+from ccslips.alma import CreatedDateFilter
+from ccslips.cache import FundCache
+from ccslips.config import Config, ConfigSnapshot
+from ccslips.decode import FieldSpec, loads, select_fields
+from ccslips.metrics import metrics
+from ccslips.ratelimit import TokenBucket
+from ccslips.retry import RETRYABLE_STATUSES, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAlmaClient:
+    """AsyncAlmaClient class.
+
+    An asyncio equivalent of AlmaClient, using an httpx.AsyncClient, in which many PO
+    line and fund requests can be in flight at once on a single thread.
+
+    Notes:
+        - All requests pass through a token bucket rate limiter, which can be shared
+          with other clients (including AlmaClient instances).
+        - At most max_concurrency requests started by get_paged, get_full_po_lines,
+          prefetch_funds or map_in_order are in flight at once per call.
+        - Fund external IDs are cached in a FundCache as in AlmaClient, and concurrent
+          lookups of the same fund code share one request.
+        - The client should be closed when no longer needed, either by calling
+          aclose() or by using the client as an async context manager.
+    """
+
+    throttle_retries = 5
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        rate_limiter: TokenBucket | None = None,
+        fund_cache: FundCache | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        retry_policy: RetryPolicy | None = None,
+        *,
+        config: ConfigSnapshot | None = None,
+    ) -> None:
+        config = config or Config().snapshot()
+        self.max_concurrency = max_concurrency or config.alma_api_max_concurrency
+        self.http = httpx.AsyncClient(
+            # endpoints are resolved against the same prefix as AlmaClient's
+            base_url=urljoin(config.alma_api_url, "."),
+            headers={
+                "Authorization": f"apikey {config.alma_api_read_key}",
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+            },
+            timeout=config.alma_api_timeout,
+            limits=httpx.Limits(
+                max_connections=config.alma_api_pool_size or max(10, self.max_concurrency)
+            ),
+            transport=transport
+            or httpx.AsyncHTTPTransport(retries=config.alma_api_connection_retries),
+        )
+        self.rate_limiter = rate_limiter or TokenBucket(
+            rate=config.alma_api_rate_limit, burst=config.alma_api_rate_burst
+        )
+        self.fund_cache = fund_cache or FundCache(
+            path=config.cache_dir / "funds.sqlite3" if config.cache_dir else None,
+            ttl=config.fund_cache_ttl,
+        )
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=config.alma_api_max_attempts,
+            budget=config.alma_api_retry_budget,
+        )
+        self.daily_calls_remaining: int | None = None
+        self._fund_lookups: dict[str, asyncio.Task[str | None]] = {}
+
+    async def __aenter__(self) -> Self:
+        """Enter a context in which the client is closed on exit."""
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Close the client."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the client's connections and fund cache."""
+        self.fund_cache.close()
+        await self.http.aclose()
+
+    async def map_in_order[T, R](
+        self,
+        func: Callable[[T], Awaitable[R]],
+        items: Iterable[T] | AsyncIterable[T],
+    ) -> AsyncGenerator[R, None]:
+        """Run a coroutine function for each item concurrently.
+
+        Results are yielded in the same order as the items regardless of the order in
+        which they complete. At most max_concurrency calls are in flight at once, so
+        items are consumed lazily. If a call raises an exception, it is re-raised when
+        its result is reached and all pending calls are cancelled.
+        """
+        pending: deque[asyncio.Task[R]] = deque()
+        try:
+            async for item in _aiter(items):
+                pending.append(asyncio.ensure_future(func(item)))
+                if len(pending) >= self.max_concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _get(self, endpoint: str, params: dict | None = None) -> dict:
+        """Send a rate limited GET request to an Alma API endpoint and return its JSON.
+
+        Throttled and failed requests are retried as in AlmaClient._get.
+        """
+        params = {key: value for key, value in (params or {}).items() if value}
+        throttles = 0
+        attempt = 1
+        while True:
+            metrics.record(
+                "alma.rate_limit_wait", await self.rate_limiter.acquire_async()
+            )
+            try:
+                with metrics.timer("alma.request") as size:
+                    response = await self.http.get(endpoint, params=params)
+                    size["bytes"] = len(response.content)
+            except httpx.TransportError as error:
+                with metrics.timer("alma.retry_backoff"):
+                    retry = await self.retry_policy.wait_to_retry_async(
+                        attempt, type(error).__name__
+                    )
+                if retry:
+                    attempt += 1
+                    continue
+                raise
+            if remaining := response.headers.get("X-Exl-Api-Remaining"):
+                self.daily_calls_remaining = int(remaining)
+            if (
+                response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+                and throttles < self.throttle_retries
+                and "DAILY_THRESHOLD" not in response.text
+            ):
+                self.rate_limiter.throttled(_get_retry_after(response))
+                throttles += 1
+                continue
+            if response.status_code in RETRYABLE_STATUSES:
+                with metrics.timer("alma.retry_backoff"):
+                    retry = await self.retry_policy.wait_to_retry_async(
+                        attempt,
+                        f"HTTP {response.status_code}",
+                        _get_retry_after(response),
+                    )
+                if retry:
+                    attempt += 1
+                    continue
+            response.raise_for_status()
+            self.rate_limiter.succeeded()
+            return loads(response.content)
+
+    async def get_paged(
+        self,
+        endpoint: str,
+        record_type: str,
+        params: dict | None = None,
+        limit: int = 100,
+    ) -> AsyncGenerator[dict, None]:
+        """Retrieve paginated results from the Alma API for a given endpoint.
+
+        After the first page gives the total record count, the remaining pages are
+        requested concurrently. Records are yielded in page order. See
+        AlmaClient.get_paged for details of the arguments.
+        """
+        page_params = {**(params or {}), "limit": str(limit)}
+
+        async def get_page(offset: int) -> dict:
+            with metrics.timer("alma.get_page"):
+                return await self._get(endpoint, {**page_params, "offset": str(offset)})
+
+        first_page = await get_page(0)
+        for record in first_page.get(record_type, []):
+            yield record
+        offsets = range(limit, int(first_page["total_record_count"]), limit)
+        async for page in self.map_in_order(get_page, offsets):
+            for record in page.get(record_type, []):
+                yield record
+
+    def get_brief_po_lines(
+        self, acquisition_method: str | None = None, *, newest_first: bool = False
+    ) -> AsyncGenerator[dict, None]:
+        """Get brief PO line records, optionally filtered by acquisition_method.
+
+        See AlmaClient.get_brief_po_lines.
+        """
+        po_line_params = {
+            "status": "ACTIVE",
+            "acquisition_method": acquisition_method,
+        }
+        if newest_first:
+            po_line_params.update(order_by="created_date", direction="desc")
+        return self.get_paged(
+            endpoint="acq/po-lines", record_type="po_line", params=po_line_params
+        )
+
+    @metrics.timed("alma.get_full_po_line")
+    async def get_full_po_line(
+        self, po_line_id: str, fields: FieldSpec | None = None
+    ) -> dict:
+        """Get a single full PO line record, optionally selecting only some fields."""
+        return select_fields(await self._get(f"acq/po-lines/{po_line_id}"), fields)
+
+    async def get_full_po_lines(
+        self,
+        acquisition_method: str | None = None,
+        date: str | None = None,
+        skip: Callable[[dict], bool] | None = None,
+        fields: FieldSpec | None = None,
+        *,
+        where: Callable[[dict], bool] | None = None,
+    ) -> AsyncGenerator[dict, None]:
+        """Get full PO line records, optionally filtered by acquisition_method/date.
+
+        Full records are fetched concurrently and yielded in the order of the brief PO
+        line records. See AlmaClient.get_full_po_lines for how the date, skip function,
+        fields and where predicate are used.
+        """
+
+        async def get_po_line_numbers() -> AsyncGenerator[str, None]:
+            created_date_filter = CreatedDateFilter(date) if date else None
+            async for line in self.get_brief_po_lines(
+                acquisition_method, newest_first=bool(date)
+            ):
+                match = created_date_filter.check(line) if created_date_filter else True
+                if match is None:
+                    return
+                if match and (where is None or where(line)) and not (skip and skip(line)):
+                    yield line["number"]
+
+        async for po_line in self.map_in_order(
+            partial(self.get_full_po_line, fields=fields), get_po_line_numbers()
+        ):
+            if where is None or where(po_line):
+                yield po_line
+
+    @metrics.timed("alma.get_fund_by_code")
+    async def get_fund_by_code(self, fund_code: str) -> dict:
+        """Get fund details using the fund code. See AlmaClient.get_fund_by_code."""
+        return await self._get(
+            "acq/funds", params={"q": f"fund_code~{fund_code}", "view": "full"}
+        )
+
+    @metrics.timed("alma.get_fund_external_id")
+    async def get_fund_external_id(self, fund_code: str) -> str | None:
+        """Get the external ID (account number) of a fund using the fund code.
+
+        Results are cached by the client's fund cache. Returns None if no fund is found
+        for the fund code or the fund record does not contain an external_id field
+        value.
+        """
+        if (lookup := self._fund_lookups.get(fund_code)) is None:
+            found, external_id = self.fund_cache.get(fund_code)
+            if found:
+                self.fund_cache.hits += 1
+                return external_id
+            self.fund_cache.misses += 1
+            lookup = asyncio.ensure_future(self._fetch_fund_external_id(fund_code))
+            self._fund_lookups[fund_code] = lookup
+        else:
+            self.fund_cache.hits += 1
+        return await asyncio.shield(lookup)
+
+    async def _fetch_fund_external_id(self, fund_code: str) -> str | None:
+        try:
+            external_id = None
+            if fund_records := (await self.get_fund_by_code(fund_code)).get("fund"):
+                external_id = fund_records[0].get("external_id")
+            self.fund_cache.update({fund_code: external_id})
+            return external_id
+        finally:
+            del self._fund_lookups[fund_code]
+
+    async def prefetch_funds(self, fund_codes: Iterable[str] | None = None) -> int:
+        """Load fund external IDs into the fund cache ahead of extracting slip data.
+
+        See AlmaClient.prefetch_funds.
+        """
+        if fund_codes is not None:
+            lookups = self.map_in_order(self.get_fund_external_id, set(fund_codes))
+            return len([external_id async for external_id in lookups])
+        external_ids = {
+            fund["code"]: fund.get("external_id")
+            async for fund in self.get_paged(
+                "acq/funds", "fund", params={"status": "ACTIVE", "view": "full"}
+            )
+        }
+        self.fund_cache.update(external_ids)
+        return len(external_ids)
+
+
+async def _aiter[T](items: Iterable[T] | AsyncIterable[T]) -> AsyncGenerator[T, None]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+def _get_retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,301 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class FundCache:
+    """FundCache class.
+
+    A thread-safe cache of fund codes to fund external IDs (account numbers).
+
+    Lookups for a fund code that is already being fetched wait for that fetch rather
+    than fetching it again. Fund codes without an external ID are cached as None.
+
+    If a path is provided, fetched values are also stored in a SQLite database at that
+    path and reused by later runs until they are older than the TTL.
+
+    Args:
+        path: Optional path of a SQLite database file used to persist the cache.
+        ttl: Number of seconds a persisted value remains valid.
+        clock: Wall clock function, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ttl: float = 86400,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values: dict[str, Future[str | None]] = {}
+        self._db: sqlite3.Connection | None = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS funds "
+                "(fund_code TEXT PRIMARY KEY, external_id TEXT, fetched_at REAL)"
+            )
+
+    def get_or_fetch(
+        self, fund_code: str, fetch: Callable[[str], str | None]
+    ) -> str | None:
+        """Get the external ID for a fund code, fetching it on a cache miss."""
+        with self._lock:
+            future = self._values.get(fund_code)
+            if future is None:
+                future = Future()
+                self._values[fund_code] = future
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+        if not owner:
+            return future.result()
+        try:
+            found, external_id = self._load(fund_code)
+            if found:
+                with self._lock:
+                    self.hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                external_id = fetch(fund_code)
+                self._store({fund_code: external_id})
+        except Exception as exception:
+            with self._lock:
+                del self._values[fund_code]
+            future.set_exception(exception)
+            raise
+        future.set_result(external_id)
+        return external_id
+
+    def get(self, fund_code: str) -> tuple[bool, str | None]:
+        """Get the external ID for a fund code without fetching it.
+
+        Returns a tuple of whether the fund code was found in the cache and its
+        external ID. Fund codes still being fetched are not found. Hits and misses are
+        not counted.
+        """
+        with self._lock:
+            future = self._values.get(fund_code)
+        if future is not None and future.done() and not future.exception():
+            return True, future.result()
+        found, external_id = self._load(fund_code)
+        if found:
+            self._remember({fund_code: external_id})
+        return found, external_id
+
+    def get_fund_external_id(self, fund_code: str) -> str | None:
+        """Get the cached external ID for a fund code, or None if not cached."""
+        return self.get(fund_code)[1]
+
+    def update(self, external_ids: Mapping[str, str | None]) -> None:
+        """Add or replace the external IDs for multiple fund codes at once."""
+        self._remember(external_ids)
+        self._store(external_ids)
+
+    def _remember(self, external_ids: Mapping[str, str | None]) -> None:
+        futures = {}
+        for fund_code, external_id in external_ids.items():
+            futures[fund_code] = Future[str | None]()
+            futures[fund_code].set_result(external_id)
+        with self._lock:
+            self._values.update(futures)
+
+    def _load(self, fund_code: str) -> tuple[bool, str | None]:
+        if self._db is None:
+            return False, None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT external_id FROM funds WHERE fund_code = ? AND fetched_at > ?",
+                (fund_code, self._clock() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return False, None
+        return True, row[0]
+
+    def _store(self, external_ids: Mapping[str, str | None]) -> None:
+        if self._db is None:
+            return
+        fetched_at = self._clock()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO funds VALUES (?, ?, ?)",
+                [(code, value, fetched_at) for code, value in external_ids.items()],
+            )
+
+    def close(self) -> None:
+        """Close the SQLite database, if any."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A cached HTTP response body and its validators.
+
+    Attributes:
+        body: Raw response body.
+        etag: ETag header of the response, if any.
+        last_modified: Last-Modified header of the response, if any.
+        fresh: Whether the response is younger than the cache TTL and can be used
+            without revalidating it.
+    """
+
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    fresh: bool
+
+    @property
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers to revalidate the response with a conditional request."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """ResponseCache class.
+
+    A thread-safe, size-bounded cache of HTTP GET response bodies keyed by URL, stored
+    in a SQLite database.
+
+    Responses younger than the TTL are used as is. Older responses with an ETag or
+    Last-Modified header can be revalidated with a conditional request and refreshed
+    if unchanged, while older responses without either are ignored. Once the total
+    size of cached bodies exceeds max_size bytes, the least recently used responses
+    are evicted.
+
+    Args:
+        path: Optional path of a SQLite database file used to persist the cache. If
+            not provided, responses are only cached in memory for the lifetime of the
+            cache.
+        ttl: Number of seconds a cached response is used without revalidating it.
+        max_size: Maximum total size in bytes of cached response bodies.
+        clock: Wall clock function, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ttl: float = 3600,
+        max_size: int = 100 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db: sqlite3.Connection | None = sqlite3.connect(
+            path or ":memory:", check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, body BLOB, "
+            "etag TEXT, last_modified TEXT, size INTEGER, stored_at REAL, "
+            "accessed_at REAL)"
+        )
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups answered from the cache, including revalidations."""
+        lookups = self.hits + self.revalidations + self.misses
+        return (self.hits + self.revalidations) / lookups if lookups else 0.0
+
+    def get(self, url: str) -> CachedResponse | None:
+        """Get the cached response for a URL, counting a hit if it is fresh.
+
+        Returns None if the URL is not cached, or if its cached response is stale and
+        cannot be revalidated.
+        """
+        if self._db is None:
+            return None
+        now = self._clock()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses "
+                "WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            body, etag, last_modified, stored_at = row
+            fresh = stored_at > now - self.ttl
+            if not (fresh or etag or last_modified):
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url)
+            )
+            if fresh:
+                self.hits += 1
+        return CachedResponse(body, etag, last_modified, fresh=fresh)
+
+    def refresh(self, url: str) -> None:
+        """Mark a cached response as fresh again after it was revalidated."""
+        if self._db is None:
+            return
+        now = self._clock()
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self.revalidations += 1
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Cache a response fetched after a miss, evicting others to stay in size."""
+        with self._lock:
+            self.misses += 1
+        if self._db is None or len(body) > self.max_size:
+            return
+        now = self._clock()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, len(body), now, now),
+            )
+            excess = self._db.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+            excess -= self.max_size
+            evicted = []
+            if excess > 0:
+                for evicted_url, size in self._db.execute(
+                    "SELECT url, size FROM responses ORDER BY accessed_at, rowid"
+                ):
+                    evicted.append((evicted_url,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+            self._db.executemany("DELETE FROM responses WHERE url = ?", evicted)
+
+    def close(self) -> None:
+        """Close the SQLite database."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,16 +1,46 @@
 import datetime
 import logging
+from collections.abc import Callable
+from contextlib import ExitStack, closing
+from tempfile import SpooledTemporaryFile
 from time import perf_counter
+from typing import Literal
 
 import click
 
-from ccslips.config import Config, configure_logger, configure_sentry
-from ccslips.email import Email
-from ccslips.polines import generate_credit_card_slips_html, process_po_lines
+from ccslips.alma import AlmaClient
+from ccslips.cache import FundCache
+from ccslips.config import (
+    Config,
+    ConfigSnapshot,
+    configure_logger,
+    configure_sentry,
+)
+from ccslips.email import Email, group_attachments
+from ccslips.metrics import metrics
+from ccslips.pipeline import credit_card_slips_pipeline
+from ccslips.polines import (
+    ShardedSlipsHtmlWriter,
+    has_cardholder_note,
+    process_po_lines_async,
+    process_po_lines_by_date,
+    write_credit_card_slips_html_by_date,
+    write_rendered_slips_html,
+)
+from ccslips.render import load_slip_template
+from ccslips.retry import RetryPolicy
+from ccslips.state import ProcessedPoLines, get_state_store
 
 logger = logging.getLogger(__name__)
 
-CONFIG = Config()
+# slips are written to a temporary file on disk once they exceed this size in bytes
+SLIPS_SPOOL_MAX_SIZE = 1024 * 1024
+
+# file extension of slips attachments, by --compress-attachments option
+ATTACHMENT_EXTENSIONS = {None: ".htm", "gzip": ".htm.gz", "zip": ".zip"}
+
+# warn when fewer Alma API calls than this are left for the day
+DAILY_CALLS_WARNING_THRESHOLD = 10_000
 
 
 @click.command()
@@ -40,6 +70,60 @@ CONFIG = Config()
         "two (2) days before the date the application is run."
     ),
 )
+@click.option(
+    "--start-date",
+    help=(
+        "Optional first date of a range of dates to process, in 'YYYY-MM-DD' format. "
+        "Must be passed with --end-date instead of --date. PO lines for every date in "
+        "the range are retrieved in a single pass and attached as one file per date."
+    ),
+)
+@click.option(
+    "--end-date",
+    help="Optional last date of a range of dates to process, in 'YYYY-MM-DD' format.",
+)
+@click.option(
+    "--combine-dates",
+    is_flag=True,
+    help="Pass to attach the slips for a range of dates as a single combined file.",
+)
+@click.option(
+    "--cardholder-notes-only",
+    is_flag=True,
+    help=(
+        "Pass to only generate slips for PO lines with a cardholder ('CC-') note. PO "
+        "lines without one are skipped before their full records are retrieved."
+    ),
+)
+@click.option(
+    "--compress-attachments",
+    type=click.Choice(["gzip", "zip"]),
+    help=(
+        "Optionally attach the slips compressed, as gzip or zip files, so more slips "
+        "fit in each email. By default the slips are attached as HTML files."
+    ),
+)
+@click.option(
+    "--prefetch-funds",
+    type=click.Choice(["all", "po-lines"]),
+    help=(
+        "Optionally prefetch fund account numbers before generating slips, either "
+        "for all active funds or for the funds of the retrieved PO lines. By default "
+        "funds are looked up as needed."
+    ),
+)
+@click.option(
+    "--execution-mode",
+    type=click.Choice(["sequential", "pipelined", "async"]),
+    default="sequential",
+    show_default=True,
+    help=(
+        "How slips are generated. 'pipelined' fetches PO lines, extracts slip data and "
+        "renders slips concurrently on separate threads and logs the time spent in "
+        "each stage. 'async' fetches PO lines and funds concurrently on a single "
+        "thread with asyncio."
+    ),
+)
 @click.option(
     "-v",
     "--verbose",
@@ -53,45 +137,326 @@ def main(
     recipient_email: list[str],
     date: str | None,
     *,
+    start_date: str | None,
+    end_date: str | None,
+    prefetch_funds: Literal["all", "po-lines"] | None,
+    execution_mode: Literal["sequential", "pipelined", "async"],
+    combine_dates: bool,
+    cardholder_notes_only: bool,
+    compress_attachments: Literal["gzip", "zip"] | None,
     verbose: bool,
 ) -> None:
     start_time = perf_counter()
+    start_timestamp = datetime.datetime.now(tz=datetime.UTC)
+    metrics.reset()
     root_logger = logging.getLogger()
     logger.info(configure_logger(root_logger, verbose=verbose))
-    logger.info(configure_sentry())
-    CONFIG.check_required_env_vars()
+    config = Config().snapshot()
+    logger.info(configure_sentry(config.sentry_traces_sample_rate))
+    Config().check_required_env_vars()
 
     logger.debug("Command called with options: %s", ctx.params)
     logger.info("Starting credit card slips process")
 
-    # creation date of retrieved PO lines
-    created_date = date or (
-        datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(days=2)
-    ).strftime("%Y-%m-%d")
-
-    credit_card_slips_data = process_po_lines(created_date)
-
-    email_content = generate_credit_card_slips_html(credit_card_slips_data)
-    email = Email()
-    subject_prefix = f"{CONFIG.WORKSPACE.upper()} " if CONFIG.WORKSPACE != "prod" else ""
-    email.populate(
-        from_address=source_email,
-        to_addresses=",".join(recipient_email),
-        subject=f"{subject_prefix}Credit card slips {created_date}",
-        attachments=[
-            {
-                "content": email_content,
-                "filename": f"{created_date}_credit_card_slips.htm",
-            }
-        ],
+    # creation date(s) of retrieved PO lines
+    created_dates = get_created_dates(date, start_date, end_date, execution_mode)
+    if len(created_dates) == 1:
+        dates_label = created_dates[0]
+        combined_name = created_dates[0]
+    else:
+        dates_label = f"{created_dates[0]} to {created_dates[-1]}"
+        combined_name = f"{created_dates[0]}_to_{created_dates[-1]}"
+
+    state = (
+        ProcessedPoLines(get_state_store(config.state_store))
+        if config.state_store
+        else None
     )
-    response = email.send()
-    logger.debug(response)
+    where = has_cardholder_note if cardholder_notes_only else None
+
+    with ExitStack() as stack:
+        slips_files = {
+            name: ShardedSlipsHtmlWriter(
+                lambda: stack.enter_context(
+                    SpooledTemporaryFile(max_size=SLIPS_SPOOL_MAX_SIZE)
+                ),
+                config.ses_max_attachments_size,
+                compression=compress_attachments,
+                filename=f"{name}_credit_card_slips.htm",
+            )
+            for name in ([combined_name] if combine_dates else created_dates)
+        }
+        if execution_mode == "async":
+            import asyncio  # noqa: PLC0415
+
+            slip_count = asyncio.run(
+                write_credit_card_slips_html_async(
+                    created_dates[0],
+                    slips_files[combined_name],
+                    prefetch_funds,
+                    state,
+                    where=where,
+                    config=config,
+                )
+            )
+        elif execution_mode == "pipelined":
+            slip_count = write_credit_card_slips_html_pipelined(
+                created_dates[0],
+                slips_files[combined_name],
+                prefetch_funds,
+                state,
+                where=where,
+                config=config,
+            )
+        else:
+            slip_count = write_credit_card_slips_html_by_date_range(
+                created_dates,
+                {
+                    created_date: slips_files[
+                        combined_name if combine_dates else created_date
+                    ]
+                    for created_date in created_dates
+                },
+                prefetch_funds,
+                state,
+                where=where,
+                config=config,
+            )
+        logger.info(f"{slip_count} credit card slip(s) generated")
+        if state:
+            logger.info(
+                f"{state.skipped} PO line(s) skipped as already processed by an "
+                "earlier run"
+            )
+
+        subject_prefix = (
+            f"{config.workspace.upper()} " if config.workspace != "prod" else ""
+        )
+        message_ids = send_credit_card_slips_emails(
+            slips_files,
+            source_email=source_email,
+            recipient_email=recipient_email,
+            subject=f"{subject_prefix}Credit card slips {dates_label}",
+            extension=ATTACHMENT_EXTENSIONS[compress_attachments],
+            max_size=config.ses_max_attachments_size,
+        )
+    if state:
+        state.commit()
 
     elapsed_time = perf_counter() - start_time
     logger.info(
-        f"Credit card slips processing complete for date {created_date}. "
+        f"Credit card slips processing complete for date {dates_label}. "
         f"Email sent to recipient(s) {recipient_email} "
-        f"with SES message ID {response["MessageId"]}. "
+        f"with SES message ID(s) {", ".join(message_ids)}. "
         f"Total time to complete process: {datetime.timedelta(seconds=elapsed_time)}"
     )
+    logger.info(f"Run metrics: {metrics.to_json()}")
+    if config.sentry_traces_sample_rate:
+        metrics.send_to_sentry("credit card slips", start_timestamp)
+
+
+def get_created_dates(
+    date: str | None,
+    start_date: str | None,
+    end_date: str | None,
+    execution_mode: str,
+) -> list[str]:
+    """Get the PO line creation dates to process from the CLI date options.
+
+    Defaults to two (2) days before the current date if no dates are passed.
+    """
+    if not (start_date or end_date):
+        return [
+            date
+            or (
+                datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(days=2)
+            ).strftime("%Y-%m-%d")
+        ]
+    if date:
+        message = "--date cannot be combined with --start-date or --end-date."
+        raise click.UsageError(message)
+    if not (start_date and end_date):
+        message = "--start-date and --end-date must be passed together."
+        raise click.UsageError(message)
+    if execution_mode != "sequential":
+        message = "Date ranges are only supported by the sequential execution mode."
+        raise click.UsageError(message)
+    try:
+        first = datetime.date.fromisoformat(start_date)
+        last = datetime.date.fromisoformat(end_date)
+    except ValueError as error:
+        raise click.BadParameter(str(error)) from error
+    if last < first:
+        message = "--end-date must not be before --start-date."
+        raise click.UsageError(message)
+    return [
+        (first + datetime.timedelta(days=offset)).isoformat()
+        for offset in range((last - first).days + 1)
+    ]
+
+
+def send_credit_card_slips_emails(
+    slips_files: dict[str, ShardedSlipsHtmlWriter],
+    *,
+    source_email: str,
+    recipient_email: list[str],
+    subject: str,
+    max_size: int,
+    extension: str = ".htm",
+) -> list[str]:
+    """Email the slips HTML files, in as many emails as needed to stay under max_size.
+
+    Each HTML document written for a slips file is attached as a separate file,
+    numbered if there is more than one and named with the given extension (e.g.
+    '.zip' for compressed slips), and the attachments are grouped into
+    emails whose base64 encoded attachments total at most max_size bytes. Each email
+    is built and sent in turn, so only one is held in memory at a time.
+
+    Returns the SES message ID of each email sent.
+    """
+    attachments: list[dict] = []
+    for name, slips_file in slips_files.items():
+        if len(slips_file.sinks) > 1:
+            logger.info(
+                f"Slips for {name} split into {len(slips_file.sinks)} attachments"
+            )
+        attachments.extend(
+            {
+                "content": sink,
+                "filename": (
+                    f"{name}_credit_card_slips_part{part}{extension}"
+                    if len(slips_file.sinks) > 1
+                    else f"{name}_credit_card_slips{extension}"
+                ),
+            }
+            for part, sink in enumerate(slips_file.sinks, start=1)
+        )
+    attachment_groups = group_attachments(attachments, max_size)
+    if len(attachment_groups) > 1:
+        logger.info(f"Slips split into {len(attachment_groups)} emails")
+    message_ids = []
+    for part, email_attachments in enumerate(attachment_groups, start=1):
+        email = Email()
+        email.populate(
+            from_address=source_email,
+            to_addresses=",".join(recipient_email),
+            subject=(
+                f"{subject} (part {part} of {len(attachment_groups)})"
+                if len(attachment_groups) > 1
+                else subject
+            ),
+            attachments=email_attachments,
+        )
+        response = email.send()
+        logger.debug(response)
+        message_ids.append(response["MessageId"])
+    return message_ids
+
+
+def write_credit_card_slips_html_by_date_range(
+    created_dates: list[str],
+    slips_files: dict[str, ShardedSlipsHtmlWriter],
+    prefetch_funds: Literal["all", "po-lines"] | None,
+    state: ProcessedPoLines | None,
+    *,
+    where: Callable[[dict], bool] | None = None,
+    config: ConfigSnapshot,
+) -> int:
+    with AlmaClient(config=config) as alma_client:
+        slip_counts = write_credit_card_slips_html_by_date(
+            process_po_lines_by_date(
+                created_dates[0],
+                created_dates[-1],
+                alma_client,
+                prefetch_funds,
+                state,
+                where=where,
+            ),
+            slips_files,
+        )
+        log_client_stats(alma_client)
+    if len(created_dates) > 1:
+        for created_date, slip_count in slip_counts.items():
+            logger.info(f"{slip_count} credit card slip(s) created on {created_date}")
+    return sum(slip_counts.values())
+
+
+def write_credit_card_slips_html_pipelined(
+    created_date: str,
+    slips_file: ShardedSlipsHtmlWriter,
+    prefetch_funds: Literal["all", "po-lines"] | None,
+    state: ProcessedPoLines | None,
+    *,
+    where: Callable[[dict], bool] | None = None,
+    config: ConfigSnapshot,
+) -> int:
+    with AlmaClient(config=config) as alma_client:
+        pipeline = credit_card_slips_pipeline(
+            created_date, alma_client, prefetch_funds, state=state, where=where
+        )
+        # close the pipeline, joining its threads, before the client is closed
+        with closing(iter(pipeline)) as slips:
+            slip_count = write_rendered_slips_html(slips, slips_file)
+        pipeline.log_timings()
+        log_client_stats(alma_client)
+    return slip_count
+
+
+async def write_credit_card_slips_html_async(
+    created_date: str,
+    slips_file: ShardedSlipsHtmlWriter,
+    prefetch_funds: Literal["all", "po-lines"] | None,
+    state: ProcessedPoLines | None,
+    *,
+    where: Callable[[dict], bool] | None = None,
+    config: ConfigSnapshot,
+) -> int:
+    from ccslips.async_alma import AsyncAlmaClient  # noqa: PLC0415
+
+    template = load_slip_template()
+    async with AsyncAlmaClient(config=config) as alma_client:
+        async for po_line_data in process_po_lines_async(
+            created_date, alma_client, prefetch_funds, state, where=where
+        ):
+            slips_file.write(template.render(po_line_data))
+        log_fund_cache_stats(alma_client.fund_cache)
+        log_retry_stats(alma_client.retry_policy)
+        log_daily_calls_remaining(alma_client.daily_calls_remaining)
+    return slips_file.close()
+
+
+def log_client_stats(alma_client: AlmaClient) -> None:
+    log_fund_cache_stats(alma_client.fund_cache)
+    log_retry_stats(alma_client.retry_policy)
+    log_daily_calls_remaining(alma_client.daily_calls_remaining)
+    if response_cache := alma_client.response_cache:
+        logger.info(
+            f"Response cache: {response_cache.hits} hits, "
+            f"{response_cache.revalidations} revalidated, "
+            f"{response_cache.misses} misses "
+            f"({response_cache.hit_ratio:.1%} hit ratio)"
+        )
+
+
+def log_fund_cache_stats(fund_cache: FundCache) -> None:
+    logger.info(f"Fund cache: {fund_cache.hits} hits, {fund_cache.misses} misses")
+
+
+def log_retry_stats(retry_policy: RetryPolicy) -> None:
+    logger.info(
+        f"Alma API requests retried {retry_policy.retries} time(s), "
+        f"{retry_policy.waited:.2f}s spent backing off, "
+        f"{retry_policy.budget_remaining} of {retry_policy.budget} retries left"
+    )
+
+
+def log_daily_calls_remaining(daily_calls_remaining: int | None) -> None:
+    if daily_calls_remaining is None:
+        return
+    if daily_calls_remaining < DAILY_CALLS_WARNING_THRESHOLD:
+        logger.warning(
+            f"Only {daily_calls_remaining} Alma API calls left for the day, "
+            "later runs may hit the daily threshold"
+        )
+    else:
+        logger.info(f"Alma API calls left for the day: {daily_calls_remaining}")
@@ -0,0 +1,108 @@
+import gzip
+import zipfile
+import zlib
+from typing import IO, Any, Literal, cast
+
+# gzip trailer: CRC-32 and size of the uncompressed data
+GZIP_TRAILER_SIZE = 8
+# fixed sizes of the zip records written when an archive is closed, see
+# https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT
+ZIP_CENTRAL_DIRECTORY_HEADER_SIZE = 46
+ZIP_END_OF_CENTRAL_DIRECTORY_SIZE = 22
+
+
+def get_deflate_bound(size: int) -> int:
+    """Get the most bytes of deflate data that size bytes of input can compress to.
+
+    Incompressible input is stored rather than compressed, so the bound is only a
+    little larger than the input (see deflateBound in zlib).
+    """
+    return size + (size >> 12) + (size >> 14) + (size >> 25) + 13
+
+
+class CompressedStream:
+    """CompressedStream class.
+
+    A writable binary stream which compresses what is written to it straight into a
+    seekable binary file-like object, either in gzip format or as a single file, with
+    the given filename, in a zip archive. Only the compressed data is held by the
+    file-like object, so large documents can be compressed as they are written.
+
+    The size of the compressed file can be bounded at any point with get_size_bound
+    without finishing the stream. The file-like object is left open when the stream is
+    closed, so the compressed file can be read from it.
+    """
+
+    def __init__(
+        self, raw: IO[bytes], compression: Literal["gzip", "zip"], filename: str
+    ) -> None:
+        self.raw = raw
+        self.compression = compression
+        self.filename = filename
+        self.start = raw.tell()
+        # input bytes written since the compressor was last flushed
+        self.pending = 0
+        self.archive: zipfile.ZipFile | None = None
+        self.file: gzip.GzipFile | IO[bytes]
+        if compression == "gzip":
+            self.file = gzip.GzipFile(
+                filename,
+                "wb",
+                compresslevel=zlib.Z_DEFAULT_COMPRESSION,
+                fileobj=raw,
+            )
+        else:
+            self.archive = zipfile.ZipFile(raw, "w", compression=zipfile.ZIP_DEFLATED)
+            self.file = self.archive.open(filename, "w")
+
+    def write(self, data: bytes) -> int:
+        self.pending += len(data)
+        return self.file.write(data)
+
+    def flush(self) -> None:
+        """Flush data held by the compressor, so get_size_bound is as close as can be.
+
+        Flushing compresses slightly less well, so is best done only when needed.
+        """
+        if isinstance(self.file, gzip.GzipFile):
+            self.file.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            # zipfile has no public way to flush the compressor of an open entry
+            entry = cast("Any", self.file)
+            data = entry._compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: SLF001
+            entry._compress_size += len(data)  # noqa: SLF001
+            self.raw.write(data)
+        self.pending = 0
+
+    def get_size_bound(self, size: int = 0) -> int:
+        """Get the most bytes the compressed file can take up once closed.
+
+        Args:
+            size: Number of bytes still to be written to the stream before it is
+                closed.
+        """
+        return (
+            self.raw.tell()
+            - self.start
+            + get_deflate_bound(self.pending + size)
+            + self._trailer_size
+        )
+
+    def close(self) -> None:
+        """Finish the compressed file, without closing the file-like object."""
+        self.file.close()
+        if self.archive:
+            self.archive.close()
+        self.pending = 0
+
+    @property
+    def _trailer_size(self) -> int:
+        if self.compression == "gzip":
+            return GZIP_TRAILER_SIZE
+        # the local file header is rewritten in place once the sizes are known, so
+        # only the central directory is still to be written
+        return (
+            ZIP_CENTRAL_DIRECTORY_HEADER_SIZE
+            + len(self.filename.encode())
+            + ZIP_END_OF_CENTRAL_DIRECTORY_SIZE
+        )
@@ -1,19 +1,55 @@
 import logging
 import os
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
-import sentry_sdk
-
 
 class Config:
     REQUIRED_ENV_VARS = ("ALMA_API_URL", "ALMA_API_READ_KEY", "SENTRY_DSN", "WORKSPACE")
 
     OPTIONAL_ENV_VARS = (
+        "ALMA_API_CONNECTION_RETRIES",
+        "ALMA_API_MAX_ATTEMPTS",
+        "ALMA_API_MAX_CONCURRENCY",
+        "ALMA_API_MAX_WORKERS",
+        "ALMA_API_POOL_SIZE",
+        "ALMA_API_RATE_BURST",
+        "ALMA_API_RATE_LIMIT",
+        "ALMA_API_RETRY_BUDGET",
         "ALMA_API_TIMEOUT",
+        "CACHE_DIR",
+        "FUND_CACHE_TTL",
+        "RESPONSE_CACHE_MAX_SIZE",
+        "RESPONSE_CACHE_TTL",
+        "SENTRY_TRACES_SAMPLE_RATE",
+        "SES_MAX_ATTACHMENTS_SIZE",
         "SES_RECIPIENT_EMAIL",
         "SES_SEND_FROM_EMAIL",
+        "STATE_STORE",
     )
 
+    # parsers of env vars that are not strings, keyed by env var
+    ENV_VAR_PARSERS: dict[str, Callable[[str], Any]] = {  # noqa: RUF012
+        "ALMA_API_CONNECTION_RETRIES": int,
+        "ALMA_API_MAX_ATTEMPTS": int,
+        "ALMA_API_MAX_CONCURRENCY": int,
+        "ALMA_API_MAX_WORKERS": int,
+        "ALMA_API_POOL_SIZE": int,
+        "ALMA_API_RATE_BURST": int,
+        "ALMA_API_RATE_LIMIT": float,
+        "ALMA_API_RETRY_BUDGET": int,
+        "ALMA_API_TIMEOUT": float,
+        "CACHE_DIR": Path,
+        "FUND_CACHE_TTL": float,
+        "RESPONSE_CACHE_MAX_SIZE": int,
+        "RESPONSE_CACHE_TTL": float,
+        "SENTRY_TRACES_SAMPLE_RATE": float,
+        "SES_MAX_ATTACHMENTS_SIZE": int,
+        "SES_RECIPIENT_EMAIL": lambda value: tuple(value.split()),
+    }
+
     def check_required_env_vars(self) -> None:
         """Method to raise exception if required env vars not set."""
         missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
@@ -28,6 +64,59 @@ class Config:
         message = f"'{name}' not a valid configuration variable"
         raise AttributeError(message)
 
+    def snapshot(self) -> "ConfigSnapshot":
+        """Load an immutable snapshot of the configuration with typed values.
+
+        Env vars are read and parsed once, so the snapshot's attributes can be used in
+        hot paths (e.g. by AlmaClient for every request) instead of reading env vars
+        each time. Env vars that are not set take the snapshot's default values.
+
+        Raises ValueError if an env var value cannot be parsed.
+        """
+        values = {}
+        for name in (*self.REQUIRED_ENV_VARS, *self.OPTIONAL_ENV_VARS):
+            if value := os.getenv(name):
+                parse = self.ENV_VAR_PARSERS.get(name, str)
+                try:
+                    values[name.lower()] = parse(value)
+                except ValueError as error:
+                    message = f"Invalid value for {name}: '{value}'"
+                    raise ValueError(message) from error
+        return ConfigSnapshot(**values)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ConfigSnapshot:
+    """ConfigSnapshot class.
+
+    An immutable snapshot of the configuration env vars, created by Config.snapshot.
+    Each attribute is the lowercase name of an env var, parsed to its type. Required
+    env vars that are not set are empty strings (see Config.check_required_env_vars).
+    """
+
+    alma_api_url: str = ""
+    alma_api_read_key: str = ""
+    sentry_dsn: str = ""
+    workspace: str = ""
+    alma_api_connection_retries: int = 3
+    alma_api_max_attempts: int = 4
+    alma_api_max_concurrency: int = 20
+    alma_api_max_workers: int = 1
+    alma_api_pool_size: int | None = None
+    alma_api_rate_burst: int = 5
+    alma_api_rate_limit: float = 10.0
+    alma_api_retry_budget: int = 50
+    alma_api_timeout: float = 30.0
+    cache_dir: Path | None = None
+    fund_cache_ttl: float = 86400.0
+    response_cache_max_size: int = 100 * 1024 * 1024
+    response_cache_ttl: float | None = None
+    sentry_traces_sample_rate: float = 0.0
+    ses_max_attachments_size: int = 9 * 1024 * 1024
+    ses_recipient_email: tuple[str, ...] = ()
+    ses_send_from_email: str | None = None
+    state_store: str | None = None
+
 
 def configure_logger(logger: logging.Logger, *, verbose: bool) -> str:
     if verbose:
@@ -49,10 +138,16 @@ def configure_logger(logger: logging.Logger, *, verbose: bool) -> str:
     )
 
 
-def configure_sentry() -> str:
+def configure_sentry(traces_sample_rate: float = 0.0) -> str:
     env = os.environ["WORKSPACE"]
     sentry_dsn = os.getenv("SENTRY_DSN")
     if sentry_dsn and sentry_dsn.lower() != "none":
-        sentry_sdk.init(sentry_dsn, environment=env)
+        import sentry_sdk  # noqa: PLC0415
+
+        sentry_sdk.init(
+            sentry_dsn,
+            environment=env,
+            traces_sample_rate=traces_sample_rate,
+        )
         return f"Sentry DSN found, exceptions will be sent to Sentry with env={env}"
     return "No Sentry DSN found, exceptions will not be sent to Sentry"
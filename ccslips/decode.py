@@ -0,0 +1,41 @@
+import json
+from collections.abc import Callable, Mapping
+from typing import Any
+
+type FieldSpec = Mapping[str, FieldSpec | None]
+
+
+def _get_json_loads() -> Callable[[bytes | str], Any]:
+    try:
+        import orjson  # type: ignore[import-not-found]  # noqa: PLC0415
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+# decode a JSON document, with orjson if it is installed or else the standard library
+loads = _get_json_loads()
+
+
+def select_fields(value: Any, fields: FieldSpec | None) -> Any:  # noqa: ANN401
+    """Select only the given fields from a decoded JSON value, discarding the rest.
+
+    Fields are given as a mapping of field names to either None, to keep the whole
+    field value, or to a nested mapping of the fields to select from it. The fields of
+    each object in an array are selected in the same way. Fields missing from the
+    value are skipped.
+
+    For example, {"price": {"sum": None}, "number": None} selects the number and the
+    price sum of a PO line record.
+    """
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [select_fields(item, fields) for item in value]
+    if isinstance(value, dict):
+        return {
+            name: select_fields(value[name], nested_fields)
+            for name, nested_fields in fields.items()
+            if name in value
+        }
+    return value
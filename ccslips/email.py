@@ -1,13 +1,21 @@
-from email.message import EmailMessage
+import base64
+import io
+import mimetypes
+import os
+from email.message import EmailMessage, MIMEPart
 from email.policy import EmailPolicy, default
+from typing import IO
 
-import boto3
+from ccslips.metrics import metrics
+
+# bytes of input encoded to each line of base64 by Email.add_file_attachment
+BASE64_LINE_INPUT_SIZE = 57
 
 
 class Email(EmailMessage):
     """Email subclasses EmailMessage with added functionality to populate and send."""
 
-    def __init__(self, policy: EmailPolicy = default) -> None:  # type:ignore[assignment]
+    def __init__(self, policy: EmailPolicy = default) -> None:  # type: ignore[assignment]
         """Initialize Email instance."""
         super().__init__(policy)
 
@@ -34,7 +42,7 @@ class Email(EmailMessage):
         [
             {
                 "content": "Contents of attachment as it would be written to a file-like
-                    object",
+                    object, or a binary file-like object to read the contents from",
                 "filename": "File name to use for attachment, e.g. 'a_file.xml'"
             },
             {...repeat above for all attachments...}
@@ -53,9 +61,45 @@ class Email(EmailMessage):
             self.set_content(body)
         if attachments:
             for attachment in attachments:
-                self.add_attachment(
-                    attachment["content"], filename=attachment["filename"]
-                )
+                if isinstance(attachment["content"], str):
+                    self.add_attachment(
+                        attachment["content"], filename=attachment["filename"]
+                    )
+                else:
+                    self.add_file_attachment(
+                        attachment["content"], filename=attachment["filename"]
+                    )
+
+    def add_file_attachment(self, file: IO[bytes], filename: str) -> None:
+        """Attach the contents of a binary file-like object, read from the start.
+
+        The file is read and base64 encoded in chunks into a single text buffer, so
+        the base64 text of the attachment is held in memory but the raw contents of
+        the file are never read in full. The content type is guessed from the
+        filename, e.g. 'text/html' for 'slips.htm' and 'application/gzip' for
+        'slips.htm.gz'.
+        """
+        content_type, encoding = mimetypes.guess_type(filename)
+        if encoding == "gzip":
+            content_type = "application/gzip"
+        elif encoding:
+            content_type = None
+        content_type = content_type or "application/octet-stream"
+        file.seek(0)
+        # 57 bytes of input encode to one 76 character line of base64
+        encoded = io.StringIO()
+        while chunk := file.read(BASE64_LINE_INPUT_SIZE * 1024):
+            encoded.write(base64.encodebytes(chunk).decode("ascii"))
+        attachment = MIMEPart(policy=self.policy)
+        attachment.set_payload(encoded.getvalue())
+        attachment["Content-Type"] = content_type
+        if content_type.startswith("text/"):
+            attachment.set_param("charset", "utf-8")
+        attachment["Content-Transfer-Encoding"] = "base64"
+        attachment.add_header("Content-Disposition", "attachment", filename=filename)
+        if self.get_content_type() != "multipart/mixed":
+            self.make_mixed()
+        self.attach(attachment)  # type: ignore[arg-type]
 
     def send(self) -> dict[str, str]:
         """Send email.
@@ -63,16 +107,59 @@ class Email(EmailMessage):
         Currently uses SES but could easily be switched out for another method if
         needed.
         """
+        import boto3  # noqa: PLC0415
+
         ses = boto3.client("ses", region_name="us-east-1")
         destinations = self["To"].split(",")
         if self["Cc"]:
             destinations.extend(self["Cc"].split(","))
         if self["Bcc"]:
             destinations.extend(self["Bcc"].split(","))
-        return ses.send_raw_email(
-            Source=self["From"],
-            Destinations=destinations,
-            RawMessage={
-                "Data": self.as_bytes(),
-            },
-        )
+        with metrics.timer("email.send") as size:
+            data = self.as_bytes()
+            size["bytes"] = len(data)
+            return ses.send_raw_email(
+                Source=self["From"],
+                Destinations=destinations,
+                RawMessage={
+                    "Data": data,
+                },
+            )
+
+
+def get_base64_size(size: int) -> int:
+    """Get the size in bytes of data of a given size once base64 encoded.
+
+    Matches the encoding of Email.add_file_attachment, where each 57 bytes of input
+    encode to a 76 character line and a newline.
+    """
+    lines, remainder = divmod(size, BASE64_LINE_INPUT_SIZE)
+    return lines * 77 + (-(-remainder // 3) * 4 + 1 if remainder else 0)
+
+
+def get_attachment_size(attachment: dict) -> int:
+    """Get the base64 encoded size in bytes of an attachment (see Email.populate)."""
+    content = attachment["content"]
+    if isinstance(content, str):
+        return get_base64_size(len(content.encode()))
+    return get_base64_size(content.seek(0, os.SEEK_END))
+
+
+def group_attachments(attachments: list[dict], max_size: int) -> list[list[dict]]:
+    """Group attachments in order into as few emails as possible under a size budget.
+
+    The attachments of each group total at most max_size bytes once base64 encoded,
+    so each group can be sent as one email under the SES message size limit. An
+    attachment larger than max_size on its own is put in a group by itself. Sizes are
+    worked out from the attachment contents, without encoding them.
+    """
+    groups: list[list[dict]] = [[]]
+    group_size = 0
+    for attachment in attachments:
+        size = get_attachment_size(attachment)
+        if groups[-1] and group_size + size > max_size:
+            groups.append([])
+            group_size = 0
+        groups[-1].append(attachment)
+        group_size += size
+    return groups
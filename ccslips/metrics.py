@@ -0,0 +1,144 @@
+import functools
+import inspect
+import json
+import math
+import threading
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import perf_counter
+from typing import Any
+
+
+@dataclass
+class Histogram:
+    """Histogram of the durations (and optionally sizes) of one kind of operation.
+
+    Attributes:
+        durations: Duration in seconds of each recorded operation.
+        bytes: Total number of bytes transferred or produced by the operations.
+    """
+
+    durations: list[float] = field(default_factory=list)
+    bytes: int = 0
+
+    def percentile(self, percent: float) -> float:
+        """Get a percentile of the durations using the nearest-rank method."""
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+    def summary(self) -> dict[str, float | int]:
+        """Summarize as count, total, p50, p95 and max seconds, and bytes."""
+        return {
+            "count": len(self.durations),
+            "total": round(sum(self.durations), 6),
+            "p50": round(self.percentile(50), 6),
+            "p95": round(self.percentile(95), 6),
+            "max": round(max(self.durations, default=0.0), 6),
+            "bytes": self.bytes,
+        }
+
+
+class Metrics:
+    """Metrics class.
+
+    A thread-safe collection of named timing histograms for instrumenting a run, e.g.
+    each Alma API request, fund lookup and rendered slip.
+
+    Operations are timed with the timer context manager or the timed decorator, or
+    recorded directly with record. Names are dot-separated by component, e.g.
+    "alma.request" or "polines.extract".
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: dict[str, Histogram] = {}
+
+    def record(self, name: str, seconds: float, size: int = 0) -> None:
+        """Record the duration (and optionally size in bytes) of one operation."""
+        with self._lock:
+            histogram = self._histograms.setdefault(name, Histogram())
+            histogram.durations.append(seconds)
+            histogram.bytes += size
+
+    @contextmanager
+    def timer(self, name: str) -> Generator[dict[str, int], None, None]:
+        """Time the operation in the context, recording it when the context exits.
+
+        The context yields a dict in which the number of bytes of the operation can be
+        set under the "bytes" key, e.g. once a response has been received.
+        """
+        size = {"bytes": 0}
+        start = perf_counter()
+        try:
+            yield size
+        finally:
+            self.record(name, perf_counter() - start, size["bytes"])
+
+    def timed[F: Callable[..., Any]](self, name: str) -> Callable[[F], F]:
+        """Decorate a function or coroutine function to time each call."""
+
+        def decorator(func: F) -> F:
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+                    with self.timer(name):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper  # type: ignore[return-value]
+
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+                with self.timer(name):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def summary(self) -> dict[str, dict[str, float | int]]:
+        """Summarize every histogram, sorted by name."""
+        with self._lock:
+            histograms = {
+                name: Histogram(list(histogram.durations), histogram.bytes)
+                for name, histogram in self._histograms.items()
+            }
+        return {name: histograms[name].summary() for name in sorted(histograms)}
+
+    def to_json(self) -> str:
+        """Get the summary as a JSON string for structured logging."""
+        return json.dumps(self.summary())
+
+    def send_to_sentry(self, name: str, start_timestamp: datetime) -> None:
+        """Send the summary to Sentry as a performance transaction for a run.
+
+        Each histogram's count, p95 and total (in milliseconds) are sent as
+        transaction data, along with the full summary.
+        The transaction is only sent if Sentry has been configured with tracing
+        enabled (see configure_sentry) and the run is sampled.
+        """
+        import sentry_sdk  # noqa: PLC0415
+
+        summary = self.summary()
+        transaction = sentry_sdk.start_transaction(
+            name=name, op="task", start_timestamp=start_timestamp
+        )
+        for metric, histogram in summary.items():
+            transaction.set_data(f"{metric}.count", histogram["count"])
+            transaction.set_data(f"{metric}.p95_ms", histogram["p95"] * 1000)
+            transaction.set_data(f"{metric}.total_ms", histogram["total"] * 1000)
+        transaction.set_data("metrics", summary)
+        transaction.finish()
+
+    def reset(self) -> None:
+        """Discard all recorded operations, e.g. at the start of a run."""
+        with self._lock:
+            self._histograms.clear()
+
+
+# metrics recorded by the instrumented functions and methods of the application
+metrics = Metrics()
@@ -0,0 +1,252 @@
+import logging
+import queue
+import threading
+from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from functools import partial
+from time import perf_counter
+from typing import Any, Literal
+
+from ccslips.alma import AlmaClient
+from ccslips.metrics import metrics
+from ccslips.polines import extract_credit_card_slip_data, get_po_lines
+from ccslips.render import load_slip_template
+from ccslips.state import ProcessedPoLines
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageTiming:
+    """Timing of a pipeline stage.
+
+    Attributes:
+        name: Name of the stage.
+        items: Number of items the stage has produced.
+        busy: Seconds spent producing items.
+        waiting: Seconds spent waiting for input from the previous stage or for space
+            in the queue to the next stage.
+    """
+
+    name: str
+    items: int = 0
+    busy: float = 0.0
+    waiting: float = 0.0
+
+    def __str__(self) -> str:
+        """Describe the stage timing for logging."""
+        return (
+            f"Stage '{self.name}': {self.items} items, {self.busy:.3f}s busy, "
+            f"{self.waiting:.3f}s waiting"
+        )
+
+
+class _Failure:
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+_DONE = object()
+
+
+class Pipeline:
+    """Pipeline class.
+
+    Runs a source iterator and a sequence of processing stages concurrently, each on
+    its own thread, connected by bounded queues. Iterating over the pipeline yields
+    the output of the last stage in source order, so work in one stage (e.g. waiting
+    on the network) overlaps with work in the others.
+
+    If a stage raises an exception, it is re-raised to the caller when iterating and
+    the other stages stop. If the caller stops iterating early, the stages also stop.
+    Either way the stage threads are joined before iteration ends, so they are no
+    longer using e.g. a client's session once the caller closes it.
+
+    Args:
+        source: Iterable of items for the first stage, iterated on its own thread.
+        stages: Sequence of (name, function) tuples applied to each item in order.
+        source_name: Name of the stage iterating over the source.
+        maxsize: Maximum number of items waiting between two stages.
+        join_timeout: Maximum seconds to wait for each stage thread to stop, e.g. if
+            it is in the middle of a request when the pipeline stops.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Any],
+        stages: Sequence[tuple[str, Callable[[Any], Any]]],
+        source_name: str = "source",
+        maxsize: int = 100,
+        join_timeout: float = 30.0,
+    ) -> None:
+        self.source = source
+        self.stages = stages
+        self.maxsize = maxsize
+        self.join_timeout = join_timeout
+        self.timings = [StageTiming(source_name)] + [
+            StageTiming(name) for name, _ in stages
+        ]
+        self._stop = threading.Event()
+
+    def __iter__(self) -> Generator[Any, None, None]:  # noqa: PYI058
+        """Start the pipeline threads and iterate over the last stage's output.
+
+        Closing the returned generator stops the pipeline and joins its threads.
+        """
+        return self._run()
+
+    @property
+    def bottleneck(self) -> StageTiming:
+        """The stage which spent the most time busy."""
+        return max(self.timings, key=lambda timing: timing.busy)
+
+    def log_timings(self) -> None:
+        for timing in self.timings:
+            logger.info(timing)
+        logger.info(f"Pipeline bottleneck: stage '{self.bottleneck.name}'")
+
+    def _get(self, source: queue.Queue, timing: StageTiming) -> Any:  # noqa: ANN401
+        """Get an item from a queue, returning _DONE if the pipeline is stopping."""
+        start = perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    return source.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            timing.waiting += perf_counter() - start
+
+    def _put(self, output: queue.Queue, item: object, timing: StageTiming) -> bool:
+        """Put an item on a queue, returning False if the pipeline is stopping."""
+        start = perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    output.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+                return True
+            return False
+        finally:
+            timing.waiting += perf_counter() - start
+
+    def _run_source(self, output: queue.Queue, timing: StageTiming) -> None:
+        try:
+            items = iter(self.source)
+            while True:
+                start = perf_counter()
+                item = next(items, _DONE)
+                elapsed = perf_counter() - start
+                timing.busy += elapsed
+                if item is _DONE:
+                    break
+                metrics.record(f"pipeline.{timing.name}", elapsed)
+                timing.items += 1
+                if not self._put(output, item, timing):
+                    return
+        except Exception as exception:  # noqa: BLE001
+            self._put(output, _Failure(exception), timing)
+            return
+        self._put(output, _DONE, timing)
+
+    def _run_stage(
+        self,
+        function: Callable[[Any], Any],
+        source: queue.Queue,
+        output: queue.Queue,
+        timing: StageTiming,
+    ) -> None:
+        while True:
+            item = self._get(source, timing)
+            if item is _DONE or isinstance(item, _Failure):
+                self._put(output, item, timing)
+                return
+            start = perf_counter()
+            try:
+                result = function(item)
+            except Exception as exception:  # noqa: BLE001
+                self._put(output, _Failure(exception), timing)
+                return
+            finally:
+                elapsed = perf_counter() - start
+                timing.busy += elapsed
+                metrics.record(f"pipeline.{timing.name}", elapsed)
+            timing.items += 1
+            if not self._put(output, result, timing):
+                return
+
+    def _run(self) -> Generator[Any, None, None]:
+        queues: list[queue.Queue] = [
+            queue.Queue(maxsize=self.maxsize) for _ in range(len(self.stages) + 1)
+        ]
+        threads = [
+            threading.Thread(
+                target=self._run_source,
+                args=(queues[0], self.timings[0]),
+                name=f"pipeline-{self.timings[0].name}",
+                daemon=True,
+            )
+        ]
+        for index, (name, function) in enumerate(self.stages):
+            threads.append(
+                threading.Thread(
+                    target=self._run_stage,
+                    args=(
+                        function,
+                        queues[index],
+                        queues[index + 1],
+                        self.timings[index + 1],
+                    ),
+                    name=f"pipeline-{name}",
+                    daemon=True,
+                )
+            )
+        for thread in threads:
+            thread.start()
+        try:
+            while (item := queues[-1].get()) is not _DONE:
+                if isinstance(item, _Failure):
+                    raise item.exception
+                yield item
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(self.join_timeout)
+                if thread.is_alive():
+                    logger.warning(
+                        f"Pipeline thread '{thread.name}' still running after "
+                        f"{self.join_timeout}s"
+                    )
+
+
+def credit_card_slips_pipeline(
+    date: str,
+    client: AlmaClient,
+    prefetch_funds: Literal["all", "po-lines"] | None = None,
+    maxsize: int = 100,
+    state: ProcessedPoLines | None = None,
+    *,
+    where: Callable[[dict], bool] | None = None,
+) -> Pipeline:
+    """Create a pipeline which yields rendered credit card slips for a given date.
+
+    Fetching PO lines from Alma, extracting credit card slip data (including fund
+    lookups) and rendering slips each run on their own thread. PO lines are only
+    fetched, and funds prefetched, once the pipeline is iterated, on the fetch
+    stage's thread.
+    """
+
+    def fetch_po_lines() -> Iterator[dict]:
+        yield from get_po_lines(date, client, prefetch_funds, state=state, where=where)
+
+    return Pipeline(
+        fetch_po_lines(),
+        [
+            ("extract", partial(extract_credit_card_slip_data, client)),
+            ("render", load_slip_template().render),
+        ],
+        source_name="fetch",
+        maxsize=maxsize,
+    )
@@ -1,52 +1,362 @@
-import xml.etree.ElementTree as ET
-from collections.abc import Generator, Iterator
-from copy import deepcopy
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    Callable,
+    Generator,
+    Iterable,
+    Mapping,
+    Sequence,
+)
 from datetime import datetime
 from decimal import Decimal
+from itertools import batched
+from typing import IO, TYPE_CHECKING, Literal, Protocol
 
 from ccslips.alma import AlmaClient
+from ccslips.compress import CompressedStream
+from ccslips.decode import FieldSpec
+from ccslips.email import get_base64_size
+from ccslips.metrics import metrics
+from ccslips.render import load_slip_template
+from ccslips.slip import CreditCardSlip
+from ccslips.state import ProcessedPoLines
 
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
 
-def process_po_lines(date: str) -> Generator[dict, None, None]:
-    """Retrieve PO line records for a given date and yield processed data for each."""
-    client = AlmaClient()
-    for po_line in client.get_full_po_lines("PURCHASE_NOLETTER", date):
+    from ccslips.async_alma import AsyncAlmaClient
+
+# number of PO line records extracted at once by process_po_lines_by_date
+EXTRACT_BATCH_SIZE = 100
+
+NO_SLIPS_HTML = "<html><p>No credit card orders on this date</p></html>"
+
+# fields of full PO line records used to generate slips (see select_fields), including
+# those used to filter PO lines and to track them in the run state
+PO_LINE_FIELDS: FieldSpec = {
+    "created_date": None,
+    "fund_distribution": {"fund_code": {"value": None}, "amount": {"sum": None}},
+    "location": {"quantity": None},
+    "modification_date": None,
+    "note": {"note_text": None},
+    "number": None,
+    "price": {"sum": None},
+    "resource_metadata": {"title": None},
+    "vendor": {"desc": None},
+    "vendor_account": None,
+}
+
+
+class FundLookup(Protocol):
+    """Any object that can look up a fund's account number, e.g. an AlmaClient."""
+
+    def get_fund_external_id(self, fund_code: str) -> str | None: ...
+
+
+def process_po_lines(
+    date: str,
+    client: AlmaClient | None = None,
+    prefetch_funds: Literal["all", "po-lines"] | None = None,
+    state: ProcessedPoLines | None = None,
+    *,
+    where: Callable[[dict], bool] | None = None,
+) -> Generator[CreditCardSlip, None, None]:
+    """Retrieve PO line records for a given date and yield processed data for each.
+
+    If no client is provided, a new AlmaClient is created and closed once all PO lines
+    have been processed. See get_po_lines for the prefetch_funds, state and where
+    options.
+    """
+    if client is None:
+        with AlmaClient() as new_client:
+            yield from process_po_lines(
+                date, new_client, prefetch_funds, state, where=where
+            )
+        return
+    for po_line in get_po_lines(date, client, prefetch_funds, state=state, where=where):
         yield extract_credit_card_slip_data(client, po_line)
 
 
-def extract_credit_card_slip_data(client: AlmaClient, po_line_record: dict) -> dict:
-    """Extract required data for a credit card slip from a PO line record.
+def process_po_lines_by_date(
+    start_date: str,
+    end_date: str,
+    client: AlmaClient | None = None,
+    prefetch_funds: Literal["all", "po-lines"] | None = None,
+    state: ProcessedPoLines | None = None,
+    *,
+    where: Callable[[dict], bool] | None = None,
+) -> Generator[tuple[str, CreditCardSlip], None, None]:
+    """Retrieve PO line records for a range of dates and yield processed data for each.
+
+    PO lines for every date from start_date through end_date are retrieved in a single
+    pass over the brief PO line records. Each processed PO line is yielded with its
+    creation date in 'YYYY-MM-DD' format, so slips can be grouped by date. PO lines are
+    extracted in batches of EXTRACT_BATCH_SIZE (see extract_credit_card_slips_data).
+    See process_po_lines for the other arguments.
+    """
+    if client is None:
+        with AlmaClient() as new_client:
+            yield from process_po_lines_by_date(
+                start_date, end_date, new_client, prefetch_funds, state, where=where
+            )
+        return
+    po_lines = get_po_lines(
+        start_date, client, prefetch_funds, end_date=end_date, state=state, where=where
+    )
+    for batch in batched(po_lines, EXTRACT_BATCH_SIZE):
+        for po_line, slip in zip(
+            batch, extract_credit_card_slips_data(client, batch), strict=True
+        ):
+            yield po_line["created_date"].removesuffix("Z"), slip
+
+
+def get_po_lines(
+    date: str,
+    client: AlmaClient,
+    prefetch_funds: Literal["all", "po-lines"] | None = None,
+    end_date: str | None = None,
+    state: ProcessedPoLines | None = None,
+    *,
+    where: Callable[[dict], bool] | None = None,
+) -> Iterable[dict]:
+    """Get the credit card PO line records for a given date or range of dates.
+
+    Fund account numbers can optionally be prefetched into the client's fund cache
+    before any data is extracted: "all" retrieves every active fund with a few paged
+    requests, while "po-lines" retrieves all PO lines first and then looks up only
+    their distinct fund codes.
+
+    If an end_date is provided, PO lines created on any date from date through
+    end_date are retrieved.
+
+    If a state is provided, PO lines already processed by an earlier run and not
+    modified since are skipped, and the remaining PO lines are recorded as pending in
+    the state.
+
+    If a where predicate is provided (e.g. has_cardholder_note), only PO lines whose
+    brief records it returns True for are retrieved, so other PO lines never cost a
+    request for their full records.
+
+    Only the PO_LINE_FIELDS of each full PO line record are kept.
+    """
+    po_lines: Iterable[dict] = client.get_full_po_lines(
+        "PURCHASE_NOLETTER",
+        date,
+        end_date,
+        skip=state.skip if state else None,
+        fields=PO_LINE_FIELDS,
+        where=where,
+    )
+    if state:
+        po_lines = state.filter(po_lines)
+    if prefetch_funds == "all":
+        client.prefetch_funds()
+    elif prefetch_funds == "po-lines":
+        po_lines = list(po_lines)
+        client.prefetch_funds(get_fund_codes(po_lines))
+    return po_lines
+
 
-    The keys of the returned dict map to the appropriate element classes in the XML
-    template used to generate a formatted slip.
+async def process_po_lines_async(
+    date: str,
+    client: "AsyncAlmaClient",
+    prefetch_funds: Literal["all", "po-lines"] | None = None,
+    state: ProcessedPoLines | None = None,
+    *,
+    where: Callable[[dict], bool] | None = None,
+) -> AsyncGenerator[CreditCardSlip, None]:
+    """Retrieve PO line records for a given date and yield processed data for each.
+
+    The async equivalent of process_po_lines. Full PO line records are fetched
+    concurrently, and the funds of each PO line are looked up concurrently with other
+    PO lines, before the data is extracted. Data is yielded in PO line order.
     """
-    created_date = (
-        datetime.strptime(po_line_record["created_date"], "%Y-%m-%dZ")
-        .astimezone()
-        .strftime("%y%m%d")
+    po_lines: AsyncIterable[dict] = client.get_full_po_lines(
+        "PURCHASE_NOLETTER",
+        date,
+        skip=state.skip if state else None,
+        fields=PO_LINE_FIELDS,
+        where=where,
     )
+    if state:
+        po_lines = _filter_async(state, po_lines)
+    if prefetch_funds == "all":
+        await client.prefetch_funds()
+    elif prefetch_funds == "po-lines":
+        po_line_list = [po_line async for po_line in po_lines]
+        await client.prefetch_funds(get_fund_codes(po_line_list))
+
+        async def replay_po_lines() -> AsyncGenerator[dict, None]:
+            for po_line in po_line_list:
+                yield po_line
+
+        po_lines = replay_po_lines()
+
+    async def process_po_line(po_line: dict) -> CreditCardSlip:
+        await client.prefetch_funds(get_fund_codes([po_line]))
+        return extract_credit_card_slip_data(client.fund_cache, po_line)
+
+    async for data in client.map_in_order(process_po_line, po_lines):
+        yield data
+
+
+async def _filter_async(
+    state: ProcessedPoLines, po_lines: AsyncIterable[dict]
+) -> AsyncGenerator[dict, None]:
+    async for po_line in po_lines:
+        for unprocessed_po_line in state.filter([po_line]):
+            yield unprocessed_po_line
+
+
+def get_fund_codes(po_lines: Iterable[dict]) -> set[str]:
+    """Get the distinct fund codes from the fund distributions of PO line records.
+
+    Only the first two funds of each PO line are included, as only those are used for
+    credit card slips (see get_account_numbers).
+    """
+    return {
+        fund_code
+        for po_line in po_lines
+        for fund in po_line.get("fund_distribution", [])[:2]
+        if (fund_code := fund.get("fund_code", {}).get("value"))
+    }
+
+
+@metrics.timed("polines.extract")
+def extract_credit_card_slip_data(
+    client: FundLookup, po_line_record: dict
+) -> CreditCardSlip:
+    """Extract required data for a credit card slip from a PO line record.
+
+    The record is built in a single pass and holds no references to the PO line
+    record, so the PO line record can be discarded as soon as its data is extracted.
+    """
+    created_date = get_po_date(po_line_record["created_date"])
     fund_distribution = po_line_record.get("fund_distribution", [])
     price = Decimal(po_line_record.get("price", {}).get("sum", "0.00"))
     title = po_line_record.get("resource_metadata", {}).get("title", "Unknown title")
-    po_line_data = {
-        "cardholder": get_cardholder_from_notes(po_line_record.get("note")),
-        "invoice_number": (
-            f"Invoice #: {created_date}{title.replace(' ', '')[:3].upper()}"
-        ),
-        "po_date": created_date,
-        "po_line_number": po_line_record["number"],
-        "price": f"${price:.2f}",
-        "quantity": get_quantity_from_locations(po_line_record.get("location")),
-        "item_title": title,
-        "total_price": (
+    account_1, account_2 = get_account_numbers(client, fund_distribution)
+    return CreditCardSlip(
+        po_date=created_date,
+        cardholder=get_cardholder_from_notes(po_line_record.get("note")),
+        vendor_name=po_line_record.get("vendor", {}).get("desc", "No vendor found"),
+        vendor_code=po_line_record.get("vendor_account", "No vendor found"),
+        account_1=account_1,
+        account_2=account_2,
+        po_line_number=po_line_record["number"],
+        item_title=title,
+        quantity=get_quantity_from_locations(po_line_record.get("location")),
+        price=f"${price:.2f}",
+        total_price=(
             f"${get_total_price_from_fund_distribution(fund_distribution, price):.2f}"
         ),
-        "vendor_code": po_line_record.get("vendor_account", "No vendor found"),
-        "vendor_name": po_line_record.get("vendor", {}).get("desc", "No vendor found"),
+        invoice_number=get_invoice_number(created_date, title),
+    )
+
+
+def extract_credit_card_slips_data(
+    client: FundLookup, po_line_records: Sequence[dict]
+) -> list[CreditCardSlip]:
+    """Extract required data for credit card slips from a batch of PO line records.
+
+    Gives the same slips as extract_credit_card_slip_data for each record, but derives
+    each column of slip data (PO date, price, total price, quantity and invoice number)
+    for the whole batch at once. Dates are converted once per distinct created_date,
+    which most PO lines in a batch share.
+    """
+    created_dates = [record["created_date"] for record in po_line_records]
+    po_dates_by_created_date = {
+        created_date: get_po_date(created_date) for created_date in set(created_dates)
     }
-    po_line_data.update(get_account_data(client, fund_distribution))
+    po_dates = [po_dates_by_created_date[created_date] for created_date in created_dates]
+    fund_distributions = [
+        record.get("fund_distribution", []) for record in po_line_records
+    ]
+    unit_prices = [
+        Decimal(record.get("price", {}).get("sum", "0.00")) for record in po_line_records
+    ]
+    titles = [
+        record.get("resource_metadata", {}).get("title", "Unknown title")
+        for record in po_line_records
+    ]
+    prices = [f"${price:.2f}" for price in unit_prices]
+    total_prices = [
+        f"${get_total_price_from_fund_distribution(fund_distribution, price):.2f}"
+        for fund_distribution, price in zip(fund_distributions, unit_prices, strict=True)
+    ]
+    quantities = [
+        get_quantity_from_locations(record.get("location")) for record in po_line_records
+    ]
+    invoice_numbers = [
+        get_invoice_number(po_date, title)
+        for po_date, title in zip(po_dates, titles, strict=True)
+    ]
+    accounts = [
+        get_account_numbers(client, fund_distribution)
+        for fund_distribution in fund_distributions
+    ]
+    return [
+        CreditCardSlip(
+            po_date=po_date,
+            cardholder=get_cardholder_from_notes(record.get("note")),
+            vendor_name=record.get("vendor", {}).get("desc", "No vendor found"),
+            vendor_code=record.get("vendor_account", "No vendor found"),
+            account_1=account_1,
+            account_2=account_2,
+            po_line_number=record["number"],
+            item_title=title,
+            quantity=quantity,
+            price=price,
+            total_price=total_price,
+            invoice_number=invoice_number,
+        )
+        for (
+            record,
+            po_date,
+            (account_1, account_2),
+            title,
+            quantity,
+            price,
+            total_price,
+            invoice_number,
+        ) in zip(
+            po_line_records,
+            po_dates,
+            accounts,
+            titles,
+            quantities,
+            prices,
+            total_prices,
+            invoice_numbers,
+            strict=True,
+        )
+    ]
+
 
-    return po_line_data
+def get_po_date(created_date: str) -> str:
+    """Get the PO date for a slip from a PO line record created_date, e.g. '230102'."""
+    return datetime.strptime(created_date, "%Y-%m-%dZ").astimezone().strftime("%y%m%d")
+
+
+def get_invoice_number(po_date: str, title: str) -> str:
+    """Get the invoice number for a slip from its PO date and item title."""
+    return f"Invoice #: {po_date}{title.replace(' ', '')[:3].upper()}"
+
+
+def has_cardholder_note(po_line: dict) -> bool:
+    """Check whether a brief or full PO line record has a note beginning with 'CC-'.
+
+    PO lines without a cardholder note get slips reading "No cardholder note found",
+    so this can be used as a where predicate to only generate slips for PO lines
+    with one, without fetching the full records of the others. Records without a note
+    field, such as brief records that leave notes out, may still have a cardholder
+    note, so are kept until their full records can be checked.
+    """
+    if "note" not in po_line:
+        return True
+    return any(
+        note.get("note_text", "").startswith("CC-") for note in po_line.get("note") or []
+    )
 
 
 def get_cardholder_from_notes(notes: list[dict] | None) -> str:
@@ -80,64 +390,237 @@ def get_total_price_from_fund_distribution(
     If no amounts or amount sums are listed in the fund distribution, the unit price is
     returned as the total price.
     """
-    fund_amounts = []
-    for fund in fund_distribution:
-        fund_amount = fund.get("amount", {}).get("sum", "0.00")
-        # handle edge case where fund_distribution has funds with empty strings
-        if fund_amount == "":
-            fund_amount = "0.00"
-        fund_amounts.append(Decimal(fund_amount))
-
-    return sum(fund_amounts) or unit_price
+    # handle edge case where fund_distribution has funds with empty strings
+    return (
+        sum(
+            Decimal(fund.get("amount", {}).get("sum", "0.00") or "0.00")
+            for fund in fund_distribution
+        )
+        or unit_price
+    )
 
 
-def get_account_data(client: AlmaClient, fund_distribution: list[dict]) -> dict[str, str]:
+def get_account_numbers(
+    client: FundLookup, fund_distribution: list[dict]
+) -> tuple[str, str | None]:
     """Get account information needed for a credit card slip.
 
-    If the fund_distribution is empty, returns a single account with default text.
-    Otherwise returns up to two accounts with their associated account numbers.
+    Returns the account numbers of the first two funds in the fund_distribution. If
+    the first fund has no account number (or there are no funds), the first account
+    is default text, and if the second has none (or there is only one fund), the
+    second account is None.
     """
-    result = {"account_1": "No fund code found"}
-    for count, fund in enumerate(fund_distribution, start=1):
-        if count == 3:  # noqa: PLR2004
-            break
-        if account_number := get_account_number_from_fund(client, fund):
-            result[f"account_{count}"] = account_number
-    return result
+    account_numbers: list[str | None] = [
+        get_account_number_from_fund(client, fund) for fund in fund_distribution[:2]
+    ]
+    account_numbers += [None] * (2 - len(account_numbers))
+    return account_numbers[0] or "No fund code found", account_numbers[1]
 
 
-def get_account_number_from_fund(client: AlmaClient, fund: dict) -> str | None:
+def get_account_number_from_fund(client: FundLookup, fund: dict) -> str | None:
     """Get account number for a given fund.
 
     Returns None if fund has no fund code, fund record cannot be retrieved via fund
     code, or fund record does not contain an external_id field value.
     """
-    account = None
-    if fund_code := fund.get("fund_code", {}).get("value"):  # noqa: SIM102
-        if fund_records := client.get_fund_by_code(fund_code).get("fund"):
-            account = fund_records[0].get("external_id")
-    return account
+    if fund_code := fund.get("fund_code", {}).get("value"):
+        return client.get_fund_external_id(fund_code)
+    return None
 
 
-def generate_credit_card_slips_html(po_line_data: Iterator[dict]) -> str:
+def generate_credit_card_slips_html(po_line_data: Iterable[CreditCardSlip]) -> str:
     """Create credit card slips HTML from a set of credit card slip data."""
-    template_tree = ET.parse("config/credit_card_slip_template.xml")  # noqa: S314
-    xml_template = template_tree.getroot()
-    output = ET.fromstring("<html></html>")  # noqa: S314
-    for line in po_line_data:
-        output.append(populate_credit_card_slip_xml_fields(deepcopy(xml_template), line))
-    if len(output) == 0:
-        return "<html><p>No credit card orders on this date</p></html>"
-    return ET.tostring(output, encoding="unicode", method="xml")
+    template = load_slip_template()
+    slips = [template.render(line) for line in po_line_data]
+    if not slips:
+        return NO_SLIPS_HTML
+    return f"<html>{''.join(slips)}</html>"
+
+
+def write_credit_card_slips_html(
+    po_line_data: Iterable[CreditCardSlip], sink: "IO[bytes] | ShardedSlipsHtmlWriter"
+) -> int:
+    """Write credit card slips HTML to a binary file-like object, one slip at a time.
+
+    Each slip is rendered and written as soon as its data is yielded, so memory use does
+    not grow with the number of slips. The UTF-8 encoded output is identical to the
+    output of generate_credit_card_slips_html.
+
+    Returns the number of slips written.
+    """
+    return write_rendered_slips_html(map(load_slip_template().render, po_line_data), sink)
+
+
+def write_rendered_slips_html(
+    slips: Iterable[str], sink: "IO[bytes] | ShardedSlipsHtmlWriter"
+) -> int:
+    """Write already rendered credit card slips as HTML to a binary file-like object.
+
+    The sink may also be a ShardedSlipsHtmlWriter, to split the slips into documents
+    under a size budget.
+
+    Returns the number of slips written.
+    """
+    writer = get_slips_writer(sink)
+    for slip in slips:
+        writer.write(slip)
+    return writer.close()
+
+
+def write_credit_card_slips_html_by_date(
+    dated_po_line_data: Iterable[tuple[str, CreditCardSlip]],
+    sinks: Mapping[str, "IO[bytes] | ShardedSlipsHtmlWriter"],
+) -> dict[str, int]:
+    """Write credit card slips HTML for PO lines to a separate file-like object per date.
+
+    Args:
+        dated_po_line_data: Tuples of PO line creation date and credit card slip data,
+            as yielded by process_po_lines_by_date.
+        sinks: Binary file-like object (or ShardedSlipsHtmlWriter) for each creation
+            date. Dates may share the same object, in which case their slips are
+            written to one HTML document (or set of documents).
+
+    Returns the number of slips written for each date.
+    """
+    template = load_slip_template()
+    writers: dict[
+        IO[bytes] | ShardedSlipsHtmlWriter, SlipsHtmlWriter | ShardedSlipsHtmlWriter
+    ] = {}
+    for sink in sinks.values():
+        writers.setdefault(sink, get_slips_writer(sink))
+    counts = dict.fromkeys(sinks, 0)
+    for date, po_line_data in dated_po_line_data:
+        writers[sinks[date]].write(template.render(po_line_data))
+        counts[date] += 1
+    for writer in writers.values():
+        writer.close()
+    return counts
+
+
+class SlipsHtmlWriter:
+    """SlipsHtmlWriter class.
+
+    Writes rendered credit card slips to a binary file-like object one at a time,
+    wrapped in an <html> element, or the default text if no slips are written.
+    """
+
+    def __init__(self, sink: IO[bytes]) -> None:
+        self.sink = sink
+        self.count = 0
+        self.size = 0
+
+    def write(self, slip: str) -> None:
+        self.write_encoded(slip.encode())
+
+    def write_encoded(self, encoded: bytes) -> None:
+        """Write a rendered slip that is already UTF-8 encoded."""
+        with metrics.timer("polines.write") as size:
+            if self.count == 0:
+                self.size += self.sink.write(b"<html>")
+            self.size += self.sink.write(encoded)
+            size["bytes"] = len(encoded)
+        self.count += 1
+
+    def close(self) -> int:
+        """Finish the HTML document and return the number of slips written."""
+        self.size += self.sink.write(b"</html>" if self.count else NO_SLIPS_HTML.encode())
+        return self.count
+
+
+class ShardedSlipsHtmlWriter:
+    """ShardedSlipsHtmlWriter class.
+
+    Writes rendered credit card slips like SlipsHtmlWriter, but starts a new HTML
+    document in a new binary file-like object, from new_sink, whenever the next slip
+    would take the current document over max_size bytes once base64 encoded as an
+    email attachment. Sizes are tracked as slips are written, so no document has to be
+    encoded to find out it is too large. A slip too large for max_size on its own is
+    written to a document by itself.
+
+    If compression is set, each document is compressed as it is written, as a gzip
+    file or as the file named filename in a zip archive, and max_size applies to the
+    compressed files.
+
+    The documents written are kept in order in the sinks attribute.
+    """
+
+    def __init__(
+        self,
+        new_sink: Callable[[], IO[bytes]],
+        max_size: int | None = None,
+        *,
+        compression: Literal["gzip", "zip"] | None = None,
+        filename: str = "credit_card_slips.htm",
+    ) -> None:
+        self.new_sink = new_sink
+        self.max_size = max_size
+        self.compression = compression
+        self.filename = filename
+        self.sinks: list[IO[bytes]] = []
+        self.stream: CompressedStream | None = None
+        self.writer = self._new_writer()
+        self.count = 0
+
+    def write(self, slip: str) -> None:
+        encoded = slip.encode()
+        if (
+            self.max_size is not None
+            and self.writer.count
+            and not self._fits(len(encoded) + len(b"</html>"), self.max_size)
+        ):
+            self._close_writer()
+            self.writer = self._new_writer()
+        self.writer.write_encoded(encoded)
+        self.count += 1
+
+    def close(self) -> int:
+        """Finish the last HTML document and return the number of slips written."""
+        self._close_writer()
+        return self.count
+
+    def _new_writer(self) -> SlipsHtmlWriter:
+        self.sinks.append(self.new_sink())
+        if self.compression is None:
+            return SlipsHtmlWriter(self.sinks[-1])
+        self.stream = CompressedStream(self.sinks[-1], self.compression, self.filename)
+        return SlipsHtmlWriter(self.stream)  # type: ignore[arg-type]
+
+    def _close_writer(self) -> None:
+        self.writer.close()
+        if self.stream:
+            self.stream.close()
+
+    def _fits(self, size: int, max_size: int) -> bool:
+        """Check whether size more bytes fit in the current document under max_size.
+
+        The compressor is only flushed, to bound the compressed size more closely,
+        when the bound without flushing does not fit.
+        """
+        if self.stream is None:
+            return get_base64_size(self.writer.size + size) <= max_size
+        if get_base64_size(self.stream.get_size_bound(size)) <= max_size:
+            return True
+        self.stream.flush()
+        return get_base64_size(self.stream.get_size_bound(size)) <= max_size
+
+
+def get_slips_writer(
+    sink: IO[bytes] | ShardedSlipsHtmlWriter,
+) -> SlipsHtmlWriter | ShardedSlipsHtmlWriter:
+    """Get a writer for a binary file-like object, or a sharded writer as it is."""
+    if isinstance(sink, ShardedSlipsHtmlWriter):
+        return sink
+    return SlipsHtmlWriter(sink)
 
 
 def populate_credit_card_slip_xml_fields(
-    credit_card_slip_xml_template: ET.Element, credit_card_slip_data: dict
-) -> ET.Element:
+    credit_card_slip_xml_template: "ET.Element",
+    credit_card_slip_data: CreditCardSlip | Mapping[str, str],
+) -> "ET.Element":
     """Populate credit card slip XML template with data extracted from a PO line.
 
-    The credit_card_slip_data keys must correspond to their associated element classes
-    in the XML template.
+    The credit_card_slip_data fields (or keys) must correspond to their associated
+    element classes in the XML template.
     """
     for key, value in credit_card_slip_data.items():
         for element in credit_card_slip_xml_template.findall(f'.//td[@class="{key}"]'):
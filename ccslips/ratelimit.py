@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """TokenBucket class.
+
+    A thread-safe, adaptive token bucket rate limiter. Tokens are added at `rate` per
+    second up to a maximum of `burst` tokens, and each request consumes one token,
+    blocking until a token is available.
+
+    The refill rate adapts to the API's responses using additive increase and
+    multiplicative decrease: each throttled (HTTP 429) response halves the rate and
+    pauses all callers, and each successful response nudges the rate back up towards
+    the configured maximum. A single instance can be shared by any number of threads
+    so they collectively stay under the API's limit, and tokens can be taken from
+    coroutines with acquire_async.
+
+    Args:
+        rate: Maximum number of requests per second.
+        burst: Maximum number of requests that can be made at once after the bucket
+            has been idle.
+        min_rate: Lower bound for the refill rate when backing off.
+        max_pause: Maximum number of seconds all callers are paused for after a
+            throttled response, however long the API asks to wait.
+        clock: Monotonic clock function, overridable for testing.
+        sleep: Sleep function, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: float = 1.0,
+        *,
+        max_pause: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            message = "Rate limit rate must be positive and burst must be at least 1"
+            raise ValueError(message)
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.max_pause = max_pause
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(now - self._updated, 0.0)
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def _try_acquire(self) -> float:
+        """Take a token if one is available.
+
+        Returns 0 if a token was taken, or else the number of seconds to wait before
+        trying again.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now >= self._paused_until and self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return max(self._paused_until - now, (1 - self._tokens) / self.rate)
+
+    def acquire(self) -> float:
+        """Take a token, blocking until one is available.
+
+        Returns the number of seconds spent waiting.
+        """
+        waited = 0.0
+        while delay := self._try_acquire():
+            self._sleep(delay)
+            waited += delay
+        return waited
+
+    async def acquire_async(self) -> float:
+        """Take a token, waiting without blocking the event loop until one is available.
+
+        Returns the number of seconds spent waiting.
+        """
+        import asyncio  # noqa: PLC0415
+
+        waited = 0.0
+        while delay := self._try_acquire():
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+    def throttled(self, retry_after: float | None = None) -> None:
+        """Back off after the API reports the rate limit has been exceeded.
+
+        Halves the refill rate, empties the bucket, and pauses all callers for
+        retry_after seconds (up to max_pause) if provided, or else for the time it
+        takes to refill one token at the reduced rate.
+        """
+        with self._lock:
+            now = self._clock()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._updated = now
+            pause = min(
+                self.max_pause, retry_after if retry_after is not None else 1 / self.rate
+            )
+            self._paused_until = max(self._paused_until, now + pause)
+        logger.warning(
+            "Alma API rate limit exceeded, reducing request rate to %.2f/s", self.rate
+        )
+
+    def succeeded(self) -> None:
+        """Speed back up towards the maximum rate after a successful request."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
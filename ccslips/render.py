@@ -0,0 +1,88 @@
+import re
+from collections.abc import Mapping
+from copy import deepcopy
+from functools import cache
+from typing import TYPE_CHECKING
+from xml.sax.saxutils import escape
+
+from ccslips.metrics import metrics
+from ccslips.slip import SLIP_FIELDS, CreditCardSlip, get_slip_values
+
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+
+SLIP_TEMPLATE_PATH = "config/credit_card_slip_template.xml"
+
+
+class SlipTemplate:
+    """SlipTemplate class.
+
+    A credit card slip XML template compiled once into static markup and field slots.
+
+    Each <td> element with a class attribute in the template is a field slot, filled
+    with the value of the matching CreditCardSlip field (or key, if the slip data is a
+    mapping), or left with the template's text if there is no value. The position of
+    each slot's field in a CreditCardSlip is resolved once, when the template is
+    compiled, so rendering a slip reads its fields by position. Rendering a slip joins
+    the static markup and the escaped field values, so the template tree is never
+    copied or searched per slip.
+    The output is identical to populating a copy of the template tree with
+    populate_credit_card_slip_xml_fields and serializing it with ET.tostring.
+    """
+
+    _SLOT_PATTERN = re.compile(">([0-9]+)</td>")
+
+    def __init__(self, template: "ET.Element") -> None:
+        import xml.etree.ElementTree as ET  # noqa: PLC0415
+
+        template = deepcopy(template)
+        self.fields: list[str] = []
+        self._defaults: list[str | None] = []
+        for index, element in enumerate(template.iterfind(".//td[@class]")):
+            if len(element):
+                message = "Slip template field elements cannot have child elements"
+                raise ValueError(message)
+            self.fields.append(element.attrib["class"])
+            self._defaults.append(element.text)
+            element.text = f"{index}"
+        parts = self._SLOT_PATTERN.split(ET.tostring(template, encoding="unicode"))
+        self._static = parts[0::2]
+        self._slip_positions = [
+            SLIP_FIELDS.index(field) if field in SLIP_FIELDS else None
+            for field in self.fields
+        ]
+
+    @classmethod
+    def from_file(cls, path: str) -> "SlipTemplate":
+        import xml.etree.ElementTree as ET  # noqa: PLC0415
+
+        return cls(ET.parse(path).getroot())  # noqa: S314
+
+    @metrics.timed("render.slip")
+    def render(self, data: CreditCardSlip | Mapping[str, str]) -> str:
+        """Render a credit card slip from a slip record or data keyed by element class."""
+        values: list[str | None]
+        if isinstance(data, CreditCardSlip):
+            row = get_slip_values(data)
+            values = [
+                default if position is None or row[position] is None else row[position]
+                for position, default in zip(
+                    self._slip_positions, self._defaults, strict=True
+                )
+            ]
+        else:
+            values = [
+                data.get(field, default)
+                for field, default in zip(self.fields, self._defaults, strict=True)
+            ]
+        chunks = [self._static[0]]
+        for value, static in zip(values, self._static[1:], strict=True):
+            chunks.append(f">{escape(value)}</td>" if value else " />")
+            chunks.append(static)
+        return "".join(chunks)
+
+
+@cache
+def load_slip_template(path: str = SLIP_TEMPLATE_PATH) -> SlipTemplate:
+    """Load and compile a slip template, reusing it on subsequent calls."""
+    return SlipTemplate.from_file(path)
@@ -0,0 +1,129 @@
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from http import HTTPStatus
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = frozenset(
+    {
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
+
+
+class RetryPolicy:
+    """RetryPolicy class.
+
+    A thread-safe policy for retrying failed idempotent (GET) requests after transient
+    errors, such as HTTP 5xx responses, dropped connections and read timeouts.
+
+    Each request is attempted up to max_attempts times, waiting between attempts for
+    the Retry-After period if the server provided one (up to max_backoff), or else for
+    an exponential backoff with full jitter. All requests sharing the policy also
+    share a retry budget, so a persistently failing API fails the run after a bounded
+    number of retries rather than slowing it down indefinitely.
+
+    Args:
+        max_attempts: Maximum number of attempts per request, including the first.
+        backoff: Base backoff in seconds, doubled after each attempt.
+        max_backoff: Maximum backoff in seconds before jitter is applied.
+        budget: Maximum number of retries across all requests.
+        jitter: Function returning a random fraction in [0, 1), overridable for
+            testing.
+        sleep: Sleep function, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        budget: int = 50,
+        *,
+        jitter: Callable[[], float] = random.random,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if max_attempts < 1 or budget < 0:
+            message = (
+                "Retry max attempts must be at least 1 and budget must not be negative"
+            )
+            raise ValueError(message)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.retries = 0
+        self.waited = 0.0
+        self.budget_exhausted = 0
+        self._jitter = jitter
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    @property
+    def budget_remaining(self) -> int:
+        return self.budget - self.retries
+
+    def _next_delay(
+        self, attempt: int, reason: str, retry_after: float | None = None
+    ) -> float | None:
+        """Spend a retry from the budget and get the delay before the next attempt.
+
+        Returns None if the request should not be retried, either because it has been
+        attempted max_attempts times or because the retry budget has been spent.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        with self._lock:
+            if self.retries >= self.budget:
+                self.budget_exhausted += 1
+                logger.warning("Alma API retry budget exhausted, not retrying %s", reason)
+                return None
+            self.retries += 1
+            if retry_after is None:
+                backoff = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+                delay = backoff * self._jitter()
+            else:
+                delay = min(self.max_backoff, retry_after)
+            self.waited += delay
+        logger.warning(
+            "Retrying Alma API request in %.2fs after %s (attempt %d of %d)",
+            delay,
+            reason,
+            attempt,
+            self.max_attempts,
+        )
+        return delay
+
+    def wait_to_retry(
+        self, attempt: int, reason: str, retry_after: float | None = None
+    ) -> bool:
+        """Wait before retrying a request that failed on the given attempt number.
+
+        Returns False without waiting if the request should not be retried.
+        """
+        delay = self._next_delay(attempt, reason, retry_after)
+        if delay is None:
+            return False
+        self._sleep(delay)
+        return True
+
+    async def wait_to_retry_async(
+        self, attempt: int, reason: str, retry_after: float | None = None
+    ) -> bool:
+        """Wait without blocking the event loop before retrying a failed request.
+
+        Returns False without waiting if the request should not be retried.
+        """
+        import asyncio  # noqa: PLC0415
+
+        delay = self._next_delay(attempt, reason, retry_after)
+        if delay is None:
+            return False
+        await asyncio.sleep(delay)
+        return True
@@ -0,0 +1,42 @@
+from collections.abc import Generator
+from dataclasses import dataclass, fields
+from operator import attrgetter
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class CreditCardSlip:
+    """CreditCardSlip class.
+
+    The data for one credit card slip, extracted from a PO line record. Each field
+    maps to the element class of the same name in the XML template used to generate a
+    formatted slip, and fields are ordered as in the default template. A field set to
+    None is left with the template's default text.
+
+    Records are immutable and slotted, so large numbers of slips can be held or queued
+    without a dict per slip.
+    """
+
+    po_date: str
+    cardholder: str
+    vendor_name: str
+    vendor_code: str
+    account_1: str = "No fund code found"
+    account_2: str | None = None
+    po_line_number: str
+    item_title: str
+    quantity: str
+    price: str
+    total_price: str
+    invoice_number: str
+
+    def items(self) -> Generator[tuple[str, str], None, None]:
+        """Yield the field names and values of the fields that are set."""
+        for name, value in zip(SLIP_FIELDS, get_slip_values(self), strict=True):
+            if value is not None:
+                yield name, value
+
+
+SLIP_FIELDS = tuple(field.name for field in fields(CreditCardSlip))
+
+# get the values of all fields of a slip as a tuple, in SLIP_FIELDS order
+get_slip_values = attrgetter(*SLIP_FIELDS)
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import threading
+from collections.abc import Generator, Iterable
+from pathlib import Path
+from typing import Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore(Protocol):
+    """Any backend that can load and save the run state as a JSON-compatible dict."""
+
+    def load(self) -> dict: ...
+
+    def save(self, state: dict) -> None: ...
+
+
+class LocalStateStore:
+    """LocalStateStore class.
+
+    Stores the run state as a JSON file at a local path. The file is replaced
+    atomically, so an interrupted save never leaves a partially written state.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def load(self) -> dict:
+        """Load the state, or an empty state if the file does not exist yet."""
+        try:
+            with self.path.open(encoding="utf-8") as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, state: dict) -> None:
+        """Save the state, replacing any previously saved state."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with temp_path.open("w", encoding="utf-8") as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_path, self.path)
+
+
+class S3StateStore:
+    """S3StateStore class.
+
+    Stores the run state as a JSON object in an S3 bucket, so that it persists across
+    runs of ephemeral containers.
+    """
+
+    def __init__(self, bucket: str, key: str) -> None:
+        self.bucket = bucket
+        self.key = key
+        import boto3  # noqa: PLC0415
+
+        self.s3 = boto3.client("s3")
+
+    def load(self) -> dict:
+        """Load the state, or an empty state if the object does not exist yet."""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self.key)
+        except self.s3.exceptions.NoSuchKey:
+            return {}
+        return json.loads(response["Body"].read())
+
+    def save(self, state: dict) -> None:
+        """Save the state, replacing any previously saved state."""
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Body=json.dumps(state).encode(),
+            ContentType="application/json",
+        )
+
+
+def get_state_store(location: str) -> StateStore:
+    """Get a state store for a location, either an 's3://bucket/key' URI or a path."""
+    if location.startswith("s3://"):
+        bucket, _, key = location.removeprefix("s3://").partition("/")
+        if not bucket or not key:
+            message = f"Invalid S3 state store location: '{location}'"
+            raise ValueError(message)
+        return S3StateStore(bucket, key)
+    return LocalStateStore(location)
+
+
+class ProcessedPoLines:
+    """ProcessedPoLines class.
+
+    Tracks which PO lines have already had credit card slips sent, and the
+    modification_date of each PO line at the time, in a persistent state store.
+
+    PO lines seen during a run are only recorded as pending, and are committed to the
+    store with commit() once their slips have been sent. A PO line is considered
+    processed, and can be skipped, until it is modified again.
+    """
+
+    def __init__(self, store: StateStore) -> None:
+        self.store = store
+        self.processed: dict[str, str] = store.load().get("po_lines", {})
+        self.pending: dict[str, str] = {}
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def is_processed(self, po_line: dict) -> bool:
+        """Check whether a brief or full PO line record is unchanged since processed."""
+        processed_date = self.processed.get(po_line.get("number", ""))
+        return processed_date == po_line.get("modification_date", "")
+
+    def skip(self, po_line: dict) -> bool:
+        """Check whether a PO line can be skipped, counting it as skipped if so."""
+        if self.is_processed(po_line):
+            with self._lock:
+                self.skipped += 1
+            return True
+        return False
+
+    def filter(self, po_lines: Iterable[dict]) -> Generator[dict, None, None]:
+        """Yield PO lines not yet processed, recording each as pending."""
+        for po_line in po_lines:
+            if self.skip(po_line):
+                continue
+            with self._lock:
+                self.pending[po_line["number"]] = po_line.get("modification_date", "")
+            yield po_line
+
+    def commit(self) -> None:
+        """Record all pending PO lines as processed and save them to the store."""
+        with self._lock:
+            self.processed.update(self.pending)
+            self.pending = {}
+            processed = dict(self.processed)
+        self.store.save({"po_lines": processed})
+        logger.info(f"Run state saved with {len(processed)} processed PO line(s)")
@@ -1,12 +1,15 @@
 import json
 
 import boto3
+import httpx
 import pytest
+import requests
 import requests_mock
 from click.testing import CliRunner
 from moto import mock_aws
 
 from ccslips.alma import AlmaClient
+from ccslips.async_alma import AsyncAlmaClient
 from ccslips.config import Config
 
 
@@ -76,6 +79,13 @@ def mocked_alma(fund_records, po_line_records):
         )
 
         # Fund endpoints
+        mocker.get(
+            "https://example.com/acq/funds?status=ACTIVE",
+            json={
+                "fund": list(fund_records.values()),
+                "total_record_count": len(fund_records),
+            },
+        )
         mocker.get(
             "https://example.com/acq/funds?q=fund_code~FUND-abc",
             json={"fund": [fund_records["abc"]], "total_record_count": 1},
@@ -135,6 +145,27 @@ def mocked_alma(fund_records, po_line_records):
         yield mocker
 
 
+@pytest.fixture
+def mocked_alma_transport(mocked_alma):
+    """Serve httpx requests from the requests_mock routes of mocked_alma."""
+    session = requests.Session()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        response = session.get(str(request.url), timeout=10)
+        return httpx.Response(
+            response.status_code,
+            headers=dict(response.headers),
+            content=response.content,
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def async_alma_client(mocked_alma_transport):
+    return AsyncAlmaClient(transport=mocked_alma_transport)
+
+
 # AWS fixtures
 @pytest.fixture(autouse=True)
 def mocked_ses():
@@ -1,4 +1,16 @@
+import socket
+import threading
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from ccslips import alma
 from ccslips.alma import AlmaClient
+from ccslips.cache import ResponseCache
+from ccslips.config import ConfigSnapshot
+from ccslips.ratelimit import TokenBucket
+from ccslips.retry import RetryPolicy
 
 
 def test_client_initializes_with_expected_values(monkeypatch):
@@ -12,6 +24,100 @@ def test_client_initializes_with_expected_values(monkeypatch):
     assert client.timeout == 10  # noqa: PLR2004
 
 
+def test_client_uses_config_snapshot(monkeypatch):
+    config = ConfigSnapshot(
+        alma_api_url="https://alma.example.com/almaws/v1/",
+        alma_api_read_key="snapshot-key",
+        alma_api_max_workers=3,
+    )
+    monkeypatch.delenv("ALMA_API_URL")
+    client = AlmaClient(config=config)
+    assert client.headers["Authorization"] == "apikey snapshot-key"
+    assert client.timeout == 30  # noqa: PLR2004
+    assert client.max_workers == 3  # noqa: PLR2004
+    with patch.object(client, "_send") as mocked_send:
+        mocked_send.return_value.content = b"{}"
+        client.get_full_po_line("POL-123")
+    assert mocked_send.call_args.args[0] == (
+        "https://alma.example.com/almaws/v1/acq/po-lines/POL-123"
+    )
+
+
+def test_client_configures_connection_pool():
+    client = AlmaClient(pool_size=4, connection_retries=2)
+    adapter = client.session.get_adapter("https://example.com")
+    assert adapter._pool_maxsize == 4  # noqa: PLR2004, SLF001
+    assert adapter.max_retries.connect == 2  # noqa: PLR2004
+    assert adapter.max_retries.read == 0
+    assert adapter.max_retries.status == 0
+
+
+@pytest.fixture
+def unresponsive_server():
+    """Local server accepting connections and reading requests without answering."""
+    server = socket.create_server(("127.0.0.1", 0))
+    connections = []
+
+    def accept():
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            connection.recv(65536)
+            connections.append(connection)
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield server, connections
+    server.close()
+    for connection in connections:
+        connection.close()
+
+
+def test_client_read_timeouts_retried_only_by_retry_policy(
+    mocked_alma, unresponsive_server
+):
+    mocked_alma.stop()
+    server, connections = unresponsive_server
+    retry_policy = RetryPolicy(max_attempts=2, sleep=lambda _: None)
+    config = ConfigSnapshot(
+        alma_api_url=f"http://127.0.0.1:{server.getsockname()[1]}/",
+        alma_api_timeout=0.2,
+    )
+    with (
+        AlmaClient(retry_policy=retry_policy, config=config) as client,
+        pytest.raises(requests.ConnectionError),
+    ):
+        client.get_full_po_line("POL-123")
+    assert len(connections) == 2  # noqa: PLR2004
+    assert retry_policy.retries == 1
+
+
+def test_client_connection_pool_configured_from_env(monkeypatch):
+    monkeypatch.setenv("ALMA_API_POOL_SIZE", "7")
+    monkeypatch.setenv("ALMA_API_CONNECTION_RETRIES", "0")
+    client = AlmaClient()
+    assert client.pool_size == 7  # noqa: PLR2004
+    assert client.connection_retries == 0
+
+
+def test_client_context_manager_closes_session():
+    client = AlmaClient()
+    with patch.object(client.session, "close") as mocked_close:
+        with client:
+            pass
+        mocked_close.assert_called_once()
+
+
+def test_client_requests_share_session(alma_client, mocked_alma):
+    with patch.object(
+        alma_client.session, "get", wraps=alma_client.session.get
+    ) as mocked_get:
+        list(alma_client.get_full_po_lines("PURCHASE_NOLETTER", "2023-01-02"))
+    assert mocked_get.call_count == 3  # noqa: PLR2004
+
+
 def test_get_paged(alma_client):
     records = alma_client.get_paged(
         endpoint="paged",
@@ -73,3 +179,396 @@ def test_get_full_po_lines_with_parameters(alma_client):
 def test_alma_get_fund_by_code(alma_client):
     fund = alma_client.get_fund_by_code("FUND-abc")
     assert fund["fund"][0]["code"] == "FUND-abc"
+
+
+def test_client_rate_limiter_configured_from_env(monkeypatch):
+    monkeypatch.setenv("ALMA_API_RATE_LIMIT", "4")
+    monkeypatch.setenv("ALMA_API_RATE_BURST", "2")
+    client = AlmaClient()
+    assert client.rate_limiter.max_rate == 4  # noqa: PLR2004
+    assert client.rate_limiter.burst == 2  # noqa: PLR2004
+
+
+def test_client_acquires_rate_limit_token_per_request(alma_client):
+    with patch.object(alma_client.rate_limiter, "acquire") as mocked_acquire:
+        list(alma_client.get_full_po_lines("PURCHASE_NOLETTER", "2023-01-02"))
+    assert mocked_acquire.call_count == 3  # noqa: PLR2004
+
+
+def test_clients_can_share_rate_limiter():
+    rate_limiter = TokenBucket(rate=5)
+    assert AlmaClient(rate_limiter=rate_limiter).rate_limiter is rate_limiter
+    assert AlmaClient(rate_limiter=rate_limiter).rate_limiter is rate_limiter
+
+
+def test_client_records_daily_calls_remaining(alma_client, mocked_alma):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        headers={"X-Exl-Api-Remaining": "4321"},
+        json={"number": "POL-123"},
+    )
+    alma_client.get_full_po_line("POL-123")
+    assert alma_client.daily_calls_remaining == 4321  # noqa: PLR2004
+
+
+def test_get_full_po_line_selected_fields(alma_client):
+    assert alma_client.get_full_po_line(
+        "POL-all-fields", fields={"number": None, "price": {"sum": None}}
+    ) == {"number": "POL-all-fields", "price": {"sum": "12.0"}}
+
+
+def test_client_retries_throttled_request(alma_client, mocked_alma):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        [
+            {"status_code": 429, "headers": {"Retry-After": "0"}},
+            {"json": {"number": "POL-123"}},
+        ],
+    )
+    with patch.object(
+        alma_client.rate_limiter, "throttled", wraps=alma_client.rate_limiter.throttled
+    ) as mocked_throttled:
+        assert alma_client.get_full_po_line("POL-123") == {"number": "POL-123"}
+    mocked_throttled.assert_called_once_with(0.0)
+
+
+def test_client_raises_error_when_throttle_retries_exhausted(alma_client, mocked_alma):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        status_code=429,
+        headers={"Retry-After": "0"},
+    )
+    alma_client.throttle_retries = 2
+    with pytest.raises(requests.HTTPError, match="429"):
+        alma_client.get_full_po_line("POL-123")
+    assert mocked_alma.call_count == 3  # noqa: PLR2004
+
+
+def test_client_does_not_retry_daily_threshold(alma_client, mocked_alma):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        status_code=429,
+        text='{"errorList": {"error": [{"errorCode": "DAILY_THRESHOLD"}]}}',
+    )
+    with pytest.raises(requests.HTTPError, match="429"):
+        alma_client.get_full_po_line("POL-123")
+    assert mocked_alma.call_count == 1
+
+
+def test_client_max_workers_configured_from_env(monkeypatch):
+    monkeypatch.setenv("ALMA_API_MAX_WORKERS", "16")
+    client = AlmaClient()
+    assert client.max_workers == 16  # noqa: PLR2004
+    assert client.pool_size == 16  # noqa: PLR2004
+
+
+def test_get_full_po_lines_concurrently_yields_in_brief_order():
+    with AlmaClient(max_workers=3) as client:
+        result = list(client.get_full_po_lines("PURCHASE_NOLETTER", "2023-01-02"))
+    assert [line["number"] for line in result] == [
+        "POL-all-fields",
+        "POL-missing-fields",
+    ]
+
+
+def test_map_in_order_yields_results_in_item_order():
+    with AlmaClient(max_workers=4) as client:
+        assert list(client.map_in_order(lambda i: i * 2, range(20))) == [
+            i * 2 for i in range(20)
+        ]
+
+
+def test_map_in_order_raises_exception_from_worker():
+    def fail_on_three(i):
+        if i == 3:  # noqa: PLR2004
+            message = "three"
+            raise ValueError(message)
+        return i
+
+    with AlmaClient(max_workers=2) as client:
+        results = client.map_in_order(fail_on_three, range(10))
+        assert [next(results) for _ in range(3)] == [0, 1, 2]
+        with pytest.raises(ValueError, match="three"):
+            next(results)
+
+
+def test_client_close_shuts_down_executor():
+    client = AlmaClient(max_workers=2)
+    executor = client.executor
+    client.close()
+    assert executor._shutdown  # noqa: SLF001
+    assert client._executor is None  # noqa: SLF001
+
+
+def test_get_brief_po_lines_newest_first_requests_sort_order(alma_client, mocked_alma):
+    list(alma_client.get_brief_po_lines("PURCHASE_NOLETTER", newest_first=True))
+    assert mocked_alma.last_request.qs["order_by"] == ["created_date"]
+    assert mocked_alma.last_request.qs["direction"] == ["desc"]
+
+
+def test_get_full_po_lines_with_date_requests_newest_first(alma_client, mocked_alma):
+    list(alma_client.get_full_po_lines("PURCHASE_NOLETTER", "2023-01-02"))
+    assert mocked_alma.request_history[0].qs["order_by"] == ["created_date"]
+
+
+def _po_lines(*dates):
+    return [
+        {"number": f"POL-{i}", "created_date": f"{date}Z"} for i, date in enumerate(dates)
+    ]
+
+
+def test_filter_po_lines_by_created_date_stops_after_date():
+    def po_lines():
+        yield from _po_lines("2023-01-03", "2023-01-02", "2023-01-02", "2023-01-01")
+        pytest.fail("Iterated past the target date")
+
+    result = alma.filter_po_lines_by_created_date(po_lines(), "2023-01-02", 3)
+    assert [line["number"] for line in result] == ["POL-1", "POL-2"]
+
+
+def test_filter_po_lines_by_created_date_does_not_stop_before_min_ordered():
+    po_lines = _po_lines("2023-01-03", "2023-01-01", "2023-01-01", "2023-01-02")
+    result = alma.filter_po_lines_by_created_date(po_lines, "2023-01-02", 100)
+    assert [line["number"] for line in result] == ["POL-3"]
+
+
+def test_filter_po_lines_by_created_date_unordered_checks_all_po_lines():
+    po_lines = _po_lines("2023-01-01", "2023-01-03", "2023-01-01", "2023-01-02")
+    result = alma.filter_po_lines_by_created_date(po_lines, "2023-01-02", 2)
+    assert [line["number"] for line in result] == ["POL-3"]
+
+
+def test_filter_po_lines_by_created_date_skips_po_lines_without_date():
+    po_lines = [{"number": "POL-no-date"}, *_po_lines("2023-01-02")]
+    result = alma.filter_po_lines_by_created_date(po_lines, "2023-01-02", 1)
+    assert [line["number"] for line in result] == ["POL-0"]
+
+
+def test_filter_po_lines_by_created_date_range_stops_after_start_date():
+    def po_lines():
+        yield from _po_lines("2023-01-05", "2023-01-03", "2023-01-02", "2023-01-01")
+        pytest.fail("Iterated past the start date")
+
+    result = alma.filter_po_lines_by_created_date(
+        po_lines(), "2023-01-02", 3, end_date="2023-01-04"
+    )
+    assert [line["number"] for line in result] == ["POL-1", "POL-2"]
+
+
+def test_get_full_po_lines_with_date_range(alma_client, mocked_alma):
+    result = list(
+        alma_client.get_full_po_lines("PURCHASE_NOLETTER", "2023-01-01", "2023-12-31")
+    )
+    assert [line["number"] for line in result] == [
+        "POL-all-fields",
+        "POL-missing-fields",
+        "POL-wrong-date",
+    ]
+    assert mocked_alma.call_count == 4  # noqa: PLR2004
+
+
+def test_get_fund_external_id_caches_fund(alma_client, mocked_alma):
+    assert alma_client.get_fund_external_id("FUND-abc") == "account-abc"
+    assert alma_client.get_fund_external_id("FUND-abc") == "account-abc"
+    assert mocked_alma.call_count == 1
+    assert alma_client.fund_cache.hits == 1
+
+
+def test_get_fund_external_id_fund_not_found(alma_client):
+    assert alma_client.get_fund_external_id("FUND-nothing-here") is None
+
+
+def test_client_fund_cache_persisted_in_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    with AlmaClient() as client:
+        client.get_fund_external_id("FUND-abc")
+    assert (tmp_path / "funds.sqlite3").exists()
+
+
+def test_prefetch_funds_all_active_funds(alma_client, mocked_alma):
+    assert alma_client.prefetch_funds() == 3  # noqa: PLR2004
+    assert mocked_alma.last_request.qs["status"] == ["active"]
+    assert alma_client.get_fund_external_id("FUND-def") == "account-def"
+    assert alma_client.get_fund_external_id("FUND-no-external-id") is None
+    assert mocked_alma.call_count == 1
+
+
+def test_prefetch_funds_by_fund_code(alma_client, mocked_alma):
+    fund_codes = ["FUND-abc", "FUND-def", "FUND-abc"]
+    assert alma_client.prefetch_funds(fund_codes) == 2  # noqa: PLR2004
+    assert mocked_alma.call_count == 2  # noqa: PLR2004
+    assert alma_client.get_fund_external_id("FUND-abc") == "account-abc"
+    assert mocked_alma.call_count == 2  # noqa: PLR2004
+
+
+def test_get_paged_does_not_modify_params(alma_client):
+    params = {"status": "ACTIVE"}
+    list(alma_client.get_paged("acq/po-lines", "po_line", params=params))
+    assert params == {"status": "ACTIVE"}
+
+
+def test_get_paged_concurrently_yields_records_in_page_order(mocked_alma):
+    for offset in range(20, 50, 10):
+        mocked_alma.get(
+            f"https://example.com/paged?limit=10&offset={offset}",
+            complete_qs=True,
+            json={
+                "fake_records": [
+                    {"record_number": i} for i in range(offset, offset + 10)
+                ],
+                "total_record_count": 50,
+            },
+        )
+    mocked_alma.get(
+        "https://example.com/paged?limit=10&offset=0",
+        complete_qs=True,
+        json={
+            "fake_records": [{"record_number": i} for i in range(10)],
+            "total_record_count": 50,
+        },
+    )
+    mocked_alma.get(
+        "https://example.com/paged?limit=10&offset=10",
+        complete_qs=True,
+        json={
+            "fake_records": [{"record_number": i} for i in range(10, 20)],
+            "total_record_count": 50,
+        },
+    )
+    with AlmaClient(max_workers=4) as client:
+        records = list(client.get_paged("paged", "fake_records", limit=10))
+    assert [record["record_number"] for record in records] == list(range(50))
+
+
+def test_get_paged_no_records(alma_client, mocked_alma):
+    mocked_alma.get("https://example.com/empty", json={"total_record_count": 0})
+    assert list(alma_client.get_paged("empty", "fake_records")) == []
+    assert mocked_alma.call_count == 1
+
+
+def test_get_paged_many_pages_does_not_recurse(alma_client, mocked_alma):
+    alma_client.rate_limiter = TokenBucket(rate=1_000_000, burst=1000)
+    mocked_alma.get(
+        "https://example.com/many",
+        json={"fake_records": [{}], "total_record_count": 2000},
+    )
+    records = alma_client.get_paged("many", "fake_records", limit=1)
+    assert len(list(records)) == 2000  # noqa: PLR2004
+
+
+def test_get_full_po_lines_skips_brief_po_lines(alma_client, mocked_alma):
+    result = list(
+        alma_client.get_full_po_lines(
+            "PURCHASE_NOLETTER",
+            "2023-01-02",
+            skip=lambda line: line["number"] == "POL-all-fields",
+        )
+    )
+    assert [line["number"] for line in result] == ["POL-missing-fields"]
+    assert not [r for r in mocked_alma.request_history if "POL-all-fields" in r.url]
+
+
+def test_get_full_po_lines_where_filters_brief_po_lines(alma_client, mocked_alma):
+    result = list(
+        alma_client.get_full_po_lines(
+            "PURCHASE_NOLETTER",
+            "2023-01-02",
+            where=lambda line: line["number"] == "POL-all-fields",
+        )
+    )
+    assert [line["number"] for line in result] == ["POL-all-fields"]
+    assert not [r for r in mocked_alma.request_history if "POL-missing-fields" in r.url]
+
+
+def test_get_full_po_lines_where_filters_full_po_lines(
+    alma_client, mocked_alma, po_line_records
+):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-missing-fields",
+        json={**po_line_records["missing_fields"], "note": []},
+    )
+    result = list(
+        alma_client.get_full_po_lines(
+            "PURCHASE_NOLETTER", "2023-01-02", where=lambda line: line.get("note") != []
+        )
+    )
+    assert [line["number"] for line in result] == ["POL-all-fields"]
+    assert [r for r in mocked_alma.request_history if "POL-missing-fields" in r.url]
+
+
+def test_get_cache_key_sorts_params():
+    assert alma.get_cache_key("https://example.com/a", {"b": "2", "a": "1"}) == (
+        "https://example.com/a?a=1&b=2"
+    )
+
+
+def test_client_response_cache_configured_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("RESPONSE_CACHE_TTL", "60")
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    with AlmaClient() as client:
+        assert client.response_cache.ttl == 60  # noqa: PLR2004
+        client.get_full_po_line("POL-all-fields")
+    assert (tmp_path / "responses.sqlite3").exists()
+    assert AlmaClient().response_cache is not None
+    monkeypatch.delenv("RESPONSE_CACHE_TTL")
+    assert AlmaClient().response_cache is None
+
+
+def test_client_uses_fresh_cached_response(mocked_alma):
+    client = AlmaClient(response_cache=ResponseCache(ttl=60))
+    first = client.get_full_po_line("POL-all-fields")
+    assert client.get_full_po_line("POL-all-fields") == first
+    assert mocked_alma.call_count == 1
+
+
+def test_client_revalidates_stale_cached_response(mocked_alma):
+    now = [1000.0]
+    client = AlmaClient(response_cache=ResponseCache(ttl=60, clock=lambda: now[0]))
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        [
+            {"json": {"number": "POL-123"}, "headers": {"ETag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+    client.get_full_po_line("POL-123")
+    now[0] += 61
+    assert client.get_full_po_line("POL-123") == {"number": "POL-123"}
+    assert mocked_alma.last_request.headers["If-None-Match"] == '"v1"'
+    assert client.response_cache.revalidations == 1
+    assert "If-None-Match" not in client.headers
+
+
+def test_client_retries_transient_server_error(mocked_alma):
+    client = AlmaClient(retry_policy=RetryPolicy(sleep=lambda _: None))
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        [{"status_code": 503}, {"status_code": 500}, {"json": {"number": "POL-123"}}],
+    )
+    assert client.get_full_po_line("POL-123") == {"number": "POL-123"}
+    assert client.retry_policy.retries == 2  # noqa: PLR2004
+
+
+def test_client_retries_connection_error(mocked_alma):
+    client = AlmaClient(retry_policy=RetryPolicy(sleep=lambda _: None))
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        [{"exc": requests.ReadTimeout}, {"json": {"number": "POL-123"}}],
+    )
+    assert client.get_full_po_line("POL-123") == {"number": "POL-123"}
+    assert client.retry_policy.retries == 1
+
+
+def test_client_raises_error_when_retry_attempts_exhausted(mocked_alma):
+    client = AlmaClient(retry_policy=RetryPolicy(max_attempts=3, sleep=lambda _: None))
+    mocked_alma.get("https://example.com/acq/po-lines/POL-123", status_code=502)
+    with pytest.raises(requests.HTTPError, match="502"):
+        client.get_full_po_line("POL-123")
+    assert mocked_alma.call_count == 3  # noqa: PLR2004
+
+
+def test_client_does_not_retry_client_error(alma_client, mocked_alma):
+    mocked_alma.get("https://example.com/acq/po-lines/POL-123", status_code=400)
+    with pytest.raises(requests.HTTPError, match="400"):
+        alma_client.get_full_po_line("POL-123")
+    assert mocked_alma.call_count == 1
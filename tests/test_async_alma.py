@@ -0,0 +1,228 @@
+import asyncio
+import random
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from ccslips import polines as po
+from ccslips.alma import AlmaClient
+from ccslips.async_alma import AsyncAlmaClient
+from ccslips.ratelimit import TokenBucket
+from ccslips.retry import RetryPolicy
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+def test_async_client_configured_from_env(monkeypatch):
+    monkeypatch.setenv("ALMA_API_MAX_CONCURRENCY", "50")
+    client = AsyncAlmaClient()
+    assert client.max_concurrency == 50  # noqa: PLR2004
+    assert client.http.base_url == "https://example.com/"
+    assert client.http.headers["Authorization"] == "apikey just-for-testing"
+    assert client.http.timeout.read == 10  # noqa: PLR2004
+
+
+def test_async_client_requests_same_urls_as_sync_client(monkeypatch, mocked_alma):
+    monkeypatch.setenv("ALMA_API_URL", "https://example.com/almaws/v1")
+    mocked_alma.get("https://example.com/almaws/acq/po-lines/POL-123", json={})
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        return httpx.Response(200, json={})
+
+    AlmaClient().get_full_po_line("POL-123")
+    asyncio.run(
+        AsyncAlmaClient(transport=httpx.MockTransport(handler)).get_full_po_line(
+            "POL-123"
+        )
+    )
+    assert requested == [mocked_alma.last_request.url]
+
+
+def test_async_client_context_manager_closes_client(async_alma_client):
+    async def use_client():
+        async with async_alma_client:
+            pass
+
+    asyncio.run(use_client())
+    assert async_alma_client.http.is_closed
+
+
+def test_async_get_paged(async_alma_client):
+    records = asyncio.run(
+        collect(async_alma_client.get_paged("paged", "fake_records", limit=10))
+    )
+    assert [record["record_number"] for record in records] == list(range(15))
+
+
+def test_async_get_brief_po_lines_with_acquisition_method(async_alma_client):
+    result = asyncio.run(
+        collect(async_alma_client.get_brief_po_lines("PURCHASE_NOLETTER"))
+    )
+    assert [line["number"] for line in result] == [
+        "POL-all-fields",
+        "POL-missing-fields",
+        "POL-wrong-date",
+    ]
+
+
+def test_async_get_full_po_line(async_alma_client):
+    result = asyncio.run(async_alma_client.get_full_po_line("POL-all-fields"))
+    assert result["number"] == "POL-all-fields"
+
+
+def test_async_get_full_po_lines_with_parameters(async_alma_client, mocked_alma):
+    result = asyncio.run(
+        collect(async_alma_client.get_full_po_lines("PURCHASE_NOLETTER", "2023-01-02"))
+    )
+    assert [line["number"] for line in result] == [
+        "POL-all-fields",
+        "POL-missing-fields",
+    ]
+    assert mocked_alma.request_history[0].qs["order_by"] == ["created_date"]
+
+
+def test_async_get_full_po_lines_where_filters_po_lines(
+    async_alma_client, mocked_alma, po_line_records
+):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-missing-fields",
+        json={**po_line_records["missing_fields"], "note": []},
+    )
+    result = asyncio.run(
+        collect(
+            async_alma_client.get_full_po_lines(
+                "PURCHASE_NOLETTER", "2023-01-02", where=po.has_cardholder_note
+            )
+        )
+    )
+    assert [line["number"] for line in result] == ["POL-all-fields"]
+    assert [r for r in mocked_alma.request_history if "POL-missing-fields" in r.url]
+
+
+def test_async_get_fund_by_code(async_alma_client):
+    result = asyncio.run(async_alma_client.get_fund_by_code("FUND-abc"))
+    assert result["fund"][0]["external_id"] == "account-abc"
+
+
+def test_async_client_retries_throttled_request(async_alma_client, mocked_alma):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        [
+            {"status_code": 429, "headers": {"Retry-After": "0"}},
+            {"json": {"number": "POL-123"}, "headers": {"X-Exl-Api-Remaining": "9"}},
+        ],
+    )
+    with patch.object(
+        async_alma_client.rate_limiter,
+        "throttled",
+        wraps=async_alma_client.rate_limiter.throttled,
+    ) as mocked_throttled:
+        result = asyncio.run(async_alma_client.get_full_po_line("POL-123"))
+    assert result == {"number": "POL-123"}
+    mocked_throttled.assert_called_once_with(0.0)
+    assert async_alma_client.daily_calls_remaining == 9  # noqa: PLR2004
+
+
+def test_async_client_does_not_retry_daily_threshold(async_alma_client, mocked_alma):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        status_code=429,
+        text='{"errorList": {"error": [{"errorCode": "DAILY_THRESHOLD"}]}}',
+    )
+    with pytest.raises(httpx.HTTPStatusError, match="429"):
+        asyncio.run(async_alma_client.get_full_po_line("POL-123"))
+    assert mocked_alma.call_count == 1
+
+
+def test_async_client_shares_rate_limiter(mocked_alma_transport):
+    rate_limiter = TokenBucket(rate=1000, burst=10)
+    client = AsyncAlmaClient(rate_limiter=rate_limiter, transport=mocked_alma_transport)
+    with patch.object(
+        rate_limiter, "acquire_async", wraps=rate_limiter.acquire_async
+    ) as mocked_acquire:
+        asyncio.run(collect(client.get_paged("paged", "fake_records", limit=10)))
+    assert mocked_acquire.call_count == 2  # noqa: PLR2004
+
+
+def test_async_map_in_order_yields_results_in_item_order(async_alma_client):
+    async_alma_client.max_concurrency = 3
+    in_flight = []
+
+    async def delayed_double(item):
+        in_flight.append(item)
+        await asyncio.sleep(random.random() / 100)  # noqa: S311
+        in_flight.remove(item)
+        return item * 2
+
+    async def run():
+        results = []
+        async for result in async_alma_client.map_in_order(delayed_double, range(20)):
+            assert len(in_flight) < 3  # noqa: PLR2004
+            results.append(result)
+        return results
+
+    assert asyncio.run(run()) == [item * 2 for item in range(20)]
+
+
+def test_async_map_in_order_raises_exception_from_task(async_alma_client):
+    async def fail_on_three(item):
+        if item == 3:  # noqa: PLR2004
+            raise ValueError(item)
+        return item
+
+    with pytest.raises(ValueError, match="3"):
+        asyncio.run(collect(async_alma_client.map_in_order(fail_on_three, range(10))))
+
+
+def test_async_get_fund_external_id_shares_concurrent_lookups(
+    async_alma_client, mocked_alma
+):
+    async def look_up_twice():
+        return await asyncio.gather(
+            async_alma_client.get_fund_external_id("FUND-abc"),
+            async_alma_client.get_fund_external_id("FUND-abc"),
+        )
+
+    assert asyncio.run(look_up_twice()) == ["account-abc", "account-abc"]
+    assert asyncio.run(async_alma_client.get_fund_external_id("FUND-abc")) == (
+        "account-abc"
+    )
+    assert mocked_alma.call_count == 1
+    assert async_alma_client.fund_cache.hits == 2  # noqa: PLR2004
+    assert async_alma_client.fund_cache.misses == 1
+
+
+def test_async_get_fund_external_id_fund_not_found(async_alma_client):
+    assert (
+        asyncio.run(async_alma_client.get_fund_external_id("FUND-nothing-here")) is None
+    )
+
+
+def test_async_prefetch_funds_all_active_funds(async_alma_client, mocked_alma):
+    assert asyncio.run(async_alma_client.prefetch_funds()) == 3  # noqa: PLR2004
+    assert async_alma_client.fund_cache.get("FUND-def") == (True, "account-def")
+    assert mocked_alma.call_count == 1
+
+
+def test_async_prefetch_funds_by_fund_code(async_alma_client, mocked_alma):
+    fund_codes = ["FUND-abc", "FUND-def", "FUND-abc"]
+    assert asyncio.run(async_alma_client.prefetch_funds(fund_codes)) == 2  # noqa: PLR2004
+    assert mocked_alma.call_count == 2  # noqa: PLR2004
+    assert async_alma_client.fund_cache.get("FUND-abc") == (True, "account-abc")
+
+
+def test_async_client_retries_transient_server_error(mocked_alma, mocked_alma_transport):
+    client = AsyncAlmaClient(
+        transport=mocked_alma_transport, retry_policy=RetryPolicy(jitter=lambda: 0.0)
+    )
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-123",
+        [{"status_code": 503}, {"json": {"number": "POL-123"}}],
+    )
+    assert asyncio.run(client.get_full_po_line("POL-123")) == {"number": "POL-123"}
+    assert client.retry_policy.retries == 1
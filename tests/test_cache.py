@@ -0,0 +1,168 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from ccslips.cache import FundCache, ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fund_cache_fetches_once_and_records_hits_and_misses():
+    cache = FundCache()
+    fetch = MagicMock(return_value="account-abc")
+    assert cache.get_or_fetch("FUND-abc", fetch) == "account-abc"
+    assert cache.get_or_fetch("FUND-abc", fetch) == "account-abc"
+    fetch.assert_called_once_with("FUND-abc")
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_fund_cache_caches_missing_external_id():
+    cache = FundCache()
+    fetch = MagicMock(return_value=None)
+    assert cache.get_or_fetch("FUND-nothing-here", fetch) is None
+    assert cache.get_or_fetch("FUND-nothing-here", fetch) is None
+    fetch.assert_called_once()
+
+
+def test_fund_cache_deduplicates_in_flight_fetches():
+    cache = FundCache()
+    release = threading.Event()
+    fetch = MagicMock(side_effect=lambda _: release.wait() and "account-abc")
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_fetch("FUND-abc", fetch))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["account-abc"] * 5
+    fetch.assert_called_once()
+
+
+def test_fund_cache_failed_fetch_is_not_cached():
+    cache = FundCache()
+    fetch = MagicMock(side_effect=[ValueError("failed"), "account-abc"])
+    with pytest.raises(ValueError, match="failed"):
+        cache.get_or_fetch("FUND-abc", fetch)
+    assert cache.get_or_fetch("FUND-abc", fetch) == "account-abc"
+
+
+def test_fund_cache_updated_values_are_used(tmp_path):
+    cache = FundCache(tmp_path / "funds.sqlite3")
+    cache.update({"FUND-abc": "account-abc", "FUND-def": None})
+    fetch = MagicMock()
+    assert cache.get_or_fetch("FUND-abc", fetch) == "account-abc"
+    assert cache.get_or_fetch("FUND-def", fetch) is None
+    fetch.assert_not_called()
+    cache.close()
+    assert FundCache(tmp_path / "funds.sqlite3").get_or_fetch("FUND-abc", fetch) == (
+        "account-abc"
+    )
+
+
+def test_fund_cache_persists_values_between_instances(tmp_path):
+    path = tmp_path / "cache" / "funds.sqlite3"
+    cache = FundCache(path)
+    cache.get_or_fetch("FUND-abc", lambda _: "account-abc")
+    cache.close()
+    fetch = MagicMock()
+    cache = FundCache(path)
+    assert cache.get_or_fetch("FUND-abc", fetch) == "account-abc"
+    fetch.assert_not_called()
+    assert cache.hits == 1
+
+
+def test_fund_cache_persisted_values_expire_after_ttl(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "funds.sqlite3"
+    cache = FundCache(path, ttl=60, clock=clock)
+    cache.get_or_fetch("FUND-abc", lambda _: "old-account")
+    cache.close()
+    clock.now += 61
+    cache = FundCache(path, ttl=60, clock=clock)
+    assert cache.get_or_fetch("FUND-abc", lambda _: "new-account") == "new-account"
+    assert cache.misses == 1
+
+
+def test_fund_cache_get_does_not_fetch(tmp_path):
+    cache = FundCache(tmp_path / "funds.sqlite3")
+    assert cache.get("FUND-abc") == (False, None)
+    cache.update({"FUND-abc": "account-abc"})
+    assert cache.get("FUND-abc") == (True, "account-abc")
+    cache.close()
+    assert FundCache(tmp_path / "funds.sqlite3").get("FUND-abc") == (
+        True,
+        "account-abc",
+    )
+
+
+def test_response_cache_fresh_response_is_hit():
+    cache = ResponseCache(ttl=60)
+    assert cache.get("https://example.com/a") is None
+    cache.store("https://example.com/a", b'{"a": 1}')
+    cached = cache.get("https://example.com/a")
+    assert cached.body == b'{"a": 1}'
+    assert cached.fresh
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_ratio == 0.5  # noqa: PLR2004
+
+
+def test_response_cache_stale_response_without_validators_is_ignored():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    cache.store("https://example.com/a", b"{}")
+    clock.now += 61
+    assert cache.get("https://example.com/a") is None
+
+
+def test_response_cache_stale_response_with_validators_can_be_refreshed():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    cache.store("https://example.com/a", b"{}", etag='"v1"', last_modified="Mon")
+    clock.now += 61
+    cached = cache.get("https://example.com/a")
+    assert not cached.fresh
+    assert cached.conditional_headers == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon",
+    }
+    cache.refresh("https://example.com/a")
+    assert cache.get("https://example.com/a").fresh
+    assert cache.revalidations == 1
+
+
+def test_response_cache_evicts_least_recently_used_over_max_size():
+    clock = FakeClock()
+    cache = ResponseCache(max_size=10, clock=clock)
+    for url in ["a", "b", "c"]:
+        clock.now += 1
+        cache.store(url, b"1234")
+    assert cache.get("a") is None
+    clock.now += 1
+    cache.get("b")
+    clock.now += 1
+    cache.store("d", b"1234")
+    assert cache.get("b") is not None
+    assert cache.get("c") is None
+    cache.store("too-big", b"12345678901")
+    assert cache.get("too-big") is None
+
+
+def test_response_cache_persisted_to_path(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3")
+    cache.store("https://example.com/a", b"{}")
+    cache.close()
+    assert ResponseCache(tmp_path / "responses.sqlite3").get("https://example.com/a")
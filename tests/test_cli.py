@@ -1,8 +1,13 @@
 import logging
+import subprocess
+import sys
+import zipfile
+from unittest.mock import patch
 
 from freezegun import freeze_time
 
 from ccslips.cli import main
+from ccslips.email import Email
 
 
 @freeze_time("2023-01-04")
@@ -15,6 +20,8 @@ def test_cli_options_from_env(caplog, runner):
         "Credit card slips processing complete for date 2023-01-02. Email sent to "
         "recipient(s) ('recipient1@example.com', 'recipient2@example.com')" in caplog.text
     )
+    assert "Run metrics: {" in caplog.text
+    assert '"alma.request": {"count": ' in caplog.text
 
 
 def test_cli_all_options_passed(caplog, runner):
@@ -38,9 +45,217 @@ def test_cli_all_options_passed(caplog, runner):
     assert (
         "Command called with options: {'source_email': 'from@example.com', "
         "'recipient_email': ('recipient1@example.com', 'recipient2@example.com'), "
-        "'date': '2023-01-02', 'verbose': True}" in caplog.text
+        "'date': '2023-01-02', 'verbose': True, 'start_date': None, "
+        "'end_date': None, 'combine_dates': False, 'cardholder_notes_only': False, "
+        "'compress_attachments': None, 'prefetch_funds': None, "
+        "'execution_mode': 'sequential'}" in caplog.text
     )
     assert (
         "Credit card slips processing complete for date 2023-01-02. Email sent to "
         "recipient(s) ('recipient1@example.com', 'recipient2@example.com')" in caplog.text
     )
+
+
+def test_cli_pipelined_execution_mode(caplog, runner):
+    result = runner.invoke(
+        main,
+        [
+            "--date",
+            "2023-01-02",
+            "--prefetch-funds",
+            "all",
+            "--execution-mode",
+            "pipelined",
+        ],
+    )
+    assert result.exit_code == 0
+    assert "2 credit card slip(s) generated" in caplog.text
+    assert "Fund cache: 2 hits, 0 misses" in caplog.text
+    assert "Alma API requests retried 0 time(s)" in caplog.text
+    assert "Stage 'fetch': 2 items" in caplog.text
+    assert "Stage 'render': 2 items" in caplog.text
+    assert "Pipeline bottleneck: stage" in caplog.text
+
+
+def test_cli_warns_when_daily_calls_remaining_low(
+    caplog, mocked_alma, po_line_records, runner
+):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-all-fields",
+        json=po_line_records["all_fields"],
+        headers={"X-Exl-Api-Remaining": "42"},
+    )
+    result = runner.invoke(main, ["--date", "2023-01-02"])
+    assert result.exit_code == 0
+    assert "Only 42 Alma API calls left for the day" in caplog.text
+
+
+def test_cli_async_execution_mode(caplog, monkeypatch, runner, mocked_alma_transport):
+    monkeypatch.setattr(
+        "ccslips.async_alma.httpx.AsyncHTTPTransport",
+        lambda **_: mocked_alma_transport,
+    )
+    result = runner.invoke(main, ["--date", "2023-01-02", "--execution-mode", "async"])
+    assert result.exit_code == 0
+    assert "2 credit card slip(s) generated" in caplog.text
+    assert "Fund cache: 0 hits, 2 misses" in caplog.text
+
+
+def test_cli_date_range_attaches_file_per_date(caplog, runner):
+    with patch.object(
+        Email, "populate", autospec=True, side_effect=Email.populate
+    ) as mocked_populate:
+        result = runner.invoke(
+            main, ["--start-date", "2023-01-01", "--end-date", "2023-01-03"]
+        )
+    assert result.exit_code == 0
+    assert [
+        attachment["filename"]
+        for attachment in mocked_populate.call_args.kwargs["attachments"]
+    ] == [
+        "2023-01-01_credit_card_slips.htm",
+        "2023-01-02_credit_card_slips.htm",
+        "2023-01-03_credit_card_slips.htm",
+    ]
+    assert "2 credit card slip(s) created on 2023-01-02" in caplog.text
+    assert "0 credit card slip(s) created on 2023-01-03" in caplog.text
+    assert "complete for date 2023-01-01 to 2023-01-03" in caplog.text
+
+
+def test_cli_date_range_combined_attachment(runner):
+    with patch.object(
+        Email, "populate", autospec=True, side_effect=Email.populate
+    ) as mocked_populate:
+        result = runner.invoke(
+            main,
+            ["--start-date", "2023-01-01", "--end-date", "2023-01-03", "--combine-dates"],
+        )
+    assert result.exit_code == 0
+    attachments = mocked_populate.call_args.kwargs["attachments"]
+    assert [attachment["filename"] for attachment in attachments] == [
+        "2023-01-01_to_2023-01-03_credit_card_slips.htm"
+    ]
+    assert mocked_populate.call_args.kwargs["subject"] == (
+        "TEST Credit card slips 2023-01-01 to 2023-01-03"
+    )
+
+
+def test_cli_cardholder_notes_only(caplog, mocked_alma, po_line_records, runner):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-missing-fields",
+        json={**po_line_records["missing_fields"], "note": []},
+    )
+    result = runner.invoke(main, ["--date", "2023-01-02", "--cardholder-notes-only"])
+    assert result.exit_code == 0
+    assert "1 credit card slip(s) generated" in caplog.text
+
+
+def test_cli_splits_slips_into_emails_under_max_size(caplog, monkeypatch, runner):
+    monkeypatch.setenv("SES_MAX_ATTACHMENTS_SIZE", "5000")
+    with patch.object(
+        Email, "populate", autospec=True, side_effect=Email.populate
+    ) as mocked_populate:
+        result = runner.invoke(
+            main, ["--start-date", "2023-01-01", "--end-date", "2023-01-03"]
+        )
+    assert result.exit_code == 0
+    assert [
+        (
+            call.kwargs["subject"],
+            [attachment["filename"] for attachment in call.kwargs["attachments"]],
+        )
+        for call in mocked_populate.call_args_list
+    ] == [
+        (
+            "TEST Credit card slips 2023-01-01 to 2023-01-03 (part 1 of 2)",
+            [
+                "2023-01-01_credit_card_slips.htm",
+                "2023-01-02_credit_card_slips_part1.htm",
+            ],
+        ),
+        (
+            "TEST Credit card slips 2023-01-01 to 2023-01-03 (part 2 of 2)",
+            [
+                "2023-01-02_credit_card_slips_part2.htm",
+                "2023-01-03_credit_card_slips.htm",
+            ],
+        ),
+    ]
+    assert "Slips for 2023-01-02 split into 2 attachments" in caplog.text
+
+
+def test_cli_compress_attachments(runner):
+    attached_files = {}
+    populate = Email.populate
+
+    def read_attachments(email, **kwargs):
+        for attachment in kwargs["attachments"]:
+            attachment["content"].seek(0)
+            with zipfile.ZipFile(attachment["content"]) as archive:
+                attached_files[attachment["filename"]] = {
+                    name: archive.read(name) for name in archive.namelist()
+                }
+        populate(email, **kwargs)
+
+    with patch.object(Email, "populate", autospec=True, side_effect=read_attachments):
+        result = runner.invoke(
+            main, ["--date", "2023-01-02", "--compress-attachments", "zip"]
+        )
+    assert result.exit_code == 0
+    assert list(attached_files) == ["2023-01-02_credit_card_slips.zip"]
+    slips = attached_files["2023-01-02_credit_card_slips.zip"][
+        "2023-01-02_credit_card_slips.htm"
+    ]
+    assert slips.startswith(b"<html>")
+    assert b"POL-all-fields" in slips
+    assert b"POL-missing-fields" in slips
+
+
+def test_cli_date_range_invalid_options(runner):
+    result = runner.invoke(main, ["--date", "2023-01-01", "--end-date", "2023-01-03"])
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert "--date cannot be combined" in result.output
+    result = runner.invoke(
+        main, ["--start-date", "2023-01-03", "--end-date", "2023-01-01"]
+    )
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert "--end-date must not be before --start-date" in result.output
+
+
+def test_cli_state_store_skips_po_lines_already_sent(
+    caplog, monkeypatch, runner, tmp_path
+):
+    monkeypatch.setenv("STATE_STORE", str(tmp_path / "state.json"))
+    result = runner.invoke(main, ["--date", "2023-01-02"])
+    assert result.exit_code == 0
+    assert "2 credit card slip(s) generated" in caplog.text
+    assert "Run state saved with 2 processed PO line(s)" in caplog.text
+    caplog.clear()
+    result = runner.invoke(main, ["--date", "2023-01-02"])
+    assert result.exit_code == 0
+    assert "0 credit card slip(s) generated" in caplog.text
+    assert "2 PO line(s) skipped as already processed" in caplog.text
+
+
+def test_cli_logs_response_cache_hit_ratio(caplog, monkeypatch, runner):
+    monkeypatch.setenv("RESPONSE_CACHE_TTL", "60")
+    result = runner.invoke(main, ["--date", "2023-01-02"])
+    assert result.exit_code == 0
+    assert "Response cache: 0 hits, 0 revalidated, 5 misses (0.0% hit ratio)" in (
+        caplog.text
+    )
+
+
+def test_cli_import_defers_heavy_dependencies():
+    modules = ["asyncio", "boto3", "httpx", "requests", "sentry_sdk", "xml.etree"]
+    result = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-c",
+            f"import sys, ccslips.cli; print([m for m in {modules} if m in sys.modules])",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,62 @@
+import gzip
+import zipfile
+from io import BytesIO
+
+from ccslips.compress import CompressedStream, get_deflate_bound
+
+DATA = b"<html>" + b"<table><tr><td>slip</td></tr></table>" * 1000 + b"</html>"
+
+
+def write_compressed(compression, data=DATA):
+    raw = BytesIO()
+    stream = CompressedStream(raw, compression, "slips.htm")
+    for start in range(0, len(data), 1000):
+        stream.write(data[start : start + 1000])
+    bound = stream.get_size_bound()
+    stream.close()
+    return raw, bound
+
+
+def test_compressed_stream_gzip():
+    raw, _ = write_compressed("gzip")
+    assert gzip.decompress(raw.getvalue()) == DATA
+    assert len(raw.getvalue()) < len(DATA) // 10
+
+
+def test_compressed_stream_zip():
+    raw, _ = write_compressed("zip")
+    with zipfile.ZipFile(raw) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["slips.htm"]
+        assert archive.read("slips.htm") == DATA
+
+
+def test_compressed_stream_leaves_file_open():
+    raw, _ = write_compressed("gzip")
+    assert not raw.closed
+
+
+def test_compressed_stream_size_bound_before_close():
+    for compression in ("gzip", "zip"):
+        raw, bound = write_compressed(compression)
+        assert len(raw.getvalue()) <= bound
+
+
+def test_compressed_stream_flush_tightens_size_bound():
+    raw = BytesIO()
+    stream = CompressedStream(raw, "zip", "slips.htm")
+    stream.write(DATA)
+    unflushed_bound = stream.get_size_bound(100)
+    stream.flush()
+    flushed_bound = stream.get_size_bound(100)
+    stream.write(b"x" * 100)
+    stream.close()
+    assert len(raw.getvalue()) <= flushed_bound < unflushed_bound
+    with zipfile.ZipFile(raw) as archive:
+        assert archive.read("slips.htm") == DATA + b"x" * 100
+
+
+def test_get_deflate_bound_of_incompressible_data():
+    data = bytes(range(256)) * 64
+    raw, _ = write_compressed("gzip", data)
+    assert len(raw.getvalue()) <= get_deflate_bound(len(data)) + 18
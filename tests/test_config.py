@@ -1,4 +1,7 @@
+import dataclasses
 import logging
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -37,6 +40,13 @@ def test_configure_sentry_env_variable_is_dsn(monkeypatch):
     assert result == "Sentry DSN found, exceptions will be sent to Sentry with env=test"
 
 
+def test_configure_sentry_traces_sample_rate(monkeypatch):
+    monkeypatch.setenv("SENTRY_DSN", "https://1234567890@00000.ingest.sentry.io/123456")
+    with patch("sentry_sdk.init") as init:
+        configure_sentry(0.25)
+    assert init.call_args.kwargs["traces_sample_rate"] == 0.25  # noqa: PLR2004
+
+
 def test_config_env_var_access_success(config_instance):
     assert config_instance.WORKSPACE == "test"
 
@@ -48,6 +58,32 @@ def test_config_env_var_access_error(config_instance):
         _ = config_instance.DOES_NOT_EXIST
 
 
+def test_config_snapshot_parses_env_vars(monkeypatch, config_instance):
+    monkeypatch.setenv("ALMA_API_RATE_LIMIT", "2.5")
+    monkeypatch.setenv("CACHE_DIR", "/tmp/ccslips")  # noqa: S108
+    monkeypatch.setenv("SES_MAX_ATTACHMENTS_SIZE", "1000000")
+    snapshot = config_instance.snapshot()
+    assert snapshot.alma_api_url == "https://example.com"
+    assert snapshot.alma_api_timeout == 10.0  # noqa: PLR2004
+    assert snapshot.alma_api_rate_limit == 2.5  # noqa: PLR2004
+    assert snapshot.alma_api_max_workers == 1
+    assert snapshot.cache_dir == Path("/tmp/ccslips")  # noqa: S108
+    assert snapshot.ses_recipient_email == (
+        "recipient1@example.com",
+        "recipient2@example.com",
+    )
+    assert snapshot.response_cache_ttl is None
+    assert snapshot.ses_max_attachments_size == 1_000_000  # noqa: PLR2004
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.workspace = "prod"  # type: ignore[misc]
+
+
+def test_config_snapshot_invalid_value_raises_error(monkeypatch, config_instance):
+    monkeypatch.setenv("ALMA_API_MAX_WORKERS", "many")
+    with pytest.raises(ValueError, match="Invalid value for ALMA_API_MAX_WORKERS"):
+        config_instance.snapshot()
+
+
 def test_config_check_required_env_vars_success(config_instance):
     _ = config_instance.check_required_env_vars
 
@@ -0,0 +1,38 @@
+import json
+import sys
+
+from ccslips import decode
+from ccslips.decode import loads, select_fields
+
+
+def test_loads_decodes_bytes_and_str():
+    assert loads(b'{"number": "POL-1"}') == {"number": "POL-1"}
+    assert loads('{"number": "POL-1"}') == {"number": "POL-1"}
+
+
+def test_json_loads_falls_back_to_standard_library(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    assert decode._get_json_loads() is json.loads  # noqa: SLF001
+
+
+def test_select_fields_selects_nested_fields_and_arrays():
+    record = {
+        "number": "POL-1",
+        "price": {"sum": "12.00", "currency": {"value": "USD"}},
+        "location": [{"quantity": 1, "copy": [{"barcode": "123"}]}, {"copy": []}],
+        "interested_user": [{"primary_id": "user"}],
+    }
+    assert select_fields(
+        record,
+        {
+            "number": None,
+            "price": {"sum": None},
+            "location": {"quantity": None},
+            "note": None,
+        },
+    ) == {"number": "POL-1", "price": {"sum": "12.00"}, "location": [{"quantity": 1}, {}]}
+
+
+def test_select_fields_without_fields_returns_value():
+    record = {"number": "POL-1"}
+    assert select_fields(record, None) is record
@@ -1,7 +1,10 @@
+from email import message_from_bytes
 from email.message import EmailMessage
+from email.policy import default
 from http import HTTPStatus
+from io import BytesIO
 
-from ccslips.email import Email
+from ccslips.email import Email, get_base64_size, group_attachments
 
 
 def test_populate_email_with_all_data():
@@ -45,3 +48,88 @@ def test_send_email():
     )
     response = email.send()
     assert response["ResponseMetadata"]["HTTPStatusCode"] == HTTPStatus.OK
+
+
+def test_populate_email_with_file_attachment():
+    content = "<html>" + "<p>Slip ünïcode</p>" * 5000 + "</html>"
+    email = Email()
+    email.populate(
+        "from@example.com",
+        "to@example.com",
+        "Hello, it's an email!",
+        attachments=[
+            {"content": BytesIO(content.encode()), "filename": "slips.htm"},
+            {"content": "Some text content", "filename": "attachment.txt"},
+        ],
+        body="I am the message body",
+    )
+    attachments = list(email.iter_attachments())
+    assert attachments[0].get_content_type() == "text/html"
+    assert attachments[0].get_filename() == "slips.htm"
+    assert attachments[0].get_content() == content
+    assert attachments[1].get_content() == "Some text content\n"
+    assert email.get_body().get_content() == "I am the message body\n"
+    parsed = message_from_bytes(email.as_bytes(), policy=default)
+    assert next(parsed.iter_attachments()).get_content() == content
+
+
+def test_add_file_attachment_without_body_unknown_type():
+    email = Email()
+    email.add_file_attachment(BytesIO(b"\x00\x01"), "data.unknown")
+    attachment = next(email.iter_attachments())
+    assert attachment.get_content_type() == "application/octet-stream"
+    assert attachment.get_content() == b"\x00\x01"
+
+
+def test_add_file_attachment_multiple_files():
+    email = Email()
+    email.add_file_attachment(BytesIO(b"<html>1</html>"), "first.htm")
+    email.add_file_attachment(BytesIO(b"<html>2</html>"), "second.htm")
+    assert [a.get_filename() for a in email.iter_attachments()] == [
+        "first.htm",
+        "second.htm",
+    ]
+
+
+def test_add_file_attachment_compressed_file_type():
+    email = Email()
+    email.add_file_attachment(BytesIO(b"compressed"), "slips.htm.gz")
+    email.add_file_attachment(BytesIO(b"compressed"), "slips.zip")
+    assert [a.get_content_type() for a in email.iter_attachments()] == [
+        "application/gzip",
+        "application/zip",
+    ]
+
+
+def test_get_base64_size_matches_file_attachment_encoding():
+    for size in (0, 1, 56, 57, 58, 1000, 57 * 1024 + 1):
+        email = Email()
+        email.add_file_attachment(BytesIO(b"x" * size), "a_file.htm")
+        attachment = next(email.iter_attachments())
+        assert get_base64_size(size) == len(attachment.get_payload())
+
+
+def test_group_attachments_under_max_size():
+    attachments = [
+        {"content": BytesIO(b"x" * 570), "filename": f"{i}.htm"} for i in range(5)
+    ]
+    groups = group_attachments(attachments, max_size=1600)
+    assert [[a["filename"] for a in group] for group in groups] == [
+        ["0.htm", "1.htm"],
+        ["2.htm", "3.htm"],
+        ["4.htm"],
+    ]
+
+
+def test_group_attachments_oversized_attachment_grouped_alone():
+    attachments = [
+        {"content": "small", "filename": "small.htm"},
+        {"content": BytesIO(b"x" * 5000), "filename": "large.htm"},
+        {"content": "small", "filename": "small_2.htm"},
+    ]
+    groups = group_attachments(attachments, max_size=1000)
+    assert [[a["filename"] for a in group] for group in groups] == [
+        ["small.htm"],
+        ["large.htm"],
+        ["small_2.htm"],
+    ]
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import warnings
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+from ccslips.metrics import Histogram, Metrics
+
+
+def test_histogram_summary():
+    histogram = Histogram([float(seconds) for seconds in range(1, 21)], bytes=100)
+    assert histogram.summary() == {
+        "count": 20,
+        "total": 210.0,
+        "p50": 10.0,
+        "p95": 19.0,
+        "max": 20.0,
+        "bytes": 100,
+    }
+
+
+def test_histogram_summary_empty():
+    assert Histogram().summary() == {
+        "count": 0,
+        "total": 0.0,
+        "p50": 0.0,
+        "p95": 0.0,
+        "max": 0.0,
+        "bytes": 0,
+    }
+
+
+def test_metrics_record_and_timer():
+    metrics = Metrics()
+    metrics.record("alma.request", 0.5, 1024)
+    with metrics.timer("alma.request") as timing:
+        timing["bytes"] = 2048
+    summary = metrics.summary()["alma.request"]
+    assert summary["count"] == 2  # noqa: PLR2004
+    assert summary["max"] == 0.5  # noqa: PLR2004
+    assert summary["bytes"] == 3072  # noqa: PLR2004
+
+
+def test_metrics_timed_functions_and_coroutines():
+    metrics = Metrics()
+
+    @metrics.timed("sync")
+    def double(value: int) -> int:
+        return value * 2
+
+    @metrics.timed("async")
+    async def double_async(value: int) -> int:
+        return value * 2
+
+    assert double(2) == 4  # noqa: PLR2004
+    assert asyncio.run(double_async(3)) == 6  # noqa: PLR2004
+    assert double.__name__ == "double"
+    assert list(metrics.summary()) == ["async", "sync"]
+
+
+def test_metrics_to_json_and_reset():
+    metrics = Metrics()
+    metrics.record("render.slip", 0.25)
+    assert json.loads(metrics.to_json())["render.slip"]["count"] == 1
+    metrics.reset()
+    assert metrics.to_json() == "{}"
+
+
+def test_metrics_send_to_sentry():
+    metrics = Metrics()
+    metrics.record("alma.request", 0.25)
+    start = datetime(2023, 1, 4, tzinfo=UTC)
+    with patch("sentry_sdk.start_transaction") as start_transaction:
+        metrics.send_to_sentry("credit card slips", start)
+    start_transaction.assert_called_once_with(
+        name="credit card slips", op="task", start_timestamp=start
+    )
+    transaction = start_transaction.return_value
+    transaction.set_data.assert_any_call("alma.request.p95_ms", 250.0)
+    transaction.set_data.assert_any_call("metrics", metrics.summary())
+    transaction.set_measurement.assert_not_called()
+    transaction.finish.assert_called_once()
+
+
+def test_metrics_send_to_sentry_uses_no_deprecated_api():
+    metrics = Metrics()
+    metrics.record("alma.request", 0.25)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        metrics.send_to_sentry("credit card slips", datetime(2023, 1, 4, tzinfo=UTC))
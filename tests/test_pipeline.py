@@ -0,0 +1,107 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from ccslips import polines as po
+from ccslips.pipeline import Pipeline, credit_card_slips_pipeline
+
+
+def test_pipeline_yields_results_in_source_order():
+    pipeline = Pipeline(
+        range(50),
+        [("double", lambda i: i * 2), ("string", str)],
+        maxsize=2,
+    )
+    assert list(pipeline) == [str(i * 2) for i in range(50)]
+
+
+def test_pipeline_runs_stages_on_separate_threads():
+    thread_names = set()
+
+    def record_thread(item):
+        thread_names.add(threading.current_thread().name)
+        return item
+
+    list(Pipeline(range(3), [("first", record_thread), ("second", record_thread)]))
+    assert thread_names == {"pipeline-first", "pipeline-second"}
+
+
+def test_pipeline_records_stage_timings():
+    pipeline = Pipeline(range(5), [("noop", lambda i: i)], source_name="numbers")
+    list(pipeline)
+    assert [(timing.name, timing.items) for timing in pipeline.timings] == [
+        ("numbers", 5),
+        ("noop", 5),
+    ]
+    assert all(timing.busy >= 0 for timing in pipeline.timings)
+    assert pipeline.bottleneck in pipeline.timings
+
+
+def test_pipeline_raises_stage_exception():
+    def fail_on_three(i):
+        if i == 3:  # noqa: PLR2004
+            message = "three"
+            raise ValueError(message)
+        return i
+
+    results = []
+    with pytest.raises(ValueError, match="three"):
+        results.extend(Pipeline(range(10), [("fail", fail_on_three)]))
+    assert results == [0, 1, 2]
+
+
+def test_pipeline_raises_source_exception():
+    def source():
+        yield 1
+        message = "source failed"
+        raise RuntimeError(message)
+
+    with pytest.raises(RuntimeError, match="source failed"):
+        list(Pipeline(source(), [("noop", lambda i: i)]))
+
+
+def test_pipeline_stops_when_consumer_stops():
+    pipeline = Pipeline(iter(range(1000)), [("noop", lambda i: i)], maxsize=1)
+    results = iter(pipeline)
+    assert next(results) == 0
+    results.close()
+    assert pipeline._stop.is_set()  # noqa: SLF001
+
+
+def test_pipeline_joins_threads_when_consumer_stops():
+    def slow_source():
+        for i in range(1000):
+            time.sleep(0.05)
+            yield i
+
+    pipeline = Pipeline(slow_source(), [("noop", lambda i: i)], maxsize=1)
+    results = iter(pipeline)
+    assert next(results) == 0
+    results.close()
+    assert not [
+        thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")
+    ]
+
+
+def test_credit_card_slips_pipeline_fetches_po_lines_on_fetch_thread(alma_client):
+    fetch_threads = []
+
+    def get_po_lines(*_args, **_kwargs):
+        fetch_threads.append(threading.current_thread().name)
+        return []
+
+    with patch("ccslips.pipeline.get_po_lines", side_effect=get_po_lines):
+        pipeline = credit_card_slips_pipeline("2023-01-02", alma_client, "po-lines")
+        assert not fetch_threads
+        assert not list(pipeline)
+    assert fetch_threads == ["pipeline-fetch"]
+
+
+def test_credit_card_slips_pipeline_renders_same_slips_as_sequential(alma_client):
+    pipeline = credit_card_slips_pipeline("2023-01-02", alma_client)
+    expected = po.generate_credit_card_slips_html(
+        po.process_po_lines("2023-01-02", alma_client)
+    )
+    assert f"<html>{''.join(pipeline)}</html>" == expected
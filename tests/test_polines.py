@@ -1,6 +1,13 @@
+import asyncio
+import zipfile
 from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
 
 from ccslips import polines as po
+from ccslips.decode import select_fields
+from ccslips.email import get_base64_size
+from ccslips.slip import CreditCardSlip
 
 
 def test_process_po_lines():
@@ -8,41 +15,131 @@ def test_process_po_lines():
     assert len(result) == 2  # noqa: PLR2004
 
 
+def test_process_po_lines_prefetch_all_funds(alma_client, mocked_alma):
+    result = list(po.process_po_lines("2023-01-02", alma_client, prefetch_funds="all"))
+    assert result[0].account_1 == "account-abc"
+    assert result[0].account_2 == "account-def"
+    assert not [r for r in mocked_alma.request_history if "fund_code" in r.url]
+    assert alma_client.fund_cache.misses == 0
+
+
+def test_process_po_lines_prefetch_po_line_funds(alma_client, mocked_alma):
+    result = po.process_po_lines("2023-01-02", alma_client, prefetch_funds="po-lines")
+    next(result)
+    fund_requests = [r for r in mocked_alma.request_history if "acq/funds" in r.url]
+    assert len(fund_requests) == 2  # noqa: PLR2004
+
+
+def test_process_po_lines_by_date(alma_client):
+    result = list(po.process_po_lines_by_date("2023-01-01", "2023-12-31", alma_client))
+    assert [(date, data.po_line_number) for date, data in result] == [
+        ("2023-01-02", "POL-all-fields"),
+        ("2023-01-02", "POL-missing-fields"),
+        ("2023-12-11", "POL-wrong-date"),
+    ]
+    assert [data for _, data in result[:2]] == list(po.process_po_lines("2023-01-02"))
+
+
+def test_process_po_lines_with_cardholder_notes_only(
+    alma_client, mocked_alma, po_line_records
+):
+    mocked_alma.get(
+        "https://example.com/acq/po-lines/POL-missing-fields",
+        json={**po_line_records["missing_fields"], "note": []},
+    )
+    result = list(
+        po.process_po_lines("2023-01-02", alma_client, where=po.has_cardholder_note)
+    )
+    assert [data.po_line_number for data in result] == ["POL-all-fields"]
+    assert [r for r in mocked_alma.request_history if "POL-missing-fields" in r.url]
+
+
+def test_process_po_lines_with_cardholder_notes_only_in_brief_records(
+    alma_client, mocked_alma, po_line_records
+):
+    mocked_alma.get(
+        (
+            "https://example.com/acq/po-lines?status=ACTIVE&"
+            "acquisition_method=PURCHASE_NOLETTER"
+        ),
+        json={
+            "po_line": [
+                po_line_records["all_fields"],
+                {**po_line_records["missing_fields"], "note": []},
+            ],
+            "total_record_count": 2,
+        },
+    )
+    result = list(
+        po.process_po_lines("2023-01-02", alma_client, where=po.has_cardholder_note)
+    )
+    assert [data.po_line_number for data in result] == ["POL-all-fields"]
+    assert not [r for r in mocked_alma.request_history if "POL-missing-fields" in r.url]
+
+
+def test_get_fund_codes(po_line_records):
+    assert po.get_fund_codes(po_line_records.values()) == {"FUND-abc", "FUND-def"}
+
+
 def test_extract_credit_card_slip_data_all_fields_present(alma_client, po_line_records):
     assert po.extract_credit_card_slip_data(
         alma_client, po_line_records["all_fields"]
-    ) == {
-        "account_1": "account-abc",
-        "account_2": "account-def",
-        "cardholder": "cardholder name",
-        "invoice_number": "Invoice #: 230102BOO",
-        "po_date": "230102",
-        "po_line_number": "POL-all-fields",
-        "price": "$12.00",
-        "quantity": "3",
-        "item_title": "Book title",
-        "total_price": "$12.00",
-        "vendor_code": "CORP",
-        "vendor_name": "Corporation",
-    }
+    ) == CreditCardSlip(
+        account_1="account-abc",
+        account_2="account-def",
+        cardholder="cardholder name",
+        invoice_number="Invoice #: 230102BOO",
+        po_date="230102",
+        po_line_number="POL-all-fields",
+        price="$12.00",
+        quantity="3",
+        item_title="Book title",
+        total_price="$12.00",
+        vendor_code="CORP",
+        vendor_name="Corporation",
+    )
 
 
 def test_extract_credit_card_slip_data_missing_fields(alma_client, po_line_records):
     assert po.extract_credit_card_slip_data(
         alma_client, po_line_records["missing_fields"]
-    ) == {
-        "account_1": "No fund code found",
-        "cardholder": "No cardholder note found",
-        "invoice_number": "Invoice #: 230102UNK",
-        "po_date": "230102",
-        "po_line_number": "POL-missing-fields",
-        "price": "$0.00",
-        "quantity": "0",
-        "item_title": "Unknown title",
-        "total_price": "$0.00",
-        "vendor_code": "No vendor found",
-        "vendor_name": "No vendor found",
-    }
+    ) == CreditCardSlip(
+        account_1="No fund code found",
+        cardholder="No cardholder note found",
+        invoice_number="Invoice #: 230102UNK",
+        po_date="230102",
+        po_line_number="POL-missing-fields",
+        price="$0.00",
+        quantity="0",
+        item_title="Unknown title",
+        total_price="$0.00",
+        vendor_code="No vendor found",
+        vendor_name="No vendor found",
+    )
+
+
+def test_extract_credit_card_slip_data_from_selected_fields(alma_client, po_line_records):
+    po_line = po_line_records["all_fields"]
+    assert po.extract_credit_card_slip_data(
+        alma_client, select_fields(po_line, po.PO_LINE_FIELDS)
+    ) == po.extract_credit_card_slip_data(alma_client, po_line)
+
+
+def test_extract_credit_card_slips_data_matches_per_line(alma_client, po_line_records):
+    records = list(po_line_records.values())
+    assert po.extract_credit_card_slips_data(alma_client, records) == [
+        po.extract_credit_card_slip_data(alma_client, record) for record in records
+    ]
+
+
+def test_extract_credit_card_slips_data_converts_each_date_once(
+    alma_client, po_line_records
+):
+    records = [po_line_records["all_fields"], po_line_records["missing_fields"]] * 5
+    with patch("ccslips.polines.get_po_date", wraps=po.get_po_date) as mocked:
+        slips = po.extract_credit_card_slips_data(alma_client, records)
+    assert len(slips) == 10  # noqa: PLR2004
+    mocked.assert_called_once_with("2023-01-02Z")
 
 
 def test_get_cardholder_from_notes_no_notes():
@@ -64,6 +161,13 @@ def test_get_cardholder_from_notes_gets_correct_note():
     assert po.get_cardholder_from_notes(notes) == "winner"
 
 
+def test_has_cardholder_note(po_line_records):
+    assert po.has_cardholder_note(po_line_records["all_fields"])
+    assert po.has_cardholder_note(po_line_records["missing_fields"])
+    assert not po.has_cardholder_note({"note": []})
+    assert not po.has_cardholder_note({"note": [{"note_text": "CC not this one"}]})
+
+
 def test_get_quantity_from_locations_no_locations():
     assert po.get_quantity_from_locations(None) == "0"
 
@@ -126,38 +230,41 @@ def test_get_total_price_from_fund_distribution_sums_fund_amounts():
     ) == Decimal("10.00")
 
 
-def test_get_account_data_no_fund_distribution(alma_client):
-    assert po.get_account_data(alma_client, []) == {"account_1": "No fund code found"}
+def test_get_account_numbers_no_fund_distribution(alma_client):
+    assert po.get_account_numbers(alma_client, []) == ("No fund code found", None)
 
 
-def test_get_account_data_with_one_account(alma_client):
+def test_get_account_numbers_with_one_account(alma_client):
     fund_distribution = [{"fund_code": {"value": "FUND-abc"}}]
-    assert po.get_account_data(alma_client, fund_distribution) == {
-        "account_1": "account-abc"
-    }
+    assert po.get_account_numbers(alma_client, fund_distribution) == (
+        "account-abc",
+        None,
+    )
 
 
-def test_get_account_data_with_two_accounts(alma_client):
+def test_get_account_numbers_with_two_accounts(alma_client):
     fund_distribution = [
         {"fund_code": {"value": "FUND-abc"}},
         {"fund_code": {"value": "FUND-def"}},
     ]
-    assert po.get_account_data(alma_client, fund_distribution) == {
-        "account_1": "account-abc",
-        "account_2": "account-def",
-    }
+    assert po.get_account_numbers(alma_client, fund_distribution) == (
+        "account-abc",
+        "account-def",
+    )
 
 
-def test_get_account_data_with_more_than_two_accounts_only_returns_two(alma_client):
+def test_get_account_numbers_with_more_than_two_accounts_only_returns_two(
+    alma_client,
+):
     fund_distribution = [
         {"fund_code": {"value": "FUND-abc"}},
         {"fund_code": {"value": "FUND-def"}},
         {"fund_code": {"value": "FUND-ghi"}},
     ]
-    assert po.get_account_data(alma_client, fund_distribution) == {
-        "account_1": "account-abc",
-        "account_2": "account-def",
-    }
+    assert po.get_account_numbers(alma_client, fund_distribution) == (
+        "account-abc",
+        "account-def",
+    )
 
 
 def test_get_account_number_from_fund_no_fund_code(alma_client):
@@ -210,9 +317,7 @@ def test_generate_credit_card_slips_html_populates_all_fields():
             "vendor_name": "Corporation",
         }
     ]
-    assert (
-        po.generate_credit_card_slips_html(po_line_data)
-        == """<html><ccslip>
+    assert po.generate_credit_card_slips_html(po_line_data) == """<html><ccslip>
   <p align="center">
     <b>MIT Libraries Credit Card Purchase</b>
     <br />
@@ -361,4 +466,127 @@ Memo #, use Invoice # + CRE (YYMMDD"XXX"CRE)</td>
   <hr class="pb" />
   <p style="page-break-before: always" />
 </ccslip></html>"""
+
+
+def test_write_credit_card_slips_html_matches_generated_html(po_line_records):
+    po_line_data = [
+        {"po_line_number": "POL-1", "item_title": "Fish & Chips"},
+        {"po_line_number": "POL-2"},
+    ]
+    sink = BytesIO()
+    assert po.write_credit_card_slips_html(iter(po_line_data), sink) == 2  # noqa: PLR2004
+    assert sink.getvalue().decode() == po.generate_credit_card_slips_html(po_line_data)
+
+
+def test_write_credit_card_slips_html_writes_default_text_if_no_data():
+    sink = BytesIO()
+    assert po.write_credit_card_slips_html([], sink) == 0
+    assert sink.getvalue() == b"<html><p>No credit card orders on this date</p></html>"
+
+
+def test_sharded_slips_html_writer_splits_slips_under_max_size():
+    slips = [f"<p>slip {i}</p>" * 10 for i in range(20)]
+    max_size = 1000
+    writer = po.ShardedSlipsHtmlWriter(BytesIO, max_size=max_size)
+    assert po.write_rendered_slips_html(slips, writer) == 20  # noqa: PLR2004
+    documents = [sink.getvalue().decode() for sink in writer.sinks]
+    assert len(documents) > 1
+    assert all(get_base64_size(len(document)) <= max_size for document in documents)
+    assert all(
+        document.startswith("<html>") and document.endswith("</html>")
+        for document in documents
+    )
+    assert "".join(document[6:-7] for document in documents) == "".join(slips)
+
+
+def test_sharded_slips_html_writer_writes_oversized_slip_alone():
+    writer = po.ShardedSlipsHtmlWriter(BytesIO, max_size=100)
+    for slip in ("<p>1</p>", "<p>big</p>" * 20, "<p>3</p>"):
+        writer.write(slip)
+    assert writer.close() == 3  # noqa: PLR2004
+    assert [sink.getvalue().count(b"<p>") for sink in writer.sinks] == [1, 20, 1]
+
+
+def test_sharded_slips_html_writer_without_max_size_writes_one_document():
+    writer = po.ShardedSlipsHtmlWriter(BytesIO)
+    sink = BytesIO()
+    slips = ["<p>slip</p>"] * 1000
+    po.write_rendered_slips_html(slips, writer)
+    po.write_rendered_slips_html(slips, sink)
+    assert [s.getvalue() for s in writer.sinks] == [sink.getvalue()]
+
+
+def test_sharded_slips_html_writer_compresses_slips_under_max_size():
+    slips = [f"<table><tr><td>slip {i}</td></tr></table>" * 50 for i in range(200)]
+    max_size = 4000
+    writer = po.ShardedSlipsHtmlWriter(
+        BytesIO, max_size, compression="zip", filename="slips.htm"
+    )
+    assert po.write_rendered_slips_html(slips, writer) == 200  # noqa: PLR2004
+    assert len(writer.sinks) > 1
+    assert all(get_base64_size(len(sink.getvalue())) <= max_size for sink in writer.sinks)
+    documents = []
+    for sink in writer.sinks:
+        with zipfile.ZipFile(sink) as archive:
+            documents.append(archive.read("slips.htm").decode())
+    assert "".join(document[6:-7] for document in documents) == "".join(slips)
+
+
+def test_process_po_lines_async_matches_process_po_lines(async_alma_client):
+    async def collect():
+        return [
+            data
+            async for data in po.process_po_lines_async("2023-01-02", async_alma_client)
+        ]
+
+    assert asyncio.run(collect()) == list(po.process_po_lines("2023-01-02"))
+    assert async_alma_client.fund_cache.misses == 2  # noqa: PLR2004
+
+
+def test_process_po_lines_async_prefetch_po_line_funds(async_alma_client, mocked_alma):
+    async def collect():
+        return [
+            data
+            async for data in po.process_po_lines_async(
+                "2023-01-02", async_alma_client, prefetch_funds="po-lines"
+            )
+        ]
+
+    result = asyncio.run(collect())
+    assert result[0].account_1 == "account-abc"
+    fund_requests = [r for r in mocked_alma.request_history if "acq/funds" in r.url]
+    assert len(fund_requests) == 2  # noqa: PLR2004
+
+
+def test_write_credit_card_slips_html_by_date_writes_file_per_date():
+    dated_po_line_data = [
+        ("2023-01-03", {"po_line_number": "POL-1"}),
+        ("2023-01-01", {"po_line_number": "POL-2"}),
+        ("2023-01-03", {"po_line_number": "POL-3"}),
+    ]
+    sinks = {date: BytesIO() for date in ["2023-01-01", "2023-01-02", "2023-01-03"]}
+    assert po.write_credit_card_slips_html_by_date(dated_po_line_data, sinks) == {
+        "2023-01-01": 1,
+        "2023-01-02": 0,
+        "2023-01-03": 2,
+    }
+    assert sinks["2023-01-03"].getvalue().decode() == (
+        po.generate_credit_card_slips_html(
+            [{"po_line_number": "POL-1"}, {"po_line_number": "POL-3"}]
+        )
+    )
+    assert sinks["2023-01-02"].getvalue().decode() == po.NO_SLIPS_HTML
+
+
+def test_write_credit_card_slips_html_by_date_combines_shared_file():
+    dated_po_line_data = [
+        ("2023-01-02", {"po_line_number": "POL-1"}),
+        ("2023-01-01", {"po_line_number": "POL-2"}),
+    ]
+    sink = BytesIO()
+    po.write_credit_card_slips_html_by_date(
+        dated_po_line_data, {"2023-01-01": sink, "2023-01-02": sink}
+    )
+    assert sink.getvalue().decode() == po.generate_credit_card_slips_html(
+        data for _, data in dated_po_line_data
     )
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+from ccslips.ratelimit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_token_bucket_allows_burst_without_waiting(clock):
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_token_bucket_waits_for_refill_after_burst(clock):
+    bucket = TokenBucket(rate=2, burst=1, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(0.5)
+
+
+def test_token_bucket_does_not_wait_after_idle_period(clock):
+    bucket = TokenBucket(rate=2, burst=1, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    clock.now += 10
+    assert bucket.acquire() == 0.0
+
+
+def test_token_bucket_throttled_halves_rate_and_pauses(clock):
+    bucket = TokenBucket(rate=8, burst=4, clock=clock, sleep=clock.sleep)
+    bucket.throttled(retry_after=2)
+    assert bucket.rate == 4  # noqa: PLR2004
+    assert bucket.acquire() == pytest.approx(2)
+
+
+def test_token_bucket_throttled_caps_retry_after(clock):
+    bucket = TokenBucket(rate=8, burst=4, max_pause=5, clock=clock, sleep=clock.sleep)
+    bucket.throttled(retry_after=3600)
+    assert bucket.acquire() == pytest.approx(5)
+
+
+def test_token_bucket_throttled_without_retry_after_waits_one_token(clock):
+    bucket = TokenBucket(rate=8, burst=4, clock=clock, sleep=clock.sleep)
+    bucket.throttled()
+    assert bucket.acquire() == pytest.approx(0.25)
+
+
+def test_token_bucket_throttled_respects_min_rate(clock):
+    bucket = TokenBucket(rate=2, min_rate=1.5, clock=clock, sleep=clock.sleep)
+    bucket.throttled()
+    bucket.throttled()
+    assert bucket.rate == 1.5  # noqa: PLR2004
+
+
+def test_token_bucket_succeeded_recovers_up_to_max_rate(clock):
+    bucket = TokenBucket(rate=10, clock=clock, sleep=clock.sleep)
+    bucket.throttled()
+    for _ in range(20):
+        bucket.succeeded()
+    assert bucket.rate == 10  # noqa: PLR2004
+
+
+def test_token_bucket_invalid_parameters_raise_error():
+    with pytest.raises(ValueError, match="Rate limit rate must be positive"):
+        TokenBucket(rate=0)
+
+
+def test_token_bucket_shared_across_threads_hands_out_burst_once():
+    bucket = TokenBucket(rate=0.001, burst=5, sleep=lambda _: None)
+    waits = []
+
+    def take():
+        waits.append(bucket.acquire())
+
+    threads = [threading.Thread(target=take) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert waits == [0.0] * 5
+    assert bucket._tokens < 1  # noqa: SLF001
+
+
+def test_token_bucket_acquire_async_waits_for_refill():
+    bucket = TokenBucket(rate=100, burst=1)
+
+    async def take_two():
+        return [await bucket.acquire_async(), await bucket.acquire_async()]
+
+    first, second = asyncio.run(take_two())
+    assert first == 0.0
+    assert second == pytest.approx(0.01, abs=0.005)
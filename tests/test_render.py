@@ -0,0 +1,77 @@
+import xml.etree.ElementTree as ET
+from copy import deepcopy
+
+import pytest
+
+from ccslips.polines import populate_credit_card_slip_xml_fields
+from ccslips.render import SlipTemplate, load_slip_template
+from ccslips.slip import CreditCardSlip
+
+
+def render_with_element_tree(data):
+    template = ET.parse("config/credit_card_slip_template.xml").getroot()  # noqa: S314
+    slip = populate_credit_card_slip_xml_fields(deepcopy(template), data)
+    return ET.tostring(slip, encoding="unicode")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {
+            "account_1": "account-abc",
+            "account_2": "account-def",
+            "cardholder": "cardholder name",
+            "invoice_number": "Invoice #: 230102BOO",
+            "po_date": "230102",
+            "po_line_number": "POL-all-fields",
+            "price": "$12.00",
+            "quantity": "3",
+            "item_title": "Book title",
+            "total_price": "$12.00",
+            "vendor_code": "CORP",
+            "vendor_name": "Corporation",
+        },
+        {"account_1": "No fund code found", "item_title": ""},
+        {"item_title": 'Fish & <Chips> "quoted" été', "credit_memo_num": "x"},
+    ],
+)
+def test_slip_template_render_matches_element_tree(data):
+    assert load_slip_template().render(data) == render_with_element_tree(data)
+
+
+@pytest.mark.parametrize("account_2", ["account-def", None])
+def test_slip_template_render_credit_card_slip_matches_mapping(account_2):
+    slip = CreditCardSlip(
+        po_date="230102",
+        cardholder="Fish & <Chips>",
+        vendor_name="Corporation",
+        vendor_code="CORP",
+        account_2=account_2,
+        po_line_number="POL-all-fields",
+        item_title="",
+        quantity="3",
+        price="$12.00",
+        total_price="$12.00",
+        invoice_number="Invoice #: 230102BOO",
+    )
+    rendered = load_slip_template().render(slip)
+    assert rendered == load_slip_template().render(dict(slip.items()))
+    assert rendered == render_with_element_tree(slip)
+
+
+def test_slip_template_fields():
+    xml = ET.fromstring('<p><td class="a">0</td><td>0</td></p>')  # noqa: S314
+    template = SlipTemplate(xml)
+    assert template.fields == ["a"]
+    assert template.render({"a": "1"}) == '<p><td class="a">1</td><td>0</td></p>'
+    assert template.render({}) == '<p><td class="a">0</td><td>0</td></p>'
+
+
+def test_slip_template_field_with_child_elements_raises_error():
+    with pytest.raises(ValueError, match="cannot have child elements"):
+        SlipTemplate(ET.fromstring('<p><td class="a"><br /></td></p>'))  # noqa: S314
+
+
+def test_load_slip_template_is_cached():
+    assert load_slip_template() is load_slip_template()
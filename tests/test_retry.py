@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from ccslips.retry import RetryPolicy
+
+
+class FakeSleep:
+    def __init__(self):
+        self.delays = []
+
+    def __call__(self, seconds):
+        self.delays.append(seconds)
+
+
+@pytest.fixture
+def sleep():
+    return FakeSleep()
+
+
+def test_retry_policy_backs_off_exponentially_with_jitter(sleep):
+    policy = RetryPolicy(max_attempts=5, backoff=1, jitter=lambda: 0.5, sleep=sleep)
+    assert all(policy.wait_to_retry(attempt, "HTTP 503") for attempt in range(1, 5))
+    assert sleep.delays == [0.5, 1.0, 2.0, 4.0]
+    assert policy.retries == 4  # noqa: PLR2004
+    assert policy.waited == 7.5  # noqa: PLR2004
+
+
+def test_retry_policy_caps_backoff(sleep):
+    policy = RetryPolicy(
+        max_attempts=10, backoff=1, max_backoff=3, jitter=lambda: 1.0, sleep=sleep
+    )
+    policy.wait_to_retry(5, "HTTP 503")
+    assert sleep.delays == [3]
+
+
+def test_retry_policy_honors_retry_after(sleep):
+    policy = RetryPolicy(jitter=lambda: 0.5, sleep=sleep)
+    assert policy.wait_to_retry(1, "HTTP 503", retry_after=7)
+    assert sleep.delays == [7]
+
+
+def test_retry_policy_caps_retry_after(sleep):
+    policy = RetryPolicy(max_backoff=30, sleep=sleep)
+    assert policy.wait_to_retry(1, "HTTP 503", retry_after=3600)
+    assert sleep.delays == [30]
+
+
+def test_retry_policy_stops_after_max_attempts(sleep):
+    policy = RetryPolicy(max_attempts=2, sleep=sleep)
+    assert policy.wait_to_retry(1, "HTTP 503")
+    assert not policy.wait_to_retry(2, "HTTP 503")
+    assert policy.retries == 1
+
+
+def test_retry_policy_stops_when_budget_exhausted(sleep):
+    policy = RetryPolicy(budget=2, sleep=sleep)
+    assert policy.wait_to_retry(1, "HTTP 503")
+    assert policy.wait_to_retry(1, "HTTP 503")
+    assert not policy.wait_to_retry(1, "HTTP 503")
+    assert policy.budget_remaining == 0
+    assert policy.budget_exhausted == 1
+
+
+def test_retry_policy_wait_to_retry_async():
+    policy = RetryPolicy(jitter=lambda: 0.0)
+    assert asyncio.run(policy.wait_to_retry_async(1, "ReadTimeout"))
+    assert policy.retries == 1
+
+
+def test_retry_policy_invalid_values_raise_error():
+    with pytest.raises(ValueError, match="must be at least 1"):
+        RetryPolicy(max_attempts=0)
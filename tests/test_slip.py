@@ -0,0 +1,40 @@
+import dataclasses
+
+import pytest
+
+from ccslips.slip import CreditCardSlip
+
+SLIP = CreditCardSlip(
+    po_date="230102",
+    cardholder="cardholder name",
+    vendor_name="Corporation",
+    vendor_code="CORP",
+    po_line_number="POL-all-fields",
+    item_title="Book title",
+    quantity="3",
+    price="$12.00",
+    total_price="$12.00",
+    invoice_number="Invoice #: 230102BOO",
+)
+
+
+def test_credit_card_slip_is_immutable_and_slotted():
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        SLIP.cardholder = "someone else"  # type: ignore[misc]
+    assert not hasattr(SLIP, "__dict__")
+
+
+def test_credit_card_slip_items_skips_unset_fields():
+    assert dict(SLIP.items()) == {
+        "po_date": "230102",
+        "cardholder": "cardholder name",
+        "vendor_name": "Corporation",
+        "vendor_code": "CORP",
+        "account_1": "No fund code found",
+        "po_line_number": "POL-all-fields",
+        "item_title": "Book title",
+        "quantity": "3",
+        "price": "$12.00",
+        "total_price": "$12.00",
+        "invoice_number": "Invoice #: 230102BOO",
+    }
@@ -0,0 +1,61 @@
+import boto3
+import pytest
+
+from ccslips.state import (
+    LocalStateStore,
+    ProcessedPoLines,
+    S3StateStore,
+    get_state_store,
+)
+
+
+def test_local_state_store_round_trip(tmp_path):
+    store = LocalStateStore(tmp_path / "state" / "state.json")
+    assert store.load() == {}
+    store.save({"po_lines": {"POL-1": "2023-01-02Z"}})
+    assert store.load() == {"po_lines": {"POL-1": "2023-01-02Z"}}
+    assert [path.name for path in (tmp_path / "state").iterdir()] == ["state.json"]
+
+
+def test_s3_state_store_round_trip(mocked_ses):
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="state-bucket")
+    store = S3StateStore("state-bucket", "ccslips/state.json")
+    assert store.load() == {}
+    store.save({"po_lines": {"POL-1": "2023-01-02Z"}})
+    assert store.load() == {"po_lines": {"POL-1": "2023-01-02Z"}}
+
+
+def test_get_state_store(tmp_path):
+    s3_store = get_state_store("s3://state-bucket/ccslips/state.json")
+    assert isinstance(s3_store, S3StateStore)
+    assert (s3_store.bucket, s3_store.key) == ("state-bucket", "ccslips/state.json")
+    local_store = get_state_store(str(tmp_path / "state.json"))
+    assert isinstance(local_store, LocalStateStore)
+    with pytest.raises(ValueError, match="Invalid S3 state store location"):
+        get_state_store("s3://state-bucket")
+
+
+def test_processed_po_lines_skips_unchanged_po_lines(tmp_path):
+    store = LocalStateStore(tmp_path / "state.json")
+    store.save({"po_lines": {"POL-1": "2023-01-02Z", "POL-2": "2023-01-02Z"}})
+    state = ProcessedPoLines(store)
+    po_lines = [
+        {"number": "POL-1", "modification_date": "2023-01-02Z"},
+        {"number": "POL-2", "modification_date": "2023-01-05Z"},
+        {"number": "POL-3"},
+    ]
+    assert [line["number"] for line in state.filter(po_lines)] == ["POL-2", "POL-3"]
+    assert state.skipped == 1
+    assert state.pending == {"POL-2": "2023-01-05Z", "POL-3": ""}
+
+
+def test_processed_po_lines_commit_saves_pending_po_lines(tmp_path):
+    store = LocalStateStore(tmp_path / "state.json")
+    state = ProcessedPoLines(store)
+    list(state.filter([{"number": "POL-1", "modification_date": "2023-01-02Z"}]))
+    assert store.load() == {}
+    state.commit()
+    assert store.load() == {"po_lines": {"POL-1": "2023-01-02Z"}}
+    assert ProcessedPoLines(store).is_processed(
+        {"number": "POL-1", "modification_date": "2023-01-02Z"}
+    )